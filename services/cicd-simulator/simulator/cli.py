@@ -1,20 +1,71 @@
 """CLI interface for CI/CD pipeline simulator."""
 
 import click
+import re
 import subprocess
 import sys
+import time
 from pathlib import Path
+from typing import Optional
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich import print as rprint
+from rich.markup import escape
 
 from .parser import PipelineParser
 from .executor import StepExecutor
+from .display import LiveDisplay, OUTPUT_PREVIEW
+from .watcher import PipelineWatcher
+from .distributed import Coordinator, Worker, DEFAULT_ADDRESS, TOKEN_ENV
+from .tracing import Tracer
+from .multirun import expand_pipeline_paths, run_many as run_pipelines
+from .masking import SECRET_ENV_PREFIX, load_secrets
+from .logarchive import (DEFAULT_KEEP, LOG_DIR_ENV, LogArchive, LogArchiveWriter,
+                         default_log_dir)
+from .simulation import SimulatedExecutor, duration_model
 
 console = Console()
 
 
+def secret_options(command):
+    """Add the options that supply ``${{ secrets.NAME }}`` values."""
+    command = click.option('--secrets-file', type=click.Path(exists=True, dir_okay=False),
+                           default=None,
+                           help='Dotenv file of NAME=value secrets')(command)
+    command = click.option('--secrets-prefix', default=SECRET_ENV_PREFIX, show_default=True,
+                           help='Read secrets from environment variables with this prefix')(command)
+    return command
+
+
+def archive_options(command):
+    """Add the options that control where run logs are archived."""
+    command = click.option('--keep', type=click.IntRange(0), default=DEFAULT_KEEP,
+                           show_default=True,
+                           help='Archived runs to keep; older ones are deleted '
+                                '(0 keeps all)')(command)
+    command = click.option('--no-archive', is_flag=True,
+                           help='Do not archive the run logs '
+                                '(they are archived by default)')(command)
+    command = click.option('--log-dir', envvar=LOG_DIR_ENV, default=None,
+                           help=f'Log archive directory (default: ${LOG_DIR_ENV} '
+                                f'or ~/.cicd-sim/logs)')(command)
+    return command
+
+
+def _load_secrets(secrets_file: str, secrets_prefix: str, pipeline=None) -> dict:
+    """Load secrets for a command, warning about ones the pipeline lacks."""
+    try:
+        secrets = load_secrets(secrets_file, secrets_prefix or None)
+    except OSError as e:
+        console.print(f"[red]✗ Cannot read secrets: {e}[/red]")
+        sys.exit(1)
+    missing = [name for name in (pipeline.secrets if pipeline else []) if name not in secrets]
+    if missing:
+        console.print(f"[yellow]⚠ Secrets not provided (empty): {', '.join(missing)}[/yellow]")
+    return secrets
+
+
 @click.group()
 @click.version_option(version='1.0.0')
 def cli():
@@ -84,7 +135,22 @@ def validate(filepath: str, pipeline_type: str):
 @click.option('--workdir', '-w', 'working_dir',
               default=None,
               help='Working directory for command execution')
-def run(filepath: str, pipeline_type: str, job_filter: str, working_dir: str):
+@click.option('--max-parallel', '-p', type=int, default=None,
+              help='Maximum number of jobs to run at once (default: CPU count)')
+@click.option('--trace', 'trace_path', type=click.Path(dir_okay=False), default=None,
+              help='Write a Chrome trace (Perfetto) timeline of the run to this file')
+@click.option('--simulate-durations', 'duration_spec', default=None, metavar='SPEC',
+              help='Simulate on a virtual clock instead of running commands; SPEC is '
+                   'fixed:S, uniform:LOW,HIGH, exp:MEAN, lognormal:MU,SIGMA or '
+                   'history[:FALLBACK]')
+@click.option('--seed', type=int, default=None, help='Random seed for --simulate-durations')
+@click.option('--fail-rate', type=click.FloatRange(0, 1), default=0.0,
+              help='Probability that a simulated step fails')
+@secret_options
+@archive_options
+def run(filepath: str, pipeline_type: str, job_filter: str, working_dir: str,
+        max_parallel: int, trace_path: str, duration_spec: str, seed: int, fail_rate: float,
+        secrets_file: str, secrets_prefix: str, log_dir: str, no_archive: bool, keep: int):
     """Run a pipeline locally."""
     console.print(f"\n[bold blue]Running pipeline:[/bold blue] {filepath}")
     console.print(f"[dim]Pipeline type: {pipeline_type}[/dim]")
@@ -92,7 +158,177 @@ def run(filepath: str, pipeline_type: str, job_filter: str, working_dir: str):
         console.print(f"[dim]Job filter: {job_filter}[/dim]")
     console.print()
 
+    tracer = Tracer() if trace_path else None
+
     # Parse the pipeline
+    try:
+        parser = PipelineParser(tracer=tracer)
+        pipeline = parser.parse_file(filepath, pipeline_type)
+    except Exception as e:
+        console.print(f"[red]✗ Parse error: {e}[/red]")
+        sys.exit(1)
+
+    secrets = _load_secrets(secrets_file, secrets_prefix, pipeline)
+
+    if duration_spec:
+        if working_dir:
+            console.print("[red]✗ --workdir has no effect with --simulate-durations "
+                          "(no commands run)[/red]")
+            sys.exit(1)
+        _simulate(pipeline, duration_spec, seed, fail_rate, max_parallel, job_filter, log_dir,
+                  secrets, tracer, trace_path)
+        return
+
+    # Execute the pipeline, rendering steps as they finish
+    executor = StepExecutor(working_dir=working_dir, output_limit=OUTPUT_PREVIEW,
+                            max_parallel=max_parallel, tracer=tracer, secrets=secrets,
+                            secrets_prefix=secrets_prefix or None)
+    archive = None if no_archive else LogArchiveWriter(log_dir)
+    if archive:
+        executor.add_listener(archive)
+    try:
+        with LiveDisplay(console) as display:
+            executor.add_listener(display)
+            result = executor.execute_pipeline(pipeline, job_filter=job_filter)
+    except ValueError as e:
+        console.print(f"[red]✗ Pipeline error: {e}[/red]")
+        sys.exit(1)
+
+    _display_summary(result)
+
+    if tracer:
+        _write_trace(tracer, trace_path)
+    if archive:
+        console.print(f"[dim]Logs archived as {archive.run_id} (cicd-sim logs {archive.run_id})[/dim]")
+        LogArchive(log_dir).prune(keep)
+
+    if not result.success:
+        sys.exit(1)
+
+
+@cli.command('run-many')
+@click.argument('patterns', nargs=-1, required=True)
+@click.option('--type', '-t', 'pipeline_type',
+              type=click.Choice(['auto', 'github', 'azure']),
+              default='auto',
+              help='Pipeline type of every file (default: detect per file)')
+@click.option('--workdir', '-w', 'working_dir',
+              default=None,
+              help='Working directory for command execution')
+@click.option('--slots', '-s', type=int, default=None,
+              help='Step commands to run at once across all pipelines (default: CPU count)')
+@secret_options
+@archive_options
+def run_many(patterns: tuple[str, ...], pipeline_type: str, working_dir: str, slots: int,
+             secrets_file: str, secrets_prefix: str, log_dir: str, no_archive: bool,
+             keep: int):
+    """Run many pipelines concurrently under a shared slot budget.
+
+    PATTERNS are pipeline files, directories or globs.
+    """
+    paths = expand_pipeline_paths(patterns)
+    if not paths:
+        console.print("[red]✗ No pipeline files matched[/red]")
+        sys.exit(1)
+    secrets = _load_secrets(secrets_file, secrets_prefix)
+    console.print(f"\n[bold blue]Running {len(paths)} pipelines[/bold blue]")
+    console.print(f"[dim]Slots: {slots or 'CPU count'}[/dim]\n")
+
+    def on_finish(run):
+        if run.error:
+            console.print(f"  [red]✗[/red] {run.path}: {run.error}")
+            return
+        passed = sum(1 for j in run.result.job_results if j.success)
+        icon = "[green]✓[/green]" if run.result.success else "[red]✗[/red]"
+        logs = f" [dim]logs: {run.log_run}[/dim]" if run.log_run else ""
+        console.print(f"  {icon} {run.path} ({passed}/{len(run.result.job_results)} jobs, "
+                      f"{run.duration:.1f}s){logs}")
+
+    try:
+        runs = run_pipelines(paths, slots=slots, pipeline_type=pipeline_type,
+                             working_dir=working_dir, output_limit=OUTPUT_PREVIEW,
+                             on_finish=on_finish, secrets=secrets,
+                             secrets_prefix=secrets_prefix or None,
+                             log_dir=None if no_archive else str(log_dir or default_log_dir()))
+    except ValueError as e:
+        console.print(f"[red]✗ {e}[/red]")
+        sys.exit(1)
+
+    _display_many_summary(runs)
+    if not no_archive:
+        # Never prune a run this batch just archived, even with --keep below the batch size
+        LogArchive(log_dir).prune(keep, protect=[run.log_run for run in runs if run.log_run])
+
+    if any(run.exit_code for run in runs):
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument('filepath', type=click.Path(exists=True))
+@click.option('--type', '-t', 'pipeline_type',
+              type=click.Choice(['github', 'azure']),
+              default='github',
+              help='Pipeline type (github or azure)')
+@click.option('--workdir', '-w', 'working_dir',
+              default=None,
+              help='Working directory for command execution')
+@click.option('--debounce', default=0.3, show_default=True,
+              help='Seconds of quiet to wait for before re-running')
+@click.option('--poll', 'polling', is_flag=True,
+              help='Poll for changes instead of using inotify')
+@secret_options
+def watch(filepath: str, pipeline_type: str, working_dir: str, debounce: float, polling: bool,
+          secrets_file: str, secrets_prefix: str):
+    """Re-run affected jobs whenever the pipeline or its inputs change."""
+    def on_start(jobs):
+        console.print(f"\n[bold blue]Running jobs:[/bold blue] {', '.join(sorted(jobs))}")
+
+    def on_error(error):
+        console.print(f"[red]✗ Parse error: {error}[/red] [dim](keeping previous pipeline)[/dim]")
+
+    watcher = PipelineWatcher(filepath, pipeline_type, working_dir=working_dir,
+                              debounce=debounce, polling=polling,
+                              on_start=on_start, on_result=_display_results,
+                              on_error=on_error,
+                              secrets=_load_secrets(secrets_file, secrets_prefix),
+                              secrets_prefix=secrets_prefix or None)
+
+    console.print(f"\n[bold blue]Watching:[/bold blue] {filepath}")
+    console.print(f"[dim]Working directory: {watcher.working_dir} ({watcher.source.name})[/dim]")
+    console.print("[dim]Press Ctrl+C to stop[/dim]")
+
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        console.print("\n[dim]Stopped watching[/dim]")
+    except Exception as e:
+        console.print(f"[red]✗ Parse error: {e}[/red]")
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument('filepath', type=click.Path(exists=True))
+@click.option('--type', '-t', 'pipeline_type',
+              type=click.Choice(['github', 'azure']),
+              default='github',
+              help='Pipeline type (github or azure)')
+@click.option('--job', '-j', 'job_filter',
+              default=None,
+              help='Run only a specific job')
+@click.option('--listen', '-l', default=DEFAULT_ADDRESS, show_default=True,
+              help='Address to accept workers on (host:port or unix:/path)')
+@click.option('--min-workers', default=1, show_default=True,
+              help='Workers to wait for before starting')
+@click.option('--max-retries', default=2, show_default=True,
+              help='Times to retry a job whose worker was lost')
+@click.option('--token', envvar=TOKEN_ENV, default=None,
+              help=f'Shared token workers must present (required unless listening on '
+                   f'loopback or a Unix socket; default: ${TOKEN_ENV})')
+@secret_options
+def coordinator(filepath: str, pipeline_type: str, job_filter: str, listen: str,
+                min_workers: int, max_retries: int, token: str, secrets_file: str,
+                secrets_prefix: str):
+    """Run a pipeline by dispatching its jobs to remote workers."""
     try:
         parser = PipelineParser()
         pipeline = parser.parse_file(filepath, pipeline_type)
@@ -100,17 +336,184 @@ def run(filepath: str, pipeline_type: str, job_filter: str, working_dir: str):
         console.print(f"[red]✗ Parse error: {e}[/red]")
         sys.exit(1)
 
-    # Execute the pipeline
-    executor = StepExecutor(working_dir=working_dir)
-    result = executor.execute_pipeline(pipeline, job_filter=job_filter)
+    secrets = _load_secrets(secrets_file, secrets_prefix, pipeline)
+    try:
+        executor = Coordinator(listen, output_limit=OUTPUT_PREVIEW, max_retries=max_retries,
+                               secrets=secrets, token=token,
+                               secrets_prefix=secrets_prefix or None)
+    except (ValueError, OSError) as e:
+        console.print(f"[red]✗ Cannot listen on {listen}: {e}[/red]")
+        sys.exit(1)
+    console.print(f"\n[bold blue]Coordinating pipeline:[/bold blue] {filepath}")
+    console.print(f"[dim]Listening on {executor.address}, "
+                  f"waiting for {min_workers} worker(s)...[/dim]")
 
-    # Display results
-    _display_results(result)
+    try:
+        executor.wait_for_workers(min_workers)
+        console.print(f"[dim]Workers: {', '.join(executor.workers)}[/dim]\n")
+        with LiveDisplay(console) as display:
+            executor.add_listener(display)
+            result = executor.execute_pipeline(pipeline, job_filter=job_filter)
+    except KeyboardInterrupt:
+        console.print("\n[dim]Interrupted[/dim]")
+        sys.exit(130)
+    except ValueError as e:
+        console.print(f"[red]✗ Pipeline error: {e}[/red]")
+        sys.exit(1)
+    finally:
+        executor.close()
 
+    _display_summary(result)
     if not result.success:
         sys.exit(1)
 
 
+@cli.command()
+@click.option('--connect', '-c', 'address', required=True,
+              help='Coordinator address (host:port or unix:/path)')
+@click.option('--slots', '-s', type=int, default=None,
+              help='Jobs to run at once (default: CPU count)')
+@click.option('--workdir', '-w', 'working_dir',
+              default=None,
+              help='Working directory for command execution')
+@click.option('--name', default=None, help='Worker name shown by the coordinator')
+@click.option('--token', envvar=TOKEN_ENV, default=None,
+              help=f'Shared token of the coordinator (default: ${TOKEN_ENV})')
+def worker(address: str, slots: int, working_dir: str, name: str, token: str):
+    """Run jobs dispatched by a coordinator."""
+    runner = Worker(address, slots=slots, working_dir=working_dir, name=name, token=token,
+                    log=lambda message: console.print(f"[dim]{message}[/dim]"))
+    try:
+        runner.serve()
+    except PermissionError as e:
+        console.print(f"[red]✗ {e}[/red]")
+        sys.exit(1)
+    except OSError as e:
+        console.print(f"[red]✗ Cannot reach coordinator at {address}: {e}[/red]")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+
+def _write_trace(tracer: Tracer, trace_path: str):
+    tracer.write(trace_path)
+    console.print(f"[dim]Trace written to {trace_path} (open in ui.perfetto.dev)[/dim]")
+
+
+def _simulate(pipeline, duration_spec: str, seed: int, fail_rate: float, max_parallel: int,
+              job_filter: str, log_dir: str, secrets: dict, tracer: Optional[Tracer],
+              trace_path: Optional[str]):
+    """Run a pipeline on a virtual clock and report how it was scheduled."""
+    try:
+        durations = duration_model(duration_spec, seed, log_dir)
+        executor = SimulatedExecutor(durations, max_parallel=max_parallel,
+                                     failure_rate=fail_rate, seed=seed, tracer=tracer,
+                                     secrets=secrets)
+        started = time.monotonic()
+        result = executor.execute_pipeline(pipeline, job_filter=job_filter)
+        elapsed = time.monotonic() - started
+    except ValueError as e:
+        console.print(f"[red]✗ Simulation error: {e}[/red]")
+        sys.exit(1)
+
+    report = executor.report
+    busy = report.slot_busy
+    table = Table(show_header=False, box=None)
+    table.add_column(style="bold")
+    table.add_column(justify="right")
+    table.add_row("Jobs", f"{report.jobs_run} run, {report.jobs_skipped} skipped, "
+                          f"{report.jobs_failed} failed")
+    table.add_row("Makespan", f"{report.makespan:.1f}s")
+    table.add_row("Work", f"{report.work:.1f}s on {report.slots} slots")
+    table.add_row("Utilization", f"{report.utilization:.1%} "
+                                 f"(slots {min(busy) / report.makespan if report.makespan else 0:.0%}"
+                                 f"–{max(busy) / report.makespan if report.makespan else 0:.0%})")
+    table.add_row("Queue wait", f"mean {report.mean_queue_wait:.1f}s, "
+                                f"p95 {report.p95_queue_wait:.1f}s, max {report.max_queue_wait:.1f}s")
+    table.add_row("Peak queue", f"{report.peak_queue} jobs")
+    console.print(Panel(table, title=f"Simulated {escape(pipeline.name)} "
+                                     f"[dim]({duration_spec}, {elapsed:.2f}s real)[/dim]"))
+
+    _display_summary(result)
+    if tracer:
+        _write_trace(tracer, trace_path)
+    if not result.success:
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument('run_id', default='latest')
+@click.option('--job', '-j', 'job_filter', default=None,
+              help='Only steps of jobs matching this name or glob')
+@click.option('--step', '-s', 'step_filter', default=None,
+              help='Only steps matching this name or glob')
+@click.option('--grep', '-g', 'pattern', default=None,
+              help='Only print lines matching this regular expression')
+@click.option('--ignore-case', '-i', is_flag=True, help='Match --grep case-insensitively')
+@click.option('--list', 'list_runs', is_flag=True, help='List archived runs')
+@click.option('--log-dir', envvar=LOG_DIR_ENV, default=None,
+              help=f'Log archive directory (default: ${LOG_DIR_ENV} or ~/.cicd-sim/logs)')
+def logs(run_id: str, job_filter: str, step_filter: str, pattern: str, ignore_case: bool,
+         list_runs: bool, log_dir: str):
+    """Show archived step output of RUN_ID (a run id or prefix, latest or all)."""
+    archive = LogArchive(log_dir)
+    if list_runs:
+        _display_runs(archive)
+        return
+
+    try:
+        run_ids = archive.resolve(run_id)
+        regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0) if pattern else None
+    except (ValueError, re.error) as e:
+        console.print(f"[red]✗ {e}[/red]")
+        sys.exit(1)
+    if not run_ids:
+        console.print(f"[red]✗ No archived run matches '{run_id}' in {archive.log_dir}[/red]")
+        sys.exit(1)
+
+    matched = False
+    for current in reversed(run_ids):  # newest first
+        log = archive.open(current)
+        try:
+            if regex:
+                for match in log.grep(regex, job_filter, step_filter):
+                    matched = True
+                    prefix = f"{match.run} " if len(run_ids) > 1 else ""
+                    click.echo(f"{prefix}{match.job} › {match.step}:{match.line}: {match.text}")
+                continue
+            for entry in log.select(job_filter, step_filter):
+                matched = True
+                console.print(f"[bold]── {escape(entry['job'])} › {escape(entry['step'])}[/bold] "
+                              f"[dim]{current} · {entry.get('status', '?')} · "
+                              f"{entry.get('duration', 0):.1f}s · {entry['lines']} lines[/dim]")
+                output = log.read(entry)
+                if output:
+                    click.echo(output, nl=not output.endswith('\n'))
+        finally:
+            log.close()
+
+    if not matched:
+        sys.exit(1)
+
+
+def _display_runs(archive):
+    """List the runs in a log archive."""
+    table = Table(show_header=True, header_style="bold")
+    table.add_column("Run", style="cyan")
+    table.add_column("Pipeline")
+    table.add_column("Result", justify="center")
+    table.add_column("Steps", justify="right")
+    table.add_column("Output", justify="right")
+    table.add_column("Time", justify="right")
+    for run_id in archive.runs():
+        index = archive.open(run_id).index
+        result = "[green]passed[/green]" if index.get('success') else "[red]failed[/red]"
+        size = sum(entry['bytes'] for entry in index['steps'])
+        table.add_row(run_id, escape(index['pipeline']), result, str(len(index['steps'])),
+                      f"{size / 1024:.1f} KiB", f"{index.get('duration', 0):.1f}s")
+    console.print(table)
+
+
 def _display_results(result):
     """Display pipeline execution results."""
     status_icon = "[green]✓[/green]" if result.success else "[red]✗[/red]"
@@ -140,7 +543,11 @@ def _display_results(result):
 
         console.print(table)
 
-    # Summary
+    _display_summary(result)
+
+
+def _display_summary(result):
+    """Display the pass/fail summary of a pipeline run."""
     total_jobs = len(result.job_results)
     passed_jobs = sum(1 for j in result.job_results if j.success)
     
@@ -152,6 +559,38 @@ def _display_results(result):
         console.print("[bold red]Pipeline failed![/bold red]")
 
 
+def _display_many_summary(runs):
+    """Display the merged summary of a run-many batch."""
+    table = Table(show_header=True, header_style="bold")
+    table.add_column("Pipeline", style="cyan", overflow="fold")
+    table.add_column("Type")
+    table.add_column("Jobs passed", justify="right")
+    table.add_column("Failed jobs", overflow="fold")
+    table.add_column("Time", justify="right")
+    table.add_column("Exit", justify="center")
+
+    for run in runs:
+        if run.result is None:
+            table.add_row(run.path, run.pipeline_type or "-", "-", run.error, "-",
+                          f"[red]{run.exit_code}[/red]")
+            continue
+        jobs = run.result.job_results
+        failed = [j.job_name for j in jobs if not j.success]
+        exit_code = "[green]0[/green]" if run.exit_code == 0 else f"[red]{run.exit_code}[/red]"
+        table.add_row(run.path, run.pipeline_type,
+                      f"{sum(1 for j in jobs if j.success)}/{len(jobs)}",
+                      ", ".join(failed) or "-", f"{run.duration:.1f}s", exit_code)
+
+    console.print()
+    console.print(table)
+    passed = sum(1 for run in runs if run.exit_code == 0)
+    console.print(f"\n[bold]Summary:[/bold] {passed}/{len(runs)} pipelines passed")
+    if passed == len(runs):
+        console.print("[bold green]All pipelines completed successfully![/bold green]")
+    else:
+        console.print("[bold red]Some pipelines failed![/bold red]")
+
+
 @cli.command()
 @click.argument('filepath', type=click.Path(exists=True))
 @click.option('--type', '-t', 'pipeline_type',
@@ -175,9 +614,14 @@ def show(filepath: str, pipeline_type: str):
         for key, value in pipeline.env.items():
             console.print(f"  {key}={value}")
 
+    if pipeline.secrets:
+        console.print(f"\n[bold]Secrets:[/bold] {', '.join(pipeline.secrets)}")
+
     if pipeline.stages:
         for stage in pipeline.stages:
             console.print(f"\n[bold cyan]Stage: {stage.name}[/bold cyan]")
+            if stage.depends_on is not None:
+                console.print(f"  [dim]Depends on: {', '.join(stage.depends_on) or '(none)'}[/dim]")
             if stage.condition:
                 console.print(f"  [dim]Condition: {stage.condition}[/dim]")
             for job in stage.jobs:
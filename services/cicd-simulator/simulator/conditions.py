@@ -0,0 +1,238 @@
+"""Evaluation of GitHub Actions and Azure Pipelines condition expressions.
+
+Supports the common subset of both syntaxes:
+
+- GitHub: ``env.VAR == 'x'``, ``!=``, ``&&``, ``||``, ``!``, ``success()``,
+  ``failure()``, ``always()``, ``cancelled()``, ``secrets.NAME``, optionally
+  inside ``${{ }}``
+- Azure: ``eq()``, ``ne()``, ``and()``, ``or()``, ``not()``, ``in()``,
+  ``contains()``, ``startsWith()``, ``endsWith()``, ``variables['VAR']``,
+  ``succeeded()``, ``failed()``, ``succeededOrFailed()``, ``canceled()``
+
+Status functions look at the statuses of the job's or stage's dependencies;
+Azure's ``succeeded('Name')`` form checks a single named dependency.
+Expressions outside this subset evaluate to true, so unsupported conditions
+never block a run.
+"""
+
+import re
+from typing import Any, Optional
+
+from .events import Status
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<string>'(?:[^']|'')*'|"[^"]*")
+      | (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<op>==|!=|&&|\|\||[!(),.\[\]])
+      | (?P<name>[A-Za-z_][\w-]*)
+    )""", re.VERBOSE)
+
+_STATUS_FUNCTION = re.compile(
+    r"\b(always|success|succeeded|failure|failed|cancelled|canceled|succeededOrFailed)\s*\(")
+
+
+class _Unsupported(Exception):
+    """The expression uses syntax this evaluator does not understand."""
+
+
+def has_status_function(condition: str) -> bool:
+    """Whether a condition decides for itself how upstream status matters.
+
+    Conditions without one (e.g. ``env.X == 'y'``) only apply once all
+    dependencies succeeded, as on GitHub and Azure.
+    """
+    return bool(_STATUS_FUNCTION.search(condition))
+
+
+def evaluate(condition: str, env: dict,
+             dependencies: Optional[dict[str, Status]] = None,
+             secrets: Optional[dict[str, str]] = None) -> bool:
+    """Evaluate ``condition`` against variables, secrets and dependency statuses."""
+    condition = condition.strip()
+    if condition.startswith('${{') and condition.endswith('}}'):
+        condition = condition[3:-2].strip()
+
+    try:
+        tokens = _tokenize(condition)
+        parser = _Parser(tokens, env, dependencies or {}, secrets or {})
+        value = parser.expression()
+        if parser.position != len(tokens):
+            raise _Unsupported(condition)
+    except _Unsupported:
+        return True
+    return _truthy(value)
+
+
+def _tokenize(text: str) -> list[tuple[str, str]]:
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if not match:
+            raise _Unsupported(text)
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        position = match.end()
+    return tokens
+
+
+def _truthy(value: Any) -> bool:
+    if isinstance(value, str):
+        return value != '' and value.lower() != 'false'
+    return bool(value)
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+
+def _equal(left: Any, right: Any) -> bool:
+    return _text(left).lower() == _text(right).lower()
+
+
+class _Parser:
+    """Recursive-descent evaluator over a token list."""
+
+    def __init__(self, tokens, env: dict, dependencies: dict[str, Status],
+                 secrets: dict[str, str]):
+        self.tokens = tokens
+        self.position = 0
+        self.env = env
+        self.dependencies = dependencies
+        self.secrets = secrets
+
+    def _peek(self) -> Optional[str]:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position][1]
+        return None
+
+    def _take(self, expected: Optional[str] = None) -> tuple[str, str]:
+        if self.position >= len(self.tokens):
+            raise _Unsupported("unexpected end of expression")
+        token = self.tokens[self.position]
+        if expected is not None and token[1] != expected:
+            raise _Unsupported(f"expected {expected}")
+        self.position += 1
+        return token
+
+    def expression(self) -> Any:
+        value = self._and()
+        while self._peek() == '||':
+            self._take()
+            right = self._and()
+            value = _truthy(value) or _truthy(right)
+        return value
+
+    def _and(self) -> Any:
+        value = self._unary()
+        while self._peek() == '&&':
+            self._take()
+            right = self._unary()
+            value = _truthy(value) and _truthy(right)
+        return value
+
+    def _unary(self) -> Any:
+        if self._peek() == '!':
+            self._take()
+            return not _truthy(self._unary())
+        return self._comparison()
+
+    def _comparison(self) -> Any:
+        value = self._primary()
+        operator = self._peek()
+        if operator in ('==', '!='):
+            self._take()
+            right = self._primary()
+            return _equal(value, right) == (operator == '==')
+        return value
+
+    def _primary(self) -> Any:
+        kind, value = self._take()
+        if kind == 'string':
+            quote = value[0]
+            return value[1:-1].replace("''", "'") if quote == "'" else value[1:-1]
+        if kind == 'number':
+            return value
+        if value == '(':
+            result = self.expression()
+            self._take(')')
+            return result
+        if kind != 'name':
+            raise _Unsupported(value)
+        if value in ('true', 'false'):
+            return value == 'true'
+
+        if self._peek() == '(':
+            return self._call(value)
+        return self._reference(value)
+
+    def _reference(self, name: str) -> Any:
+        if name not in ('env', 'variables', 'secrets'):
+            raise _Unsupported(name)
+        if self._peek() == '.':
+            self._take()
+            _, key = self._take()
+        else:
+            self._take('[')
+            kind, key = self._take()
+            if kind != 'string':
+                raise _Unsupported(key)
+            key = key[1:-1]
+            self._take(']')
+        return (self.secrets if name == 'secrets' else self.env).get(key)
+
+    def _arguments(self) -> list:
+        self._take('(')
+        arguments = []
+        while self._peek() != ')':
+            arguments.append(self.expression())
+            if self._peek() == ',':
+                self._take()
+        self._take(')')
+        return arguments
+
+    def _statuses(self, names: list) -> list[Status]:
+        if not names:
+            return list(self.dependencies.values())
+        return [self.dependencies.get(str(name)) for name in names]
+
+    def _call(self, name: str) -> Any:
+        args = self._arguments()
+        lowered = name.lower()
+
+        if lowered == 'always':
+            return True
+        if lowered in ('success', 'succeeded'):
+            return all(s is Status.PASSED for s in self._statuses(args))
+        if lowered in ('failure', 'failed'):
+            return any(s is Status.FAILED for s in self._statuses(args))
+        if lowered in ('cancelled', 'canceled'):
+            return any(s is Status.CANCELLED for s in self._statuses(args))
+        if lowered == 'succeededorfailed':
+            return all(s in (Status.PASSED, Status.FAILED) for s in self._statuses(args))
+
+        if lowered == 'eq' and len(args) == 2:
+            return _equal(*args)
+        if lowered == 'ne' and len(args) == 2:
+            return not _equal(*args)
+        if lowered == 'and' and args:
+            return all(_truthy(a) for a in args)
+        if lowered == 'or' and args:
+            return any(_truthy(a) for a in args)
+        if lowered == 'not' and len(args) == 1:
+            return not _truthy(args[0])
+        if lowered == 'in' and args:
+            return any(_equal(args[0], a) for a in args[1:])
+        if lowered == 'contains' and len(args) == 2:
+            return _text(args[1]).lower() in _text(args[0]).lower()
+        if lowered == 'startswith' and len(args) == 2:
+            return _text(args[0]).lower().startswith(_text(args[1]).lower())
+        if lowered == 'endswith' and len(args) == 2:
+            return _text(args[0]).lower().endswith(_text(args[1]).lower())
+        raise _Unsupported(name)
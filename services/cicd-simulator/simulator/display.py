@@ -0,0 +1,110 @@
+"""Incremental console rendering of pipeline runs."""
+
+import threading
+import time
+
+from rich.console import Console, Group
+from rich.live import Live
+from rich.markup import escape
+from rich.text import Text
+
+from .events import Event, EventKind
+from .executor import Status
+
+OUTPUT_PREVIEW = 200  # characters of step output shown per row
+
+_STEP_LABELS = {
+    Status.PASSED: "[green]PASS[/green]",
+    Status.FAILED: "[red]FAIL[/red]",
+    Status.SKIPPED: "[yellow]SKIPPED[/yellow]",
+    Status.CANCELLED: "[yellow]CANCELLED[/yellow]",
+}
+
+_JOB_ICONS = {
+    Status.PASSED: "[green]✓[/green]",
+    Status.FAILED: "[red]✗[/red]",
+    Status.SKIPPED: "[yellow]-[/yellow]",
+    Status.CANCELLED: "[yellow]✗[/yellow]",
+}
+
+
+def _preview(step_result) -> str:
+    if step_result.skipped:
+        text = step_result.skip_reason
+    elif step_result.success:
+        text = step_result.output or "-"
+    else:
+        text = step_result.error or step_result.output
+    text = text.strip()[:OUTPUT_PREVIEW]
+    return escape(" ⏎ ".join(line for line in text.splitlines() if line.strip()))
+
+
+class LiveDisplay:
+    """Executor listener that prints each step as it finishes.
+
+    Finished steps are printed once and forgotten; only the steps currently
+    running and a few counters are kept, so memory stays constant however
+    many steps the pipeline has.
+    """
+
+    def __init__(self, console: Console):
+        self.console = console
+        self.counts = {status: 0 for status in Status}
+        self._running: dict[tuple[str, str], float] = {}
+        self._last_line: dict[tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self._live = Live(self, console=console, refresh_per_second=8, transient=True)
+
+    def __enter__(self):
+        self._live.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._live.stop()
+
+    def __call__(self, event: Event):
+        if event.kind is EventKind.STEP_STARTED:
+            with self._lock:
+                self._running[(event.job, event.step)] = event.time
+        elif event.kind is EventKind.STEP_OUTPUT:
+            lines = [line for line in event.output.splitlines() if line.strip()]
+            if lines:
+                with self._lock:
+                    if (event.job, event.step) in self._running:
+                        self._last_line[(event.job, event.step)] = lines[-1].strip()[:80]
+        elif event.kind is EventKind.STEP_FINISHED:
+            result = event.result
+            with self._lock:
+                self._running.pop((event.job, event.step), None)
+                self._last_line.pop((event.job, event.step), None)
+                self.counts[result.status] += 1
+            self._live.console.print(
+                f"    {_STEP_LABELS[result.status]} [bold]{escape(event.job)}[/bold] › "
+                f"[cyan]{escape(event.step)}[/cyan]  [dim]{_preview(result)}[/dim]",
+                overflow="ellipsis", no_wrap=True
+            )
+        elif event.kind is EventKind.JOB_FINISHED:
+            result = event.result
+            self._live.console.print(
+                f"  {_JOB_ICONS[result.status]} [bold]Job: {escape(event.job)}[/bold] "
+                f"[dim]({result.status.value})[/dim]"
+            )
+
+    def __rich__(self):
+        now = time.monotonic()
+        with self._lock:
+            running = sorted(self._running.items(), key=lambda item: item[1])
+            last_lines = dict(self._last_line)
+            counts = dict(self.counts)
+
+        lines = [
+            Text.from_markup(f"  [blue]⠿[/blue] {escape(job)} › {escape(step)} "
+                             f"[dim]{now - started:.1f}s  "
+                             f"{escape(last_lines.get((job, step), ''))}[/dim]")
+            for (job, step), started in running
+        ]
+        lines.append(Text.from_markup(
+            f"[dim]{sum(counts.values())} steps: {counts[Status.PASSED]} passed, "
+            f"{counts[Status.FAILED]} failed, {counts[Status.SKIPPED]} skipped[/dim]"
+        ))
+        return Group(*lines)
@@ -0,0 +1,460 @@
+"""Distributed execution: a coordinator dispatching jobs to remote workers.
+
+The coordinator owns the job graph (it is a StepExecutor, so scheduling,
+conditions and events work exactly as for local runs) but sends each job
+to the connected worker with the most free slots. Workers run jobs with a
+local StepExecutor, stream step events back as they happen and report the
+job result. Jobs in flight on a worker that disconnects are retried on
+another worker.
+
+Messages are newline-delimited JSON over TCP (``tcp://host:port`` or
+``host:port``) or Unix sockets (``unix:/path/to.sock``). A worker's
+``hello`` must carry the coordinator's shared token, if it has one; a
+coordinator listening on anything but a loopback address or Unix socket
+requires a token, since the jobs it sends carry secrets.
+"""
+
+import hmac
+import ipaddress
+import itertools
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Optional
+
+from .events import Event, EventKind, Status
+from .executor import StepExecutor, StepResult, JobResult
+from .masking import SECRET_ENV_PREFIX
+from .parser import Job, Step, referenced_secrets
+
+DEFAULT_ADDRESS = 'tcp://127.0.0.1:7700'
+TOKEN_ENV = 'CICD_SIM_TOKEN'
+
+
+class WorkerLost(Exception):
+    """A worker disconnected while running a job."""
+
+
+def parse_address(address: str) -> tuple[int, object]:
+    """Parse ``tcp://host:port``, ``host:port`` or ``unix:/path`` into a socket address."""
+    if address.startswith('unix:'):
+        return socket.AF_UNIX, address[len('unix:'):]
+    if address.startswith('tcp://'):
+        address = address[len('tcp://'):]
+    host, _, port = address.rpartition(':')
+    if not port.isdigit():
+        raise ValueError(f"Invalid address: {address} (expected host:port or unix:/path)")
+    return socket.AF_INET, (host or '0.0.0.0', int(port))
+
+
+def is_local_address(family: int, address) -> bool:
+    """Whether only this machine can connect to a parsed listen address."""
+    if family == socket.AF_UNIX:
+        return True
+    host = address[0]
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False  # a host name; it may resolve to anything
+
+
+def format_address(family: int, address) -> str:
+    if family == socket.AF_UNIX:
+        return f"unix:{address}"
+    return f"tcp://{address[0]}:{address[1]}"
+
+
+# Wire format
+
+def job_to_dict(job: Job) -> dict:
+    return asdict(job)
+
+
+def job_from_dict(data: dict) -> Job:
+    return Job(**{**data, 'steps': [Step(**step) for step in data['steps']]})
+
+
+def step_result_to_dict(result: StepResult) -> dict:
+    return {**asdict(result), 'status': result.status.value}
+
+
+def step_result_from_dict(data: dict) -> StepResult:
+    return StepResult(**{**data, 'status': Status(data['status'])})
+
+
+def job_result_to_dict(result: JobResult) -> dict:
+    return {
+        'job_name': result.job_name,
+        'status': result.status.value,
+        'step_results': [step_result_to_dict(r) for r in result.step_results],
+    }
+
+
+def job_result_from_dict(data: dict) -> JobResult:
+    return JobResult(
+        job_name=data['job_name'],
+        status=Status(data['status']),
+        step_results=[step_result_from_dict(r) for r in data['step_results']],
+    )
+
+
+class _Connection:
+    """A socket carrying newline-delimited JSON messages."""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self._reader = sock.makefile('r', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def send(self, message: dict):
+        data = (json.dumps(message) + '\n').encode('utf-8')
+        with self._lock:
+            self.sock.sendall(data)
+
+    def recv(self) -> Optional[dict]:
+        """Return the next message, or None once the peer has gone."""
+        try:
+            line = self._reader.readline()
+        except (OSError, ValueError):
+            return None
+        return json.loads(line) if line else None
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+@dataclass(eq=False)
+class _RemoteWorker:
+    name: str
+    slots: int
+    connection: _Connection
+    running: dict[int, Future] = field(default_factory=dict)
+    alive: bool = True
+
+    @property
+    def free(self) -> int:
+        return self.slots - len(self.running)
+
+
+class Coordinator(StepExecutor):
+    """Executes pipelines by dispatching jobs to connected workers."""
+
+    def __init__(self, listen: str = DEFAULT_ADDRESS, working_dir: str = None,
+                 output_limit: Optional[int] = None, max_retries: int = 2,
+                 worker_timeout: float = 60.0, secrets: Optional[dict[str, str]] = None,
+                 token: Optional[str] = None,
+                 secrets_prefix: Optional[str] = SECRET_ENV_PREFIX):
+        # Jobs wait for worker capacity, not for local threads
+        super().__init__(working_dir=working_dir, output_limit=output_limit, max_parallel=1024,
+                         secrets=secrets, secrets_prefix=secrets_prefix)
+        self.max_retries = max_retries
+        self.worker_timeout = worker_timeout
+        self.assignments: dict[str, list[str]] = {}  # job name -> workers it ran on
+        self.token = token
+
+        family, address = parse_address(listen)
+        if not token and not is_local_address(family, address):
+            raise ValueError(f"Listening on {listen} requires a token "
+                             f"(--token or ${TOKEN_ENV}) for workers to present")
+        if family == socket.AF_UNIX and os.path.exists(address):
+            os.unlink(address)
+        self._server = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(address)
+        self._server.listen()
+        self.address = format_address(family, self._server.getsockname())
+
+        self._workers: list[_RemoteWorker] = []
+        self._capacity = threading.Condition()
+        self._job_ids = itertools.count(1)
+        self._pipeline_env: dict = {}
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    @property
+    def workers(self) -> list[str]:
+        """Names of the currently connected workers."""
+        with self._capacity:
+            return [w.name for w in self._workers if w.alive]
+
+    def wait_for_workers(self, count: int, timeout: Optional[float] = None) -> bool:
+        """Block until at least ``count`` workers are connected."""
+        with self._capacity:
+            return self._capacity.wait_for(
+                lambda: sum(w.alive for w in self._workers) >= count, timeout)
+
+    def prepare(self, pipeline_name: str, pipeline_env: dict):
+        super().prepare(pipeline_name, pipeline_env)
+        # Workers combine this with their own environment
+        self._pipeline_env = dict(pipeline_env)
+
+    def cancel(self):
+        super().cancel()
+        with self._capacity:
+            running = [(w, job_id) for w in self._workers if w.alive for job_id in w.running]
+            self._capacity.notify_all()
+        for worker, job_id in running:
+            try:
+                worker.connection.send({'type': 'cancel', 'id': job_id})
+            except OSError:
+                pass
+
+    def execute_job(self, job: Job,
+                    dependencies: Optional[dict[str, Status]] = None) -> JobResult:
+        """Run a job on a worker, retrying elsewhere if the worker is lost."""
+        lost = []
+        for _ in range(self.max_retries + 1):
+            try:
+                future = self._dispatch(job, dependencies or {})
+                if future is None:
+                    result = JobResult(job_name=job.name, status=Status.CANCELLED)
+                    self._emit(EventKind.JOB_FINISHED, job.name, result=result)
+                    return result
+                return future.result()
+            except WorkerLost as e:
+                lost.append(str(e))
+
+        error = f"Job abandoned after {len(lost)} attempts: {', '.join(lost)}"
+        result = JobResult(job_name=job.name, status=Status.FAILED, step_results=[
+            StepResult(step_name=job.name, status=Status.FAILED, exit_code=-1, error=error)
+        ])
+        self._emit(EventKind.JOB_FINISHED, job.name, result=result)
+        return result
+
+    def _dispatch(self, job: Job, dependencies: dict[str, Status]) -> Optional[Future]:
+        with self._capacity:
+            deadline = None
+            while True:
+                if self.cancelled:
+                    return None
+                candidates = [w for w in self._workers if w.alive and w.free > 0]
+                if candidates:
+                    break
+                if any(w.alive for w in self._workers):
+                    deadline = None
+                    self._capacity.wait()
+                    continue
+                # Nobody connected: give workers a while to (re)join
+                deadline = deadline or time.monotonic() + self.worker_timeout
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise WorkerLost("no workers connected")
+                self._capacity.wait(remaining)
+            worker = max(candidates, key=lambda w: w.free)
+            job_id = next(self._job_ids)
+            future = Future()
+            worker.running[job_id] = future
+            self.assignments.setdefault(job.name, []).append(worker.name)
+
+        job_data = job_to_dict(job)
+        # Only the secrets this job can use; workers mask them in what they send back
+        names = referenced_secrets([job_data, self._pipeline_env])
+        try:
+            worker.connection.send({
+                'type': 'job',
+                'id': job_id,
+                'pipeline': self._pipeline_name,
+                'pipeline_env': self._pipeline_env,
+                'secrets': {name: self.secrets[name] for name in names if name in self.secrets},
+                'job': job_data,
+                'dependencies': {name: status.value for name, status in dependencies.items()},
+            })
+        except OSError:
+            self._lose(worker)
+        return future
+
+    def _accept_loop(self):
+        while True:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                return  # closed
+            threading.Thread(target=self._serve_worker, args=(_Connection(sock),),
+                             daemon=True).start()
+
+    def _serve_worker(self, connection: _Connection):
+        hello = connection.recv()
+        if not hello or hello.get('type') != 'hello':
+            connection.close()
+            return
+        if self.token and not hmac.compare_digest(str(hello.get('token') or ''), self.token):
+            try:
+                connection.send({'type': 'rejected', 'reason': 'invalid token'})
+            except OSError:
+                pass
+            connection.close()
+            return
+
+        worker = _RemoteWorker(name=hello['name'], slots=max(1, int(hello['slots'])),
+                               connection=connection)
+        with self._capacity:
+            self._workers.append(worker)
+            self._capacity.notify_all()
+
+        try:
+            while (message := connection.recv()) is not None:
+                if message['type'] == 'event':
+                    self._forward_event(message)
+                elif message['type'] == 'result':
+                    with self._capacity:
+                        future = worker.running.pop(message['id'], None)
+                        self._capacity.notify_all()
+                    if future is not None:
+                        future.set_result(job_result_from_dict(message['result']))
+        finally:
+            self._lose(worker)
+
+    def _forward_event(self, message: dict):
+        kind = EventKind(message['kind'])
+        result = message.get('result')
+        if result is not None:
+            if kind is EventKind.STEP_FINISHED:
+                result = step_result_from_dict(result)
+            else:
+                result = job_result_from_dict(result)
+        self._emit(kind, message.get('job'), message.get('step'), result,
+                   message.get('output'), message.get('stream'))
+
+    def _lose(self, worker: _RemoteWorker):
+        with self._capacity:
+            if not worker.alive:
+                return
+            worker.alive = False
+            running, worker.running = worker.running, {}
+            self._capacity.notify_all()
+        for future in running.values():
+            future.set_exception(WorkerLost(worker.name))
+        worker.connection.close()
+
+    def close(self):
+        """Stop accepting workers and tell connected workers to exit."""
+        self._server.close()
+        if self.address.startswith('unix:'):
+            try:
+                os.unlink(self.address[len('unix:'):])
+            except OSError:
+                pass
+        with self._capacity:
+            workers = [w for w in self._workers if w.alive]
+        for worker in workers:
+            try:
+                worker.connection.send({'type': 'shutdown'})
+            except OSError:
+                pass
+            self._lose(worker)
+
+
+class Worker:
+    """Connects to a coordinator and runs the jobs it is sent."""
+
+    def __init__(self, address: str, slots: Optional[int] = None,
+                 working_dir: str = None, name: Optional[str] = None,
+                 log: Callable[[str], None] = None, token: Optional[str] = None):
+        self.address = address
+        self.token = token
+        self.slots = slots or os.cpu_count() or 1
+        self.working_dir = working_dir or os.getcwd()
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}-{id(self) % 10000}"
+        self._log = log or (lambda message: None)
+        self._executors: dict[int, StepExecutor] = {}
+        self._lock = threading.Lock()
+
+    def _connect(self, timeout: float) -> _Connection:
+        family, address = parse_address(self.address)
+        deadline = time.monotonic() + timeout
+        while True:
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            try:
+                sock.connect(address)
+                return _Connection(sock)
+            except OSError:
+                sock.close()
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.2)
+
+    def serve(self, connect_timeout: float = 30.0):
+        """Run jobs until the coordinator shuts down or goes away.
+
+        Raises PermissionError if the coordinator rejects the token.
+        """
+        connection = self._connect(connect_timeout)
+        connection.send({'type': 'hello', 'name': self.name, 'slots': self.slots,
+                         'token': self.token})
+        self._log(f"Connected to {self.address} as {self.name} ({self.slots} slots)")
+
+        with ThreadPoolExecutor(max_workers=self.slots) as pool:
+            try:
+                while (message := connection.recv()) is not None:
+                    if message['type'] == 'job':
+                        pool.submit(self._run_job, connection, message)
+                    elif message['type'] == 'cancel':
+                        with self._lock:
+                            executor = self._executors.get(message['id'])
+                        if executor is not None:
+                            executor.cancel()
+                    elif message['type'] == 'shutdown':
+                        break
+                    elif message['type'] == 'rejected':
+                        raise PermissionError(f"Coordinator rejected worker: {message['reason']}")
+            finally:
+                with self._lock:
+                    executors = list(self._executors.values())
+                for executor in executors:
+                    executor.cancel()
+                connection.close()
+        self._log("Disconnected")
+
+    def _run_job(self, connection: _Connection, message: dict):
+        job_id = message['id']
+        executor = StepExecutor(working_dir=self.working_dir, secrets=message.get('secrets'))
+        executor.prepare(message['pipeline'], message['pipeline_env'])
+        with self._lock:
+            self._executors[job_id] = executor
+
+        def forward(event: Event):
+            payload = {'type': 'event', 'id': job_id, 'kind': event.kind.value,
+                       'job': event.job, 'step': event.step}
+            if isinstance(event.result, StepResult):
+                payload['result'] = step_result_to_dict(event.result)
+            elif isinstance(event.result, JobResult):
+                payload['result'] = job_result_to_dict(event.result)
+            if event.output is not None:
+                payload['output'] = event.output
+                payload['stream'] = event.stream
+            connection.send(payload)
+
+        executor.add_listener(forward)
+        job = job_from_dict(message['job'])
+        self._log(f"Running job {job.name}")
+        try:
+            try:
+                dependencies = {name: Status(value)
+                                for name, value in message['dependencies'].items()}
+                result = executor.execute_job(job, dependencies)
+            except Exception as e:
+                # A job must always report back, or the coordinator waits forever
+                error = executor.masker.mask(f"Worker {self.name} failed: {e!r}")
+                result = JobResult(job_name=job.name, status=Status.FAILED, step_results=[
+                    StepResult(step_name=job.name, status=Status.FAILED, exit_code=-1,
+                               error=error)
+                ])
+                executor._emit(EventKind.JOB_FINISHED, job.name, result=result)
+            connection.send({'type': 'result', 'id': job_id,
+                             'result': job_result_to_dict(result)})
+            self._log(f"Finished job {job.name}: {result.status.value}")
+        except OSError:
+            pass  # coordinator gone; serve() is shutting down
+        finally:
+            with self._lock:
+                self._executors.pop(job_id, None)
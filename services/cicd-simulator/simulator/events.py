@@ -0,0 +1,44 @@
+"""Execution events emitted by the step executor while a pipeline runs."""
+
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Optional
+
+
+class Status(Enum):
+    """Outcome of a step, job or stage."""
+    PASSED = "passed"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+    CANCELLED = "cancelled"
+
+
+class EventKind(Enum):
+    """What happened."""
+    PIPELINE_STARTED = "pipeline_started"
+    JOB_STARTED = "job_started"
+    STEP_STARTED = "step_started"
+    STEP_OUTPUT = "step_output"
+    STEP_FINISHED = "step_finished"
+    JOB_FINISHED = "job_finished"
+    PIPELINE_FINISHED = "pipeline_finished"
+
+
+@dataclass(slots=True)
+class Event:
+    """A single execution event.
+
+    ``result`` carries the StepResult, JobResult or PipelineResult for the
+    corresponding *_FINISHED kinds and is None otherwise. STEP_OUTPUT events
+    carry a chunk of (masked) command ``output`` from ``stream`` "stdout" or
+    "stderr".
+    """
+    kind: EventKind
+    pipeline: str
+    job: Optional[str] = None
+    step: Optional[str] = None
+    result: Any = None
+    time: float = field(default_factory=time.monotonic)
+    output: Optional[str] = None
+    stream: Optional[str] = None
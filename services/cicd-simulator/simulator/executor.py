@@ -1,34 +1,69 @@
 """Step executor for CI/CD pipeline simulation."""
 
+import codecs
 import subprocess
 import os
 import re
+import selectors
+import signal
+import sys
+import threading
+import time
 from dataclasses import dataclass, field
-from typing import Optional
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Optional
+from . import conditions, sharding
 from .parser import Pipeline, Job, Step
+from .events import Event, EventKind, Status
+from .masking import SECRET_ENV_PREFIX, SecretMasker
+from .scheduler import FairSlotPool, JobGraph, JobNode, Schedule, StageNode
+from .tracing import NULL_TRACER
 
+COMMAND_TIMEOUT = 300  # seconds
+READ_SIZE = 65536
 
-@dataclass
+_SECRET_REF = re.compile(r'\$\{\{\s*secrets\.(\w+)\s*\}\}')
+
+
+@dataclass(slots=True)
 class StepResult:
     """Result of executing a single step."""
     step_name: str
-    success: bool
-    exit_code: int
-    output: str
+    status: Status
+    exit_code: int = 0
+    output: str = ""
     error: str = ""
-    skipped: bool = False
     skip_reason: str = ""
 
+    def __post_init__(self):
+        # Generated pipelines repeat the same step names thousands of times
+        self.step_name = sys.intern(self.step_name)
+
+    @property
+    def success(self) -> bool:
+        return self.status in (Status.PASSED, Status.SKIPPED)
+
+    @property
+    def skipped(self) -> bool:
+        return self.status is Status.SKIPPED
+
 
-@dataclass
+@dataclass(slots=True)
 class JobResult:
     """Result of executing a job."""
     job_name: str
-    success: bool
+    status: Status = Status.PASSED
     step_results: list[StepResult] = field(default_factory=list)
 
+    def __post_init__(self):
+        self.job_name = sys.intern(self.job_name)
+
+    @property
+    def success(self) -> bool:
+        return self.status in (Status.PASSED, Status.SKIPPED)
+
 
-@dataclass
+@dataclass(slots=True)
 class PipelineResult:
     """Result of executing a pipeline."""
     pipeline_name: str
@@ -39,151 +74,472 @@ class PipelineResult:
 class StepExecutor:
     """Executes pipeline steps as shell commands."""
 
-    def __init__(self, working_dir: str = None):
+    def __init__(self, working_dir: str = None, output_limit: Optional[int] = None,
+                 max_parallel: Optional[int] = None, tracer=None,
+                 slot_pool: Optional[FairSlotPool] = None,
+                 secrets: Optional[dict[str, str]] = None,
+                 secrets_prefix: Optional[str] = SECRET_ENV_PREFIX):
         self.working_dir = working_dir or os.getcwd()
+        self.output_limit = output_limit
+        self.max_parallel = max_parallel or os.cpu_count() or 1
+        self.tracer = tracer or NULL_TRACER
+        self.slot_pool = slot_pool  # shared with other executors by run-many
+        self.secrets = dict(secrets or {})
+        self.secrets_prefix = secrets_prefix  # secrets reach steps only via ${{ secrets.X }}
+        self.masker = SecretMasker(self.secrets.values())
         self.global_env: dict = {}
-
-    def execute_pipeline(self, pipeline: Pipeline, job_filter: str = None) -> PipelineResult:
-        """Execute all jobs in a pipeline."""
-        self.global_env = dict(os.environ)
-        self.global_env.update(pipeline.env)
+        self.listeners: list[Callable[[Event], None]] = []
+        self._pipeline_name = ""
+        self._cancelled = threading.Event()
+        self._processes: set[subprocess.Popen] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancel() has been called on this executor."""
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Stop the current run, killing any running step commands.
+
+        Cancellation is permanent: use a new executor for the next run.
+        """
+        self._cancelled.set()
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            self._kill(process)
+
+    def add_listener(self, listener: Callable[[Event], None]):
+        """Register a callback for execution events (see events.EventKind)."""
+        self.listeners.append(listener)
+
+    def _emit(self, kind: EventKind, job: str = None, step: str = None, result=None,
+              output: str = None, stream: str = None):
+        if not self.listeners:
+            return
+        event = Event(kind, self._pipeline_name, job, step, result, output=output, stream=stream)
+        for listener in self.listeners:
+            listener(event)
+
+    def prepare(self, pipeline_name: str, pipeline_env: dict):
+        """Set up the pipeline-wide environment that execute_job builds on."""
+        with self.tracer.span("env", "overhead"):
+            self.global_env = {key: value for key, value in os.environ.items()
+                               if not (self.secrets_prefix and key.startswith(self.secrets_prefix))}
+            self.global_env.update(self._with_secrets(pipeline_env))
+        self._pipeline_name = pipeline_name
+
+    def execute_pipeline(self, pipeline: Pipeline, job_filter: str = None,
+                         jobs: Optional[Iterable[str]] = None) -> PipelineResult:
+        """Execute all jobs in a pipeline.
+
+        Stages and jobs run as a dependency graph: up to ``max_parallel``
+        jobs whose stage and job dependencies have finished run at once.
+        ``jobs`` restricts the run to the named jobs; dependencies on jobs
+        left out count as satisfied.
+        """
+        with self.tracer.span(pipeline.name, "pipeline"):
+            return self._execute_pipeline(pipeline, job_filter, jobs)
+
+    def _execute_pipeline(self, pipeline: Pipeline, job_filter: Optional[str],
+                          jobs: Optional[Iterable[str]]) -> PipelineResult:
+        self.prepare(pipeline.name, pipeline.env)
+
+        selected = set(jobs) if jobs is not None else None
+        if job_filter:
+            selected = {job_filter} & selected if selected is not None else {job_filter}
+
+        with self.tracer.span("build graph", "overhead"):
+            graph = JobGraph(pipeline, selected)
+            schedule = Schedule(graph, self._should_run_stage)
+        self._emit(EventKind.PIPELINE_STARTED)
+
+        tracing = self.tracer.enabled
+        stage_times: dict[int, list[int]] = {}  # stage index -> [first start, last finish]
+
+        job_results: list[Optional[JobResult]] = [None] * len(graph.jobs)
+        # One thread per worker slot; traces show each thread as a track
+        with ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix='slot') as pool:
+            running: dict[Future, JobNode] = {}
+            try:
+                while not schedule.finished:
+                    for node in schedule.pop_ready():
+                        dependencies = schedule.dependency_statuses(node)
+                        running[pool.submit(self.execute_job, node.job, dependencies)] = node
+                        if tracing:
+                            stage_times.setdefault(node.stage, [self.tracer.now(), 0])
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        node = running.pop(future)
+                        job_results[node.index] = future.result()
+                        schedule.complete(node, job_results[node.index].status)
+                        if tracing:
+                            stage_times[node.stage][1] = self.tracer.now()
+            except KeyboardInterrupt:
+                # Step commands run in their own process group, so Ctrl+C does
+                # not reach them; kill them rather than wait for them to finish
+                self.cancel()
+                raise
+
+        for index, (start, end) in stage_times.items():
+            stage = graph.stages[index]
+            status = schedule.stage_status[index]
+            self.tracer.complete(stage.name or pipeline.name, "stage", start, end, "stages",
+                                 {'status': status.value if status else None})
+
+        for node in schedule.skipped:
+            job_results[node.index] = JobResult(job_name=node.job.name, status=Status.SKIPPED)
+            self._emit(EventKind.JOB_FINISHED, node.job.name, result=job_results[node.index])
 
         result = PipelineResult(
             pipeline_name=pipeline.name,
-            success=True,
-            job_results=[]
+            success=all(jr.success for jr in job_results),
+            job_results=job_results
         )
-
-        # Handle Azure Pipelines with stages
-        if pipeline.stages:
-            for stage in pipeline.stages:
-                for job in stage.jobs:
-                    if job_filter and job.name != job_filter:
-                        continue
-                    job_result = self.execute_job(job)
-                    result.job_results.append(job_result)
-                    if not job_result.success:
-                        result.success = False
-        else:
-            # GitHub Actions or simple Azure Pipelines
-            for job in pipeline.jobs:
-                if job_filter and job.name != job_filter:
-                    continue
-                job_result = self.execute_job(job)
-                result.job_results.append(job_result)
-                if not job_result.success:
-                    result.success = False
-
+        self._emit(EventKind.PIPELINE_FINISHED, result=result)
         return result
 
+    def execute_job(self, job: Job,
+                    dependencies: Optional[dict[str, Status]] = None) -> JobResult:
+        """Execute all steps in a job.
+
+        ``dependencies`` maps the names of the jobs this one needs to their
+        statuses, for evaluating the job's condition.
+        """
+        with self.tracer.span(job.name, "job"):
+            with self.tracer.span("env", "overhead"):
+                job_env = dict(self.global_env)
+                job_env.update(self._with_secrets(job.env))
+
+            result = JobResult(
+                job_name=job.name,
+                status=Status.PASSED,
+                step_results=[]
+            )
 
-    def execute_job(self, job: Job) -> JobResult:
-        """Execute all steps in a job."""
-        job_env = dict(self.global_env)
-        job_env.update(job.env)
-
-        result = JobResult(
-            job_name=job.name,
-            success=True,
-            step_results=[]
-        )
-
-        # Check job-level condition
-        if job.condition and not self._evaluate_condition(job.condition, job_env):
-            return result  # Skip entire job
-
-        for step in job.steps:
-            step_result = self.execute_step(step, job_env)
-            result.step_results.append(step_result)
-            
-            if not step_result.success and not step_result.skipped:
-                result.success = False
-                break  # Stop on first failure
-
-        return result
-
-    def execute_step(self, step: Step, parent_env: dict) -> StepResult:
-        """Execute a single step."""
-        step_env = dict(parent_env)
-        step_env.update(step.env)
+            # Check job-level condition
+            if self.cancelled:
+                result.status = Status.CANCELLED
+                self._emit(EventKind.JOB_FINISHED, job.name, result=result)
+                return result
+
+            if not self._should_run(job.condition, job_env, dependencies or {}):
+                result.status = Status.SKIPPED
+                self._emit(EventKind.JOB_FINISHED, job.name, result=result)
+                return result  # Skip entire job
+
+            self._emit(EventKind.JOB_STARTED, job.name)
+            for step in job.steps:
+                if self.cancelled:
+                    step_result = self._cancelled_result(step.name)
+                else:
+                    self._emit(EventKind.STEP_STARTED, job.name, step.name)
+                    with self.tracer.span(step.name, "step", {'job': job.name}):
+                        step_result = self.execute_step(step, job_env, job.name)
+                result.step_results.append(step_result)
+                self._emit(EventKind.STEP_FINISHED, job.name, step.name, step_result)
+
+                if step_result.status is Status.CANCELLED:
+                    result.status = Status.CANCELLED
+                    break
+                if not step_result.success:
+                    result.status = Status.FAILED
+                    break  # Stop on first failure
+
+            self._emit(EventKind.JOB_FINISHED, job.name, result=result)
+            return result
+
+    def execute_step(self, step: Step, parent_env: dict,
+                     job_name: Optional[str] = None) -> StepResult:
+        """Execute a single step; ``job_name`` labels its STEP_OUTPUT events."""
+        with self.tracer.span("env", "overhead"):
+            step_env = dict(parent_env)
+            step_env.update(self._with_secrets(step.env))
 
         # Check step condition
         if step.condition:
             if not self._evaluate_condition(step.condition, step_env):
                 return StepResult(
                     step_name=step.name,
-                    success=True,
-                    exit_code=0,
-                    output="",
-                    skipped=True,
+                    status=Status.SKIPPED,
                     skip_reason=f"Condition not met: {step.condition}"
                 )
 
+        # Built-in test sharding action
+        if sharding.is_shard_action(step.uses):
+            return self._run_shards(step, step_env, job_name)
+
         # Handle 'uses' actions (simulated)
         if step.uses and not step.run:
             return StepResult(
                 step_name=step.name,
-                success=True,
-                exit_code=0,
+                status=Status.SKIPPED,
                 output=f"[Simulated] Action: {step.uses}",
-                skipped=True,
                 skip_reason="External actions are simulated locally"
             )
 
         # Execute shell command
         if step.run:
-            return self._run_command(step.name, step.run, step_env)
+            return self._run_command(step.name, step.run, step_env, job_name)
 
         return StepResult(
             step_name=step.name,
-            success=True,
-            exit_code=0,
+            status=Status.SKIPPED,
             output="No command to execute",
-            skipped=True,
             skip_reason="Step has no run command"
         )
 
-    def _run_command(self, step_name: str, command: str, env: dict) -> StepResult:
-        """Run a shell command and capture output."""
+    def _run_command(self, step_name: str, command: str, env: dict,
+                     job_name: Optional[str] = None, retain: bool = True,
+                     label: Optional[str] = None) -> StepResult:
+        """Run a shell command, holding a slot of ``slot_pool`` if there is one."""
+        if self.slot_pool is None:
+            return self._run_process(step_name, command, env, job_name, retain, label)
+        with self.tracer.span("slot wait", "overhead"):
+            self.slot_pool.acquire(self)
+        try:
+            return self._run_process(step_name, command, env, job_name, retain, label)
+        finally:
+            self.slot_pool.release()
+
+    def _run_process(self, step_name: str, command: str, env: dict,
+                     job_name: Optional[str] = None, retain: bool = True,
+                     label: Optional[str] = None) -> StepResult:
+        """Run a shell command and capture its masked output.
+
+        With ``retain`` off the full output is kept, whatever ``output_limit``.
+        ``label`` is passed on to _stream_output.
+        """
         # Substitute environment variables in command
         expanded_command = self._expand_variables(command, env)
 
         try:
-            process = subprocess.run(
-                expanded_command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                env=env,
-                cwd=self.working_dir,
-                timeout=300  # 5 minute timeout
-            )
+            with self.tracer.span("spawn", "overhead"):
+                process = subprocess.Popen(
+                    expanded_command,
+                    shell=True,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    env=env,
+                    cwd=self.working_dir,
+                    start_new_session=True  # own process group, so cancel() reaches children
+                )
+            with self._lock:
+                self._processes.add(process)
+            if self.cancelled:
+                self._kill(process)
+
+            try:
+                stdout, stderr = self._stream_output(process, job_name, step_name, label)
+            except subprocess.TimeoutExpired:
+                self._kill(process)
+                process.wait()
+                raise
+            finally:
+                process.stdout.close()
+                process.stderr.close()
+                with self._lock:
+                    self._processes.discard(process)
+
+            if self.cancelled:
+                return self._cancelled_result(step_name)
 
             return StepResult(
                 step_name=step_name,
-                success=process.returncode == 0,
+                status=Status.PASSED if process.returncode == 0 else Status.FAILED,
                 exit_code=process.returncode,
-                output=process.stdout,
-                error=process.stderr
+                output=self._retain(stdout) if retain else stdout,
+                error=self._retain(stderr, tail=True) if retain else stderr
             )
 
         except subprocess.TimeoutExpired:
             return StepResult(
                 step_name=step_name,
-                success=False,
+                status=Status.FAILED,
                 exit_code=-1,
-                output="",
-                error="Command timed out after 300 seconds"
+                error=f"Command timed out after {COMMAND_TIMEOUT} seconds"
             )
         except Exception as e:
             return StepResult(
                 step_name=step_name,
-                success=False,
+                status=Status.FAILED,
                 exit_code=-1,
-                output="",
-                error=str(e)
+                error=self.masker.mask(str(e))
             )
 
+    def _stream_output(self, process: subprocess.Popen, job_name: Optional[str],
+                       step_name: str, label: Optional[str] = None) -> tuple[str, str]:
+        """Read stdout and stderr as they are written, masking secrets.
+
+        Each masked chunk is emitted as a STEP_OUTPUT event. With a ``label``
+        (commands sharing one step, like test shards) events carry only whole
+        lines, each prefixed with ``[label]``, so output of concurrent
+        commands never mixes within a line. Raises TimeoutExpired once the
+        command has run for COMMAND_TIMEOUT seconds.
+        """
+        deadline = time.monotonic() + COMMAND_TIMEOUT
+        captured = {'stdout': [], 'stderr': []}
+        partial = {'stdout': '', 'stderr': ''}  # unfinished line, with a label
+
+        def emit(name: str, text: str, final: bool):
+            if label is not None:
+                text = partial[name] + text
+                if final:
+                    partial[name] = ''
+                    if text and not text.endswith('\n'):
+                        text += '\n'
+                else:
+                    end = text.rfind('\n') + 1
+                    text, partial[name] = text[:end], text[end:]
+                if text:
+                    text = ''.join(f"[{label}] {line}\n" for line in text[:-1].split('\n'))
+            if text:
+                self._emit(EventKind.STEP_OUTPUT, job_name, step_name, output=text, stream=name)
+
+        with selectors.DefaultSelector() as selector:
+            for name, pipe in (('stdout', process.stdout), ('stderr', process.stderr)):
+                decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+                selector.register(pipe, selectors.EVENT_READ,
+                                  (name, decoder, self.masker.stream()))
+            while selector.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise subprocess.TimeoutExpired(process.args, COMMAND_TIMEOUT)
+                for key, _ in selector.select(remaining):
+                    name, decoder, masking = key.data
+                    data = os.read(key.fd, READ_SIZE)
+                    if data:
+                        text = masking.feed(decoder.decode(data))
+                    else:
+                        selector.unregister(key.fileobj)
+                        text = masking.feed(decoder.decode(b'', final=True)) + masking.flush()
+                    if text:
+                        captured[name].append(text)
+                    emit(name, text, final=not data)
+        process.wait(timeout=max(0.0, deadline - time.monotonic()))
+        return ''.join(captured['stdout']), ''.join(captured['stderr'])
+
+    def _run_shards(self, step: Step, env: dict, job_name: Optional[str] = None) -> StepResult:
+        """Run a test command split across timing-balanced parallel shards."""
+        args = step.with_args
+        command = args.get('command')
+        if not command:
+            return StepResult(step_name=step.name, status=Status.FAILED, exit_code=-1,
+                              error=f"{sharding.SHARD_ACTION} requires 'command'")
+
+        try:
+            total = int(args.get('total', 2))
+        except (TypeError, ValueError):
+            total = 0
+        if total < 1:
+            return StepResult(step_name=step.name, status=Status.FAILED, exit_code=-1,
+                              error=f"{sharding.SHARD_ACTION} 'total' must be a positive "
+                                    f"integer, not {args.get('total')!r}")
+
+        if args.get('list-command'):
+            # The test list must not be cut to output_limit
+            listing = self._run_command(step.name, args['list-command'], env, job_name,
+                                        retain=False)
+            if not listing.success:
+                listing.output = self._retain(listing.output)
+                listing.error = self._retain(listing.error, tail=True)
+                return listing
+            tests = [line.strip() for line in listing.output.splitlines() if line.strip()]
+        else:
+            tests = sharding.expand_globs(str(args.get('tests', '')), self.working_dir)
+        if not tests:
+            # Running `command` with an empty SHARD_TESTS usually runs everything
+            return StepResult(step_name=step.name, status=Status.FAILED, exit_code=-1,
+                              error=f"{sharding.SHARD_ACTION} found no tests to run")
+
+        def in_workdir(pattern):
+            return [os.path.join(self.working_dir, p)
+                    for p in sharding.expand_globs(pattern, self.working_dir)]
+
+        timing_files = sorted(in_workdir(str(args.get('timings', ''))), key=os.path.getmtime)
+        timings = sharding.load_timings(timing_files)
+        shards = sharding.plan_shards(tests, timings, total)
+
+        reports = []
+        if args.get('report') and args.get('merged-report'):
+            reports = [os.path.join(self.working_dir,
+                                    str(args['report']).replace('$SHARD_INDEX', str(shard.index)))
+                       for shard in shards]
+            # A report left over from an earlier run would be merged as this run's
+            for report in reports:
+                try:
+                    os.remove(report)
+                except FileNotFoundError:
+                    pass
+
+        def run_shard(shard):
+            shard_env = dict(env)
+            shard_env.update({
+                'SHARD_INDEX': str(shard.index),
+                'SHARD_TOTAL': str(len(shards)),
+                'SHARD_TESTS': ' '.join(shard.tests),
+            })
+            return self._run_command(step.name, command, shard_env, job_name,
+                                     label=f"shard {shard.index + 1}/{len(shards)}")
+
+        with ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix='shard') as pool:
+            results = list(pool.map(run_shard, shards))
+
+        output = [f"Split {len(tests)} tests into {len(shards)} shards "
+                  f"({len(timing_files)} timing reports)"]
+        for shard, result in zip(shards, results):
+            output.append(f"--- shard {shard.index + 1}/{len(shards)}: {len(shard.tests)} tests, "
+                          f"~{shard.estimated:.1f}s, exit {result.exit_code}")
+            output.append(result.output.rstrip())
+
+        if reports:
+            merged = os.path.join(self.working_dir, str(args['merged-report']))
+            crashed = [report for report, result in zip(reports, results) if not result.success]
+            summary = sharding.merge_reports(reports, merged, failed=crashed)
+            output.append(f"Merged {len(reports) - len(summary.missing)} reports into "
+                          f"{args['merged-report']}: {summary.tests} tests, "
+                          f"{summary.failures} failures, {summary.errors} errors")
+            for shard, report in zip(shards, reports):
+                if report in summary.missing and report in crashed:
+                    output.append(f"shard {shard.index + 1}/{len(shards)} failed without "
+                                  f"writing {os.path.relpath(report, self.working_dir)}")
+
+        failed = [r for r in results if not r.success]
+        return StepResult(
+            step_name=step.name,
+            status=Status.FAILED if failed else Status.PASSED,
+            exit_code=failed[0].exit_code if failed else 0,
+            output=self._retain('\n'.join(output)),
+            error=self._retain('\n'.join(r.error for r in results if r.error), tail=True)
+        )
+
+    def _kill(self, process: subprocess.Popen):
+        """Kill a step command together with everything it spawned."""
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def _cancelled_result(self, step_name: str) -> StepResult:
+        """Result recorded for a step interrupted or prevented by cancel()."""
+        return StepResult(
+            step_name=step_name,
+            status=Status.CANCELLED,
+            exit_code=-1,
+            error="Cancelled"
+        )
+
+    def _retain(self, text: str, tail: bool = False) -> str:
+        """Trim captured output to ``output_limit`` characters, if set.
+
+        Errors keep their tail, where the failure reason usually is.
+        """
+        if self.output_limit is None or len(text) <= self.output_limit:
+            return text
+        return text[-self.output_limit:] if tail else text[:self.output_limit]
+
     def _expand_variables(self, text: str, env: dict) -> str:
         """Expand environment variables in text."""
         result = text
@@ -197,42 +553,39 @@ class StepExecutor:
             result = result.replace(f'${{{key}}}', str(value))
             result = result.replace(f'${key}', str(value))
 
-        return result
+        # Secrets last, so their values are never expanded themselves
+        return self._expand_secrets(result)
+
+    def _expand_secrets(self, text: str) -> str:
+        """Substitute ``${{ secrets.NAME }}``; unknown secrets become empty."""
+        if '${{' not in text:
+            return text
+        return _SECRET_REF.sub(lambda m: self.secrets.get(m.group(1), ''), text)
+
+    def _with_secrets(self, env: dict) -> dict:
+        """Env values with secret references substituted."""
+        return {key: self._expand_secrets(value) if isinstance(value, str) else value
+                for key, value in env.items()}
+
+    def _should_run(self, condition: Optional[str], env: dict,
+                    dependencies: dict[str, Status]) -> bool:
+        """Decide whether a job or stage runs, given its dependencies' statuses.
+
+        Without a status function (always(), failure(), ...) a condition only
+        applies once every dependency succeeded; no condition means succeeded().
+        """
+        succeeded = all(status is Status.PASSED for status in dependencies.values())
+        if not condition:
+            return succeeded
+        if not conditions.has_status_function(condition) and not succeeded:
+            return False
+        with self.tracer.span("condition", "overhead", {'condition': condition}):
+            return conditions.evaluate(condition, env, dependencies, self.secrets)
+
+    def _should_run_stage(self, node: StageNode, dependencies: dict[str, Status]) -> bool:
+        return self._should_run(node.stage.condition, self.global_env, dependencies)
 
     def _evaluate_condition(self, condition: str, env: dict) -> bool:
-        """Evaluate a simple condition expression."""
-        # Handle common GitHub Actions conditions
-        condition = condition.strip()
-        
-        # always() - always run
-        if condition == 'always()':
-            return True
-        
-        # failure() - run on failure (we don't track this yet)
-        if condition == 'failure()':
-            return False
-        
-        # success() - run on success (default)
-        if condition == 'success()':
-            return True
-
-        # Simple equality checks: env.VAR == 'value'
-        eq_match = re.match(r"env\.(\w+)\s*==\s*['\"](.+)['\"]", condition)
-        if eq_match:
-            var_name, expected = eq_match.groups()
-            return env.get(var_name) == expected
-
-        # Simple inequality checks: env.VAR != 'value'
-        neq_match = re.match(r"env\.(\w+)\s*!=\s*['\"](.+)['\"]", condition)
-        if neq_match:
-            var_name, expected = neq_match.groups()
-            return env.get(var_name) != expected
-
-        # Azure Pipelines: eq(variables['VAR'], 'value')
-        azure_eq = re.match(r"eq\(variables\['(\w+)'\],\s*['\"](.+)['\"]\)", condition)
-        if azure_eq:
-            var_name, expected = azure_eq.groups()
-            return env.get(var_name) == expected
-
-        # Default: assume condition is met for unsupported expressions
-        return True
+        """Evaluate a condition expression with no upstream status."""
+        with self.tracer.span("condition", "overhead", {'condition': condition}):
+            return conditions.evaluate(condition, env, secrets=self.secrets)
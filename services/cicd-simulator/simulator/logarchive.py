@@ -0,0 +1,290 @@
+"""Compressed, block-based archive of pipeline run logs.
+
+Each run gets a directory under the log directory (default
+``~/.cicd-sim/logs``, or ``$CICD_SIM_LOG_DIR``) holding two files:
+
+- ``output.z``: zlib-compressed blocks of step output. A block belongs to
+  one step and is cut at a line boundary once it reaches ``block_size``
+  bytes, so concurrent steps never interleave inside a block. Commands
+  sharing a step (test shards) stream whole lines tagged ``[shard N/M]``.
+- ``index.json``: per step its job, name, status, timing and the list of
+  its blocks as ``[offset, compressed size, size, first line, newlines]``,
+  where the first line is the 0-based line the block starts in.
+
+Readers memory-map ``output.z`` and decompress only the blocks of the steps
+they ask for, so looking up one step costs the same however large the
+history is. LogArchive.prune() caps how many runs are kept.
+"""
+
+import json
+import mmap
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from .events import Event, EventKind
+
+LOG_DIR_ENV = "CICD_SIM_LOG_DIR"
+DEFAULT_LOG_DIR = "~/.cicd-sim/logs"
+BLOCK_SIZE = 64 * 1024
+DEFAULT_KEEP = 100  # runs kept by `cicd-sim run` and `run-many`
+INDEX_FILE = "index.json"
+DATA_FILE = "output.z"
+INDEX_VERSION = 1
+
+
+def default_log_dir() -> Path:
+    """The log directory from $CICD_SIM_LOG_DIR, or ~/.cicd-sim/logs."""
+    return Path(os.environ.get(LOG_DIR_ENV) or DEFAULT_LOG_DIR).expanduser()
+
+
+def _slug(name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '-', name).strip('-')[:40] or "pipeline"
+
+
+class _StepLog:
+    """Output of a running step that is not yet written out as a block."""
+    __slots__ = ('entry', 'buffer', 'line', 'partial', 'started', 'streamed')
+
+    def __init__(self, entry: dict, started: float):
+        self.entry = entry
+        self.buffer = bytearray()
+        self.line = 0          # index of the line the buffer starts in
+        self.partial = False   # whether the last block ended mid-line
+        self.started = started
+        self.streamed = False
+
+
+class LogArchiveWriter:
+    """Executor listener that archives one pipeline run.
+
+    Output arrives through STEP_OUTPUT events, already masked. Steps that
+    stream nothing (skipped steps, simulated actions) are archived with the
+    text of their result instead.
+    """
+
+    def __init__(self, log_dir: Optional[str] = None, block_size: int = BLOCK_SIZE):
+        self.log_dir = Path(log_dir).expanduser() if log_dir else default_log_dir()
+        self.block_size = block_size
+        self.run_id: Optional[str] = None
+        self.path: Optional[Path] = None
+        self._index: dict = {}
+        self._steps: dict[tuple[str, str], _StepLog] = {}
+        self._data = None
+        self._started = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Event):
+        kind = event.kind
+        if kind is EventKind.STEP_OUTPUT:
+            with self._lock:
+                log = self._steps.get((event.job, event.step))
+                if log is not None:
+                    log.streamed = True
+                    log.buffer += event.output.encode('utf-8', 'replace')
+                    if len(log.buffer) >= self.block_size:
+                        self._write_blocks(log, final=False)
+        elif kind is EventKind.STEP_STARTED:
+            with self._lock:
+                entry = {'job': event.job, 'step': event.step,
+                         'started': round(event.time - self._started, 6),
+                         'blocks': [], 'lines': 0, 'bytes': 0}
+                self._index['steps'].append(entry)
+                self._steps[(event.job, event.step)] = _StepLog(entry, event.time)
+        elif kind is EventKind.STEP_FINISHED:
+            self._finish_step(event)
+        elif kind is EventKind.JOB_FINISHED:
+            with self._lock:
+                self._index['jobs'].append({'job': event.job,
+                                            'status': event.result.status.value})
+        elif kind is EventKind.PIPELINE_STARTED:
+            self._open(event)
+        elif kind is EventKind.PIPELINE_FINISHED:
+            self._close(event)
+
+    def _open(self, event: Event):
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        base = time.strftime('%Y%m%d-%H%M%S') + '-' + _slug(event.pipeline)
+        run_id, n = base, 1
+        while True:
+            try:
+                (self.log_dir / run_id).mkdir()
+                break
+            except FileExistsError:
+                n += 1
+                run_id = f"{base}-{n}"
+        self.run_id, self.path = run_id, self.log_dir / run_id
+        self._data = open(self.path / DATA_FILE, 'wb')
+        self._started = event.time
+        self._index = {'version': INDEX_VERSION, 'run': run_id, 'pipeline': event.pipeline,
+                       'created': time.time(), 'block_size': self.block_size,
+                       'steps': [], 'jobs': []}
+
+    def _finish_step(self, event: Event):
+        result = event.result
+        with self._lock:
+            log = self._steps.pop((event.job, event.step), None)
+            if log is None:  # cancelled before it started
+                return
+            if not log.streamed:
+                text = '\n'.join(t for t in (result.output, result.error, result.skip_reason) if t)
+                log.buffer += text.encode('utf-8', 'replace')
+            self._write_blocks(log, final=True)
+            log.entry.update(status=result.status.value, exit_code=result.exit_code,
+                             duration=round(event.time - log.started, 6))
+
+    def _write_blocks(self, log: _StepLog, final: bool):
+        """Compress full blocks of a step's buffer (all of it when ``final``)."""
+        buffer = log.buffer
+        while buffer and (final or len(buffer) >= self.block_size):
+            end = len(buffer)
+            if end > self.block_size:
+                # Cut after the last newline that fits, unless the line is huge
+                cut = buffer.rfind(b'\n', 0, self.block_size)
+                end = cut + 1 if cut >= 0 else self.block_size
+            block = bytes(buffer[:end])
+            del buffer[:end]
+            newlines = block.count(b'\n')
+            compressed = zlib.compress(block)
+            offset = self._data.tell()
+            self._data.write(compressed)
+            log.entry['blocks'].append([offset, len(compressed), len(block), log.line, newlines])
+            log.entry['bytes'] += len(block)
+            # A block that does not end in a newline continues in the next one
+            log.line += newlines
+            log.partial = not block.endswith(b'\n')
+        if final:
+            log.entry['lines'] = log.line + (1 if log.partial else 0)
+
+    def _close(self, event: Event):
+        with self._lock:
+            self._data.close()
+            self._index['duration'] = round(event.time - self._started, 6)
+            self._index['success'] = event.result.success
+            tmp = self.path / (INDEX_FILE + '.tmp')
+            tmp.write_text(json.dumps(self._index, separators=(',', ':')))
+            tmp.replace(self.path / INDEX_FILE)
+
+
+@dataclass
+class GrepMatch:
+    """A log line matching a grep pattern; ``line`` counts from 1."""
+    run: str
+    job: str
+    step: str
+    line: int
+    text: str
+
+
+class RunLog:
+    """Read access to one archived run."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.index = json.loads((self.path / INDEX_FILE).read_text())
+        self.run_id = self.index['run']
+        self.blocks_read = 0  # blocks decompressed so far
+        self._mmap: Optional[mmap.mmap] = None
+
+    @property
+    def steps(self) -> list[dict]:
+        return self.index['steps']
+
+    def select(self, job: Optional[str] = None, step: Optional[str] = None) -> list[dict]:
+        """Index entries of steps whose job and step names match (globs allowed)."""
+        return [entry for entry in self.steps
+                if (job is None or fnmatchcase(entry['job'], job))
+                and (step is None or fnmatchcase(entry['step'], step))]
+
+    def _data(self) -> Optional[mmap.mmap]:
+        if self._mmap is None:
+            with open(self.path / DATA_FILE, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def _block(self, block: list) -> bytes:
+        offset, size = block[0], block[1]
+        self.blocks_read += 1
+        return zlib.decompress(self._data()[offset:offset + size])
+
+    def read(self, entry: dict) -> str:
+        """The full output of one step."""
+        return b''.join(self._block(block) for block in entry['blocks']).decode('utf-8', 'replace')
+
+    def lines(self, entry: dict) -> Iterator[tuple[int, str]]:
+        """(line number from 1, text) for each line of a step's output."""
+        partial = b''
+        for block in entry['blocks']:
+            data = partial + self._block(block)
+            number = block[3] + 1
+            *complete, partial = data.split(b'\n')
+            for line in complete:
+                yield number, line.decode('utf-8', 'replace')
+                number += 1
+        if partial:
+            yield entry['lines'], partial.decode('utf-8', 'replace')
+
+    def grep(self, pattern: re.Pattern, job: Optional[str] = None,
+             step: Optional[str] = None) -> Iterator[GrepMatch]:
+        for entry in self.select(job, step):
+            for number, text in self.lines(entry):
+                if pattern.search(text):
+                    yield GrepMatch(self.run_id, entry['job'], entry['step'], number, text)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+
+class LogArchive:
+    """All archived runs in a log directory."""
+
+    def __init__(self, log_dir: Optional[str] = None):
+        self.log_dir = Path(log_dir).expanduser() if log_dir else default_log_dir()
+
+    def runs(self) -> list[str]:
+        """Ids of completed runs, oldest first."""
+        if not self.log_dir.is_dir():
+            return []
+        runs = [p for p in self.log_dir.iterdir() if (p / INDEX_FILE).is_file()]
+        return [p.name for p in sorted(runs, key=lambda p: (p / INDEX_FILE).stat().st_mtime)]
+
+    def resolve(self, run: str) -> list[str]:
+        """Run ids for ``latest``, ``all``, an exact id or a unique id prefix."""
+        runs = self.runs()
+        if run == 'all':
+            return runs
+        if run == 'latest':
+            return runs[-1:]
+        if run in runs:
+            return [run]
+        matches = [r for r in runs if r.startswith(run)]
+        if len(matches) > 1:
+            raise ValueError(f"Run '{run}' is ambiguous: {', '.join(matches[:5])}")
+        return matches
+
+    def open(self, run_id: str) -> RunLog:
+        return RunLog(self.log_dir / run_id)
+
+    def prune(self, keep: int, protect: Iterable[str] = ()) -> list[str]:
+        """Delete all but the newest ``keep`` runs (0 keeps all); returns the ids deleted.
+
+        Runs in ``protect`` are never deleted, however old.
+        """
+        if keep <= 0:
+            return []
+        protect = set(protect)
+        removed = [run_id for run_id in self.runs()[:-keep] if run_id not in protect]
+        for run_id in removed:
+            shutil.rmtree(self.log_dir / run_id, ignore_errors=True)
+        return removed
@@ -0,0 +1,210 @@
+"""Pipeline secrets: loading them and masking their values in output.
+
+Secrets come from a dotenv-style file (``NAME=value`` lines) and from
+environment variables carrying a prefix (``CICD_SIM_SECRET_NAME``), and are
+referenced in pipelines as ``${{ secrets.NAME }}``.
+
+Masking uses an Aho-Corasick automaton over all secret values, so scanning
+output is linear in its length whatever the number of secrets. A
+MaskingStream masks output as it arrives in chunks: it holds back only the
+tail that could still be the start of a secret, so a value split across two
+reads is masked just like one that arrived whole.
+"""
+
+import os
+import re
+from collections import deque
+from typing import Iterable, Optional
+
+MASK = "***"
+SECRET_ENV_PREFIX = "CICD_SIM_SECRET_"
+MIN_SECRET_LENGTH = 3  # masking shorter values would shred ordinary output
+
+
+def parse_dotenv(text: str) -> dict[str, str]:
+    """Parse ``NAME=value`` lines; ``#`` comments, ``export`` and quotes are allowed."""
+    values = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#') or '=' not in line:
+            continue
+        name, value = line.split('=', 1)
+        name = name.strip()
+        if name.startswith('export '):
+            name = name[len('export '):].strip()
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+            quote, value = value[0], value[1:-1]
+            if quote == '"':
+                value = value.replace('\\n', '\n')
+        elif ' #' in value:
+            value = value.split(' #', 1)[0].rstrip()
+        values[name] = value
+    return values
+
+
+def load_secrets(path: Optional[str] = None, env_prefix: Optional[str] = SECRET_ENV_PREFIX,
+                 environ: Optional[dict] = None) -> dict[str, str]:
+    """Collect secrets from prefixed environment variables and a dotenv file.
+
+    Values in the file take precedence over the environment.
+    """
+    environ = os.environ if environ is None else environ
+    secrets = {}
+    if env_prefix:
+        for key, value in environ.items():
+            if key.startswith(env_prefix) and len(key) > len(env_prefix):
+                secrets[key[len(env_prefix):]] = value
+    if path:
+        with open(path) as f:
+            secrets.update(parse_dotenv(f.read()))
+    return secrets
+
+
+class SecretMasker:
+    """Replaces every occurrence of any secret value with ``***``.
+
+    Overlapping or adjacent occurrences are masked as one run. Multi-line
+    values are also masked line by line, since commands often print them
+    one line at a time.
+    """
+
+    def __init__(self, values: Iterable[str]):
+        patterns = set()
+        for value in map(str, values):
+            candidates = [value]
+            if '\n' in value:
+                candidates.extend(line.strip() for line in value.splitlines())
+            patterns.update(c for c in candidates if len(c) >= MIN_SECRET_LENGTH)
+        self.patterns = sorted(patterns)
+        self._build()
+
+    def _build(self):
+        # State 0 is the root. goto[s] maps a character to the next state;
+        # match[s] is the length of the longest pattern ending at state s,
+        # counting patterns reached through failure links.
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail = [0]
+        self._depth = [0]
+        self._match = [0]
+        for pattern in self.patterns:
+            state = 0
+            for char in pattern:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._depth.append(self._depth[state] + 1)
+                    self._match.append(0)
+                    self._goto[state][char] = nxt
+                state = nxt
+            self._match[state] = len(pattern)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._match[nxt] = max(self._match[nxt], self._match[self._fail[nxt]])
+                queue.append(nxt)
+
+        # From the root, skip straight to the next character that starts a secret
+        self._first = re.compile('[' + ''.join(map(re.escape, self._goto[0])) + ']') \
+            if self.patterns else None
+
+    def _step(self, state: int, char: str) -> int:
+        goto, fail = self._goto, self._fail
+        while state and char not in goto[state]:
+            state = fail[state]
+        return goto[state].get(char, 0)
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def mask(self, text: str) -> str:
+        """Mask a complete piece of text."""
+        if not self.patterns or not text:
+            return text
+        stream = self.stream()
+        return stream.feed(text) + stream.flush()
+
+    def stream(self) -> 'MaskingStream':
+        """Start masking a new stream of text chunks."""
+        return MaskingStream(self)
+
+
+class MaskingStream:
+    """Incremental masking of one output stream.
+
+    ``feed`` returns the part of the text seen so far that can no longer
+    turn out to be inside a secret; ``flush`` returns the rest at the end.
+    """
+
+    def __init__(self, masker: SecretMasker):
+        self.masker = masker
+        self._state = 0
+        self._pending = ""  # text received but not yet returned
+        self._offset = 0    # absolute position of _pending[0]
+        self._position = 0  # absolute position after the last character seen
+        self._hidden: deque[list[int]] = deque()  # merged [start, end) runs to mask
+
+    def feed(self, chunk: str) -> str:
+        masker = self.masker
+        if not masker.patterns:
+            return chunk
+        match, step, first = masker._match, masker._step, masker._first
+        state, position, hidden = self._state, self._position, self._hidden
+        i, size = 0, len(chunk)
+        while i < size:
+            if state == 0:
+                found = first.search(chunk, i)
+                if found is None:
+                    position += size - i
+                    break
+                position += found.start() - i
+                i = found.start()
+            state = step(state, chunk[i])
+            i += 1
+            position += 1
+            length = match[state]
+            if length:
+                start = position - length
+                # A longer secret may swallow earlier runs that it overlaps
+                while hidden and start <= hidden[-1][1]:
+                    start = min(start, hidden.pop()[0])
+                hidden.append([start, position])
+        self._state, self._position = state, position
+        self._pending += chunk
+        # Any secret not yet complete starts within the automaton's depth
+        return self._emit(position - masker._depth[state])
+
+    def flush(self) -> str:
+        text = self._emit(self._position)
+        self._state = 0
+        return text
+
+    def _emit(self, safe: int) -> str:
+        """Return pending text before absolute position ``safe``, masked."""
+        out = []
+        cursor = self._offset
+        hidden = self._hidden
+        while hidden and hidden[0][0] < safe:
+            start, end = hidden[0]
+            if end > safe:
+                safe = start  # still growing: hold it back whole
+                break
+            out.append(self._pending[cursor - self._offset:start - self._offset])
+            out.append(MASK)
+            cursor = end
+            hidden.popleft()
+        if safe > cursor:
+            out.append(self._pending[cursor - self._offset:safe - self._offset])
+            cursor = safe
+        self._pending = self._pending[cursor - self._offset:]
+        self._offset = cursor
+        return ''.join(out)
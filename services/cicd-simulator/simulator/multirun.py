@@ -0,0 +1,122 @@
+"""Running many pipelines at once under one shared slot budget.
+
+Every pipeline gets its own executor, and all of them draw from a single
+FairSlotPool that caps the number of step commands running across all
+pipelines. When the pool is exhausted, freed slots rotate between pipelines,
+so one large pipeline cannot hold up the rest, and total throughput depends
+on the slot count (default: CPU count), not on the number of files.
+"""
+
+import glob
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+from .executor import PipelineResult, StepExecutor
+from .logarchive import LogArchiveWriter
+from .masking import SECRET_ENV_PREFIX
+from .parser import Pipeline, PipelineParser
+from .scheduler import FairSlotPool
+
+PIPELINE_SUFFIXES = ('*.yml', '*.yaml')
+
+
+@dataclass
+class PipelineRun:
+    """Outcome of one pipeline in a run-many batch."""
+    path: str
+    pipeline_type: str = ""
+    result: Optional[PipelineResult] = None
+    error: str = ""
+    duration: float = 0.0
+    log_run: Optional[str] = None  # archived run id, when logs are archived
+
+    @property
+    def exit_code(self) -> int:
+        """0 if the pipeline passed, 1 if it failed, 2 if it could not run."""
+        if self.error or self.result is None:
+            return 2
+        return 0 if self.result.success else 1
+
+
+def expand_pipeline_paths(patterns: Iterable[str]) -> list[str]:
+    """Resolve files, directories (their *.yml/*.yaml) and globs to pipeline files.
+
+    Paths that match nothing are kept, so they are reported as errors.
+    """
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for suffix in PIPELINE_SUFFIXES:
+                paths.extend(sorted(glob.glob(os.path.join(pattern, suffix))))
+        elif glob.has_magic(pattern):
+            paths.extend(sorted(p for p in glob.glob(pattern, recursive=True)
+                                if os.path.isfile(p)))
+        else:
+            paths.append(pattern)
+    return list(dict.fromkeys(paths))
+
+
+def run_many(paths: list[str], slots: Optional[int] = None, pipeline_type: str = "auto",
+             working_dir: Optional[str] = None, output_limit: Optional[int] = None,
+             on_finish: Optional[Callable[[PipelineRun], None]] = None,
+             secrets: Optional[dict[str, str]] = None,
+             log_dir: Optional[str] = None,
+             secrets_prefix: Optional[str] = SECRET_ENV_PREFIX) -> list[PipelineRun]:
+    """Run pipelines concurrently, at most ``slots`` step commands at a time.
+
+    Returns one PipelineRun per path, in the order given. ``on_finish`` is
+    called (from a worker thread) as each pipeline completes. With
+    ``log_dir``, each pipeline's output is archived there as a separate run.
+    """
+    pool = FairSlotPool(slots or os.cpu_count() or 1)
+    parser = PipelineParser()
+
+    runs = [PipelineRun(path) for path in paths]
+    pipelines: list[tuple[PipelineRun, Pipeline]] = []
+    for run in runs:
+        try:
+            pipeline = parser.parse_file(run.path, pipeline_type)
+        except Exception as e:
+            run.error = f"Parse error: {e}"
+            if on_finish:
+                on_finish(run)
+            continue
+        run.pipeline_type = pipeline.pipeline_type
+        pipelines.append((run, pipeline))
+
+    def execute(run: PipelineRun, pipeline: Pipeline, executor: StepExecutor):
+        archive = LogArchiveWriter(log_dir) if log_dir else None
+        if archive:
+            executor.add_listener(archive)
+        start = time.monotonic()
+        try:
+            run.result = executor.execute_pipeline(pipeline)
+        except ValueError as e:
+            run.error = f"Pipeline error: {e}"
+        if archive:
+            run.log_run = archive.run_id
+        run.duration = time.monotonic() - start
+        if on_finish:
+            on_finish(run)
+
+    # Jobs are bounded by the shared pool, so each pipeline may use all of it
+    executors = [StepExecutor(working_dir=working_dir, output_limit=output_limit,
+                              max_parallel=pool.slots, slot_pool=pool, secrets=secrets,
+                              secrets_prefix=secrets_prefix)
+                 for _ in pipelines]
+    if pipelines:
+        with ThreadPoolExecutor(max_workers=len(pipelines),
+                                thread_name_prefix='pipeline') as threads:
+            futures = [threads.submit(execute, run, pipeline, executor)
+                       for (run, pipeline), executor in zip(pipelines, executors)]
+            try:
+                for future in futures:
+                    future.result()
+            except KeyboardInterrupt:
+                for executor in executors:
+                    executor.cancel()
+                raise
+    return runs
@@ -1,10 +1,14 @@
 """YAML parser for GitHub Actions and Azure Pipelines configurations."""
 
+import re
 import yaml
 from dataclasses import dataclass, field
 from typing import Optional
 from pathlib import Path
 
+from .templates import TemplateCache, TemplateResolver, MAX_INCLUDE_DEPTH
+from .tracing import NULL_TRACER
+
 
 @dataclass
 class Step:
@@ -25,6 +29,7 @@ class Job:
     env: dict = field(default_factory=dict)
     needs: list[str] = field(default_factory=list)
     condition: Optional[str] = None
+    paths: list[str] = field(default_factory=list)  # input globs, relative to the working dir
 
 
 @dataclass
@@ -33,6 +38,7 @@ class Stage:
     name: str
     jobs: list[Job] = field(default_factory=list)
     condition: Optional[str] = None
+    depends_on: Optional[list[str]] = None  # None: the previous stage; []: no dependencies
 
 
 @dataclass
@@ -44,26 +50,84 @@ class Pipeline:
     jobs: list[Job] = field(default_factory=list)
     stages: list[Stage] = field(default_factory=list)
     raw_yaml: dict = field(default_factory=dict)
+    template_files: list[str] = field(default_factory=list)
+    secrets: list[str] = field(default_factory=list)  # names referenced as secrets.NAME
+
+
+_SECRET_NAME = re.compile(r"\bsecrets\.(\w+)|\bsecrets\[\s*'(\w+)'\s*\]")
+
+
+def _secret_refs(node, found: dict):
+    """Collect the secret names referenced anywhere in parsed YAML."""
+    if isinstance(node, str):
+        for match in _SECRET_NAME.finditer(node):
+            found[match.group(1) or match.group(2)] = None
+    elif isinstance(node, dict):
+        for value in node.values():
+            _secret_refs(value, found)
+    elif isinstance(node, list):
+        for item in node:
+            _secret_refs(item, found)
+
+
+def referenced_secrets(node) -> list[str]:
+    """Names of the secrets referenced anywhere in parsed YAML or dicts of it."""
+    found: dict = {}
+    _secret_refs(node, found)
+    return list(found)
+
+
+def detect_pipeline_type(content: dict) -> str:
+    """Guess whether pipeline content is a GitHub workflow or an Azure pipeline."""
+    if not isinstance(content, dict):
+        raise ValueError("Pipeline file is not a YAML mapping")
+    # GitHub: `on:` (read by YAML as True) and a mapping of jobs
+    if 'on' in content or True in content or isinstance(content.get('jobs'), dict):
+        return "github"
+    if any(key in content for key in ('stages', 'jobs', 'steps', 'extends', 'trigger', 'pool')):
+        return "azure"
+    raise ValueError("Cannot tell whether this is a GitHub or Azure pipeline; pass --type")
 
 
 class PipelineParser:
     """Parser for CI/CD pipeline YAML files."""
 
+    def __init__(self, template_cache: Optional[TemplateCache] = None,
+                 max_include_depth: int = MAX_INCLUDE_DEPTH, tracer=None):
+        self.templates = TemplateResolver(template_cache, max_include_depth)
+        self.tracer = tracer or NULL_TRACER
+
     def parse_file(self, filepath: str, pipeline_type: str = "github") -> Pipeline:
         """Parse a pipeline YAML file."""
-        with open(filepath, 'r') as f:
-            content = yaml.safe_load(f)
-        return self.parse(content, pipeline_type)
-
-    def parse(self, content: dict, pipeline_type: str = "github") -> Pipeline:
-        """Parse pipeline content based on type."""
-        if pipeline_type == "github":
-            return self._parse_github_actions(content)
-        elif pipeline_type == "azure":
-            return self._parse_azure_pipelines(content)
-        else:
+        with self.tracer.span("load yaml", "overhead", {'file': str(filepath)}):
+            with open(filepath, 'r') as f:
+                content = yaml.safe_load(f)
+        return self.parse(content, pipeline_type, base_dir=Path(filepath).parent)
+
+    def parse(self, content: dict, pipeline_type: str = "github",
+              base_dir: Optional[Path] = None) -> Pipeline:
+        """Parse pipeline content based on type.
+
+        Template references are resolved relative to ``base_dir`` (default:
+        the current directory). ``pipeline_type`` "auto" detects the type
+        from the content.
+        """
+        if pipeline_type == "auto":
+            pipeline_type = detect_pipeline_type(content)
+        if pipeline_type not in ("github", "azure"):
             raise ValueError(f"Unsupported pipeline type: {pipeline_type}")
 
+        with self.tracer.span("expand templates", "overhead"):
+            content, template_files = self.templates.expand(content, pipeline_type, base_dir)
+        with self.tracer.span("parse", "overhead"):
+            if pipeline_type == "github":
+                pipeline = self._parse_github_actions(content)
+            else:
+                pipeline = self._parse_azure_pipelines(content)
+        pipeline.template_files = [str(path) for path in template_files]
+        pipeline.secrets = referenced_secrets(content)
+        return pipeline
+
     def _parse_github_actions(self, content: dict) -> Pipeline:
         """Parse GitHub Actions workflow YAML."""
         pipeline = Pipeline(
@@ -90,7 +154,8 @@ class PipelineParser:
             name=job_id,
             env=job_data.get('env', {}),
             needs=needs,
-            condition=job_data.get('if')
+            condition=job_data.get('if'),
+            paths=self._parse_paths(job_data)
         )
 
         for step_data in job_data.get('steps', []):
@@ -99,6 +164,13 @@ class PipelineParser:
 
         return job
 
+    def _parse_paths(self, job_data: dict) -> list[str]:
+        """Parse the input paths a job declares (simulator extension)."""
+        paths = job_data.get('paths', [])
+        if isinstance(paths, str):
+            paths = [paths]
+        return list(paths)
+
     def _parse_github_step(self, step_data: dict) -> Step:
         """Parse a GitHub Actions step."""
         return Step(
@@ -140,9 +212,14 @@ class PipelineParser:
 
     def _parse_azure_stage(self, stage_data: dict) -> Stage:
         """Parse an Azure Pipelines stage."""
+        depends_on = stage_data.get('dependsOn')
+        if isinstance(depends_on, str):
+            depends_on = [depends_on]
+
         stage = Stage(
             name=stage_data.get('stage', 'Unnamed Stage'),
-            condition=stage_data.get('condition')
+            condition=stage_data.get('condition'),
+            depends_on=depends_on
         )
 
         for job_data in stage_data.get('jobs', []):
@@ -161,7 +238,8 @@ class PipelineParser:
             name=job_data.get('job', 'Unnamed Job'),
             env=job_data.get('variables', {}),
             needs=depends_on,
-            condition=job_data.get('condition')
+            condition=job_data.get('condition'),
+            paths=self._parse_paths(job_data)
         )
 
         for step_data in job_data.get('steps', []):
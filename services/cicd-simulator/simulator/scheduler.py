@@ -0,0 +1,287 @@
+"""Dependency-graph scheduling of pipeline stages and jobs.
+
+A pipeline is flattened into a JobGraph: job nodes with their ``needs`` /
+``dependsOn`` edges, grouped into stage nodes with stage-level ``dependsOn``
+edges. GitHub workflows and stage-less Azure pipelines form a single
+implicit stage. A Schedule then tracks, as jobs finish, which jobs may
+start next. It is independent of how jobs actually run, so local threads,
+remote workers and simulated clocks all drive the same state machine.
+"""
+
+import threading
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Hashable, Iterable, Optional
+
+from .events import Status
+from .parser import Pipeline, Job, Stage
+
+
+@dataclass(slots=True, eq=False)
+class JobNode:
+    """A job in the graph; ``deps`` and ``dependents`` are job indexes."""
+    index: int
+    job: Job
+    stage: int
+    deps: list[int] = field(default_factory=list)
+    dependents: list[int] = field(default_factory=list)
+
+
+@dataclass(slots=True, eq=False)
+class StageNode:
+    """A stage in the graph; ``stage`` is None for the implicit stage."""
+    index: int
+    stage: Optional[Stage]
+    jobs: list[int] = field(default_factory=list)
+    deps: list[int] = field(default_factory=list)
+    dependents: list[int] = field(default_factory=list)
+
+    @property
+    def name(self) -> str:
+        return self.stage.name if self.stage else ""
+
+
+class JobGraph:
+    """The stages and jobs of a pipeline with their dependencies resolved.
+
+    Only jobs named in ``selected`` (default: all) become nodes; dependencies
+    on jobs left out are treated as already satisfied.
+    """
+
+    def __init__(self, pipeline: Pipeline, selected: Optional[Iterable[str]] = None):
+        selected = set(selected) if selected is not None else None
+        self.jobs: list[JobNode] = []
+        self.stages: list[StageNode] = []
+
+        stages = pipeline.stages or [None]
+        stage_index = {stage.name: i for i, stage in enumerate(pipeline.stages)}
+
+        for s, stage in enumerate(stages):
+            node = StageNode(index=s, stage=stage)
+            if stage is not None:
+                if stage.depends_on is None:
+                    node.deps = [s - 1] if s > 0 else []
+                else:
+                    for name in stage.depends_on:
+                        if name not in stage_index:
+                            raise ValueError(
+                                f"Stage '{stage.name}' depends on unknown stage '{name}'")
+                        node.deps.append(stage_index[name])
+            self.stages.append(node)
+
+            jobs = stage.jobs if stage is not None else pipeline.jobs
+            defined = {job.name for job in jobs}
+            local: dict[str, int] = {}
+            for job in jobs:
+                if selected is not None and job.name not in selected:
+                    continue
+                local[job.name] = len(self.jobs)
+                node.jobs.append(len(self.jobs))
+                self.jobs.append(JobNode(index=len(self.jobs), job=job, stage=s))
+
+            for name, j in local.items():
+                for need in self.jobs[j].job.needs:
+                    if need not in defined:
+                        raise ValueError(f"Job '{name}' needs unknown job '{need}'")
+                    if need in local:
+                        self.jobs[j].deps.append(local[need])
+
+        for node in self.stages:
+            for dep in node.deps:
+                self.stages[dep].dependents.append(node.index)
+        for node in self.jobs:
+            for dep in node.deps:
+                self.jobs[dep].dependents.append(node.index)
+
+        self._check_acyclic(self.stages, "stages")
+        self._check_acyclic(self.jobs, "jobs")
+
+    @staticmethod
+    def _check_acyclic(nodes, kind: str):
+        remaining = [len(node.deps) for node in nodes]
+        ready = [node.index for node in nodes if not node.deps]
+        visited = 0
+        while ready:
+            index = ready.pop()
+            visited += 1
+            for dependent in nodes[index].dependents:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        if visited != len(nodes):
+            names = [_node_name(n) for n, left in zip(nodes, remaining) if left]
+            raise ValueError(f"Dependency cycle between {kind}: {', '.join(names)}")
+
+
+def _node_name(node) -> str:
+    return node.job.name if isinstance(node, JobNode) else node.name
+
+
+class Schedule:
+    """Tracks which jobs of a JobGraph may start as upstream jobs finish.
+
+    ``stage_condition`` decides, once all of a stage's dependencies have
+    finished, whether the stage runs; it receives the stage node and the
+    statuses of its dependency stages by name. Jobs of stages that do not
+    run are marked SKIPPED without ever becoming ready.
+    """
+
+    def __init__(self, graph: JobGraph,
+                 stage_condition: Callable[[StageNode, dict[str, Status]], bool]):
+        self.graph = graph
+        self.job_status: list[Optional[Status]] = [None] * len(graph.jobs)
+        self.stage_status: list[Optional[Status]] = [None] * len(graph.stages)
+        self.skipped: list[JobNode] = []  # skipped with their stage, never ready
+        self._stage_condition = stage_condition
+        self._job_deps_left = [len(node.deps) for node in graph.jobs]
+        self._stage_deps_left = [len(node.deps) for node in graph.stages]
+        self._stage_jobs_left = [len(node.jobs) for node in graph.stages]
+        self._ready: deque[JobNode] = deque()
+        self._finished = 0
+
+        opened = [node for node in graph.stages if not node.deps]
+        for stage in self._open_stages(opened):
+            self._close_stage(stage)
+
+    @property
+    def finished(self) -> bool:
+        """Whether every job has a final status."""
+        return self._finished == len(self.graph.jobs)
+
+    def pop_ready(self) -> list[JobNode]:
+        """Return and forget the jobs that may start now."""
+        ready = list(self._ready)
+        self._ready.clear()
+        return ready
+
+    def dependency_statuses(self, node: JobNode) -> dict[str, Status]:
+        """Statuses of a job's dependencies, by job name."""
+        return {self.graph.jobs[d].job.name: self.job_status[d] for d in node.deps}
+
+    def complete(self, node: JobNode, status: Status):
+        """Record a job's final status and release whatever it unblocks."""
+        self.job_status[node.index] = status
+        self._finished += 1
+
+        for d in node.dependents:
+            self._job_deps_left[d] -= 1
+            if self._job_deps_left[d] == 0:
+                self._ready.append(self.graph.jobs[d])
+
+        self._stage_jobs_left[node.stage] -= 1
+        if self._stage_jobs_left[node.stage] == 0:
+            self._close_stage(self.graph.stages[node.stage])
+
+    def _stage_result(self, stage: StageNode) -> Status:
+        statuses = [self.job_status[j] for j in stage.jobs]
+        if Status.FAILED in statuses:
+            return Status.FAILED
+        if Status.CANCELLED in statuses:
+            return Status.CANCELLED
+        if statuses and all(s is Status.SKIPPED for s in statuses):
+            return Status.SKIPPED
+        return Status.PASSED
+
+    def _close_stage(self, stage: StageNode):
+        pending = [stage]
+        while pending:
+            stage = pending.pop()
+            if self.stage_status[stage.index] is None:
+                self.stage_status[stage.index] = self._stage_result(stage)
+            opened = []
+            for d in stage.dependents:
+                self._stage_deps_left[d] -= 1
+                if self._stage_deps_left[d] == 0:
+                    opened.append(self.graph.stages[d])
+            pending.extend(self._open_stages(opened))
+
+    def _open_stages(self, stages: list[StageNode]) -> list[StageNode]:
+        """Start stages whose dependencies finished; return those already done."""
+        done = []
+        for stage in stages:
+            deps = {self.graph.stages[d].name: self.stage_status[d] for d in stage.deps}
+            if stage.stage is not None and not self._stage_condition(stage, deps):
+                self.stage_status[stage.index] = Status.SKIPPED
+                skipped = [self.graph.jobs[j] for j in stage.jobs]
+                self.skipped.extend(skipped)
+                for node in skipped:
+                    self.job_status[node.index] = Status.SKIPPED
+                    self._finished += 1
+                self._stage_jobs_left[stage.index] = 0
+                done.append(stage)
+            elif not stage.jobs:
+                done.append(stage)
+            else:
+                self._ready.extend(self.graph.jobs[j] for j in stage.jobs
+                                   if not self.graph.jobs[j].deps)
+        return done
+
+
+class FairSlotPool:
+    """A global budget of concurrently running step commands, shared fairly.
+
+    Several executors (one per pipeline) draw slots from one pool. While
+    slots are free they are granted at once; when the pool is exhausted,
+    waiters queue per client and each released slot goes to the next client
+    in round-robin order, so a pipeline with many ready jobs cannot starve
+    the others.
+    """
+
+    def __init__(self, slots: int):
+        if slots < 1:
+            raise ValueError("A slot pool needs at least one slot")
+        self.slots = slots
+        self._free = slots
+        self._lock = threading.Lock()
+        self._waiting: dict[Hashable, deque[threading.Event]] = {}
+        self._turns: deque[Hashable] = deque()  # clients with waiters, next first
+
+    @property
+    def in_use(self) -> int:
+        """Slots currently held."""
+        with self._lock:
+            return self.slots - self._free
+
+    @property
+    def waiting(self) -> int:
+        """Acquires currently blocked on a slot."""
+        with self._lock:
+            return sum(len(waiters) for waiters in self._waiting.values())
+
+    def acquire(self, client: Hashable):
+        """Block until ``client`` holds a slot."""
+        with self._lock:
+            if self._free and not self._turns:
+                self._free -= 1
+                return
+            granted = threading.Event()
+            if client not in self._waiting:
+                self._waiting[client] = deque()
+                self._turns.append(client)
+            self._waiting[client].append(granted)
+        granted.wait()
+
+    def release(self):
+        """Return a slot, handing it straight to the next waiting client."""
+        with self._lock:
+            if not self._turns:
+                self._free += 1
+                return
+            client = self._turns.popleft()
+            waiters = self._waiting[client]
+            granted = waiters.popleft()
+            if waiters:
+                self._turns.append(client)
+            else:
+                del self._waiting[client]
+        granted.set()
+
+    @contextmanager
+    def slot(self, client: Hashable):
+        """Hold one slot for the duration of a ``with`` block."""
+        self.acquire(client)
+        try:
+            yield
+        finally:
+            self.release()
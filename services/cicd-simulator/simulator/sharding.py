@@ -0,0 +1,174 @@
+"""Timing-based test sharding for the ``cicd-sim/shard-tests`` built-in action.
+
+Per-test durations are read from JUnit XML reports written by earlier runs,
+tests are bin-packed into shards of roughly equal total duration, and the
+per-shard reports are merged back into a single report.
+
+Example step::
+
+    - name: Tests
+      uses: cicd-sim/shard-tests@v1
+      with:
+        total: 4
+        tests: tests/test_*.py
+        command: pytest $SHARD_TESTS --junitxml=reports/shard-$SHARD_INDEX.xml
+        timings: reports/junit.xml
+        report: reports/shard-$SHARD_INDEX.xml
+        merged-report: reports/junit.xml
+
+Each shard runs ``command`` concurrently with ``SHARD_INDEX`` (0-based),
+``SHARD_TOTAL`` and ``SHARD_TESTS`` (space-separated) in its environment.
+"""
+
+import glob
+import heapq
+import os
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+SHARD_ACTION = 'cicd-sim/shard-tests'
+
+
+def is_shard_action(uses: Optional[str]) -> bool:
+    """Whether a step's ``uses:`` refers to the built-in sharding action."""
+    return bool(uses) and uses.split('@', 1)[0] == SHARD_ACTION
+
+
+@dataclass
+class Shard:
+    """A group of tests assigned to one parallel run."""
+    index: int
+    tests: list[str] = field(default_factory=list)
+    estimated: float = 0.0
+
+
+def expand_globs(patterns: str, root: str) -> list[str]:
+    """Expand whitespace-separated glob patterns relative to ``root``."""
+    matches = []
+    for pattern in patterns.split():
+        matches.extend(sorted(glob.glob(pattern, root_dir=root, recursive=True)))
+    return list(dict.fromkeys(matches))
+
+
+def _case_keys(case: ET.Element) -> tuple[list[str], list[str]]:
+    """Keys identifying a testcase, and file paths it may belong to."""
+    classname = case.get('classname', '')
+    name = case.get('name', '')
+    keys = [f"{classname}::{name}", f"{classname}.{name}"]
+
+    files = []
+    if case.get('file'):
+        files.append(case.get('file'))
+        keys.append(f"{case.get('file')}::{name}")
+    # pytest writes `tests.test_app.TestApi` for tests/test_app.py::TestApi;
+    # the module boundary is unknown, so credit every dotted prefix.
+    parts = classname.split('.')
+    for i in range(1, len(parts) + 1):
+        files.append('/'.join(parts[:i]) + '.py')
+    return keys, files
+
+
+def load_timings(paths: Iterable[str]) -> dict[str, float]:
+    """Read per-test and per-file durations (seconds) from JUnit XML reports.
+
+    Later reports take precedence over earlier ones; pass paths oldest first.
+    Unreadable reports are ignored.
+    """
+    timings: dict[str, float] = {}
+    for path in paths:
+        try:
+            root = ET.parse(path).getroot()
+        except (ET.ParseError, OSError):
+            continue
+
+        report: dict[str, float] = {}
+        per_file: dict[str, float] = {}
+        for case in root.iter('testcase'):
+            try:
+                seconds = float(case.get('time', 0) or 0)
+            except ValueError:
+                continue
+            keys, files = _case_keys(case)
+            for key in keys:
+                report[key] = seconds
+            for name in set(files):
+                per_file[name] = per_file.get(name, 0.0) + seconds
+
+        timings.update(per_file)
+        timings.update(report)
+    return timings
+
+
+def plan_shards(tests: list[str], timings: dict[str, float], total: int) -> list[Shard]:
+    """Split tests into ``total`` shards with balanced estimated durations.
+
+    Uses longest-processing-time-first bin packing: tests are taken longest
+    first and each goes to the currently lightest shard. Tests without a
+    recorded duration are assumed to take the mean of those with one. There
+    are never more shards than tests, so no shard is empty.
+    """
+    total = min(max(1, total), len(tests))
+    known = [timings[t] for t in tests if t in timings]
+    default = sum(known) / len(known) if known else 1.0
+    durations = {t: timings.get(t, default) for t in tests}
+
+    shards = [Shard(index=i) for i in range(total)]
+    heap = [(0.0, i) for i in range(total)]
+    for test in sorted(tests, key=lambda t: (-durations[t], t)):
+        load, index = heapq.heappop(heap)
+        shards[index].tests.append(test)
+        shards[index].estimated = load + durations[test]
+        heapq.heappush(heap, (shards[index].estimated, index))
+    return shards
+
+
+@dataclass
+class ReportSummary:
+    """Totals of a merged JUnit report."""
+    tests: int = 0
+    failures: int = 0
+    errors: int = 0
+    skipped: int = 0
+    time: float = 0.0
+    missing: list[str] = field(default_factory=list)
+
+
+def merge_reports(paths: list[str], output: str, failed: Iterable[str] = ()) -> ReportSummary:
+    """Merge JUnit XML reports into one ``<testsuites>`` document at ``output``.
+
+    A report in ``failed`` (written by a shard that failed) that is missing
+    is merged as a suite with one error, so the crash is not lost.
+    """
+    merged = ET.Element('testsuites')
+    summary = ReportSummary()
+    failed = set(failed)
+
+    for path in paths:
+        try:
+            root = ET.parse(path).getroot()
+        except (ET.ParseError, OSError):
+            summary.missing.append(path)
+            if path not in failed:
+                continue
+            root = ET.Element('testsuite', name=os.path.basename(path), tests='1', errors='1')
+            case = ET.SubElement(root, 'testcase', classname=SHARD_ACTION, name=os.path.basename(path))
+            ET.SubElement(case, 'error', message="shard failed without writing its report")
+        suites = [root] if root.tag == 'testsuite' else list(root.iter('testsuite'))
+        for suite in suites:
+            merged.append(suite)
+            summary.tests += int(suite.get('tests', 0) or 0)
+            summary.failures += int(suite.get('failures', 0) or 0)
+            summary.errors += int(suite.get('errors', 0) or 0)
+            summary.skipped += int(suite.get('skipped', 0) or 0)
+            summary.time += float(suite.get('time', 0) or 0)
+
+    merged.set('tests', str(summary.tests))
+    merged.set('failures', str(summary.failures))
+    merged.set('errors', str(summary.errors))
+    merged.set('skipped', str(summary.skipped))
+    merged.set('time', f"{summary.time:.3f}")
+
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    ET.ElementTree(merged).write(output, encoding='utf-8', xml_declaration=True)
+    return summary
@@ -0,0 +1,275 @@
+"""Virtual-clock simulation of pipeline runs.
+
+A SimulatedExecutor schedules a pipeline exactly like StepExecutor (same
+Schedule, same conditions) on ``max_parallel`` worker slots, but no
+command runs: each step "takes" a duration drawn from a distribution or
+from the durations recorded in the log archive, and a discrete-event loop
+advances a virtual clock from one job completion to the next. Pipelines
+with tens of thousands of jobs simulate in seconds, which makes this a load
+test harness for scheduling and concurrency settings.
+
+Duration specs (seconds):
+
+- ``fixed:S``
+- ``uniform:LOW,HIGH``
+- ``exp:MEAN``
+- ``lognormal:MU,SIGMA`` (of the underlying normal distribution)
+- ``history[:FALLBACK]``: a recorded duration of the same job and step from
+  the log archive, or the FALLBACK spec (default: the mean recorded
+  duration) for steps never seen before
+"""
+
+import heapq
+import random
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+from .events import EventKind, Status
+from .executor import JobResult, PipelineResult, StepExecutor, StepResult
+from .logarchive import LogArchive
+from .parser import Job, Pipeline
+from .scheduler import JobGraph, JobNode, Schedule
+
+DurationModel = Callable[[str, str], float]  # (job name, step name) -> seconds
+
+
+def _numbers(spec: str, arguments: str, count: int, non_negative: bool = True) -> list[float]:
+    try:
+        values = [float(value) for value in arguments.split(',')]
+    except ValueError:
+        values = []
+    if len(values) != count or (non_negative and min(values) < 0):
+        raise ValueError(f"Invalid duration spec '{spec}'")
+    return values
+
+
+def duration_model(spec: str, seed: Optional[int] = None,
+                   log_dir: Optional[str] = None) -> DurationModel:
+    """Build a duration model from a spec (see the module docstring)."""
+    rng = random.Random(seed)
+    kind, _, arguments = spec.partition(':')
+
+    if kind == 'fixed':
+        [seconds] = _numbers(spec, arguments, 1)
+        return lambda job, step: seconds
+    if kind == 'uniform':
+        low, high = _numbers(spec, arguments, 2)
+        if high < low:
+            raise ValueError(f"Invalid duration spec '{spec}'")
+        return lambda job, step: rng.uniform(low, high)
+    if kind == 'exp':
+        [mean] = _numbers(spec, arguments, 1)
+        return lambda job, step: rng.expovariate(1 / mean) if mean else 0.0
+    if kind == 'lognormal':
+        mu, sigma = _numbers(spec, arguments, 2, non_negative=False)
+        return lambda job, step: rng.lognormvariate(mu, sigma)
+    if kind == 'history':
+        history = load_history(LogArchive(log_dir))
+        if arguments:
+            fallback = duration_model(arguments, seed, log_dir)
+        else:
+            recorded = [d for durations in history.values() for d in durations]
+            mean = sum(recorded) / len(recorded) if recorded else 1.0
+            fallback = lambda job, step: mean
+
+        def from_history(job: str, step: str) -> float:
+            durations = history.get((job, step))
+            return rng.choice(durations) if durations else fallback(job, step)
+        return from_history
+    raise ValueError(f"Unknown duration spec '{spec}' "
+                     f"(use fixed:, uniform:, exp:, lognormal: or history)")
+
+
+def load_history(archive: LogArchive) -> dict[tuple[str, str], list[float]]:
+    """Recorded durations of every (job, step) across the archived runs."""
+    history: dict[tuple[str, str], list[float]] = {}
+    for run_id in archive.runs():
+        for entry in archive.open(run_id).steps:
+            if 'duration' in entry and entry.get('status') != Status.SKIPPED.value:
+                history.setdefault((entry['job'], entry['step']), []).append(entry['duration'])
+    return history
+
+
+def _ns(seconds: float) -> int:
+    return int(seconds * 1e9)
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+@dataclass
+class SimulationReport:
+    """Timing of a simulated run, in virtual seconds."""
+    slots: int
+    makespan: float = 0.0
+    work: float = 0.0  # total time jobs held a slot
+    slot_busy: list[float] = field(default_factory=list)
+    queue_waits: list[float] = field(default_factory=list)  # per job that ran
+    peak_queue: int = 0
+    jobs_run: int = 0
+    jobs_skipped: int = 0
+    jobs_failed: int = 0
+
+    @property
+    def utilization(self) -> float:
+        """Fraction of slot time spent running jobs."""
+        capacity = self.slots * self.makespan
+        return self.work / capacity if capacity else 0.0
+
+    @property
+    def mean_queue_wait(self) -> float:
+        return sum(self.queue_waits) / len(self.queue_waits) if self.queue_waits else 0.0
+
+    @property
+    def p95_queue_wait(self) -> float:
+        return _percentile(self.queue_waits, 0.95)
+
+    @property
+    def max_queue_wait(self) -> float:
+        return max(self.queue_waits, default=0.0)
+
+
+class SimulatedExecutor(StepExecutor):
+    """Schedules pipelines on a virtual clock instead of running commands.
+
+    Steps pass unless ``failure_rate`` (a probability per step) makes them
+    fail, so failure()/always() paths can be exercised too. After
+    execute_pipeline, ``report`` holds the SimulationReport. A ``tracer``
+    records the simulated jobs and steps in virtual time, one track per slot.
+    """
+
+    def __init__(self, durations: DurationModel, max_parallel: Optional[int] = None,
+                 failure_rate: float = 0.0, seed: Optional[int] = None, tracer=None,
+                 secrets: Optional[dict[str, str]] = None):
+        super().__init__(max_parallel=max_parallel, tracer=tracer, secrets=secrets)
+        self.durations = durations
+        self.failure_rate = failure_rate
+        self.report: Optional[SimulationReport] = None
+        # A stream of its own: seeded like the duration model, the failure
+        # draw would mirror the duration draw and fail only the shortest steps
+        self._rng = random.Random(None if seed is None else f"{seed}:failures")
+
+    def execute_pipeline(self, pipeline: Pipeline, job_filter: str = None,
+                         jobs: Optional[Iterable[str]] = None) -> PipelineResult:
+        """Simulate all jobs of a pipeline; see StepExecutor.execute_pipeline."""
+        self.prepare(pipeline.name, pipeline.env)
+        selected = set(jobs) if jobs is not None else None
+        if job_filter:
+            selected = {job_filter} & selected if selected is not None else {job_filter}
+
+        graph = JobGraph(pipeline, selected)
+        schedule = Schedule(graph, self._should_run_stage)
+        report = self.report = SimulationReport(slots=self.max_parallel,
+                                                slot_busy=[0.0] * self.max_parallel)
+        self._emit(EventKind.PIPELINE_STARTED)
+
+        job_results: list[Optional[JobResult]] = [None] * len(graph.jobs)
+        tracing = self.tracer.enabled
+        origin = self.tracer.now()  # virtual time 0 on the trace
+        now = 0.0
+        ready_since: dict[int, float] = {}
+        queue: deque[JobNode] = deque()
+        free_slots = list(range(self.max_parallel))  # a heap: lowest slot first
+        running: list[tuple[float, int, int]] = []   # heap of (finish time, job index, slot)
+
+        def collect_ready():
+            for node in schedule.pop_ready():
+                ready_since[node.index] = now
+                queue.append(node)
+            report.peak_queue = max(report.peak_queue, len(queue))
+
+        collect_ready()
+        while not schedule.finished:
+            while queue and free_slots:
+                node = queue.popleft()
+                result, steps = self._simulate_job(node.job, schedule.dependency_statuses(node))
+                duration = sum(steps)
+                job_results[node.index] = result
+                if result.status is Status.SKIPPED:
+                    # Deciding to skip takes no slot time
+                    report.jobs_skipped += 1
+                    schedule.complete(node, result.status)
+                    self._emit(EventKind.JOB_FINISHED, result.job_name, result=result)
+                    collect_ready()
+                    continue
+                slot = heapq.heappop(free_slots)
+                report.queue_waits.append(now - ready_since.pop(node.index))
+                report.slot_busy[slot] += duration
+                report.work += duration
+                heapq.heappush(running, (now + duration, node.index, slot))
+                if tracing:
+                    self._trace_job(origin, now, slot, result, steps)
+
+            if not running:
+                continue  # only skips were pending; the schedule has moved on
+            now, index, slot = heapq.heappop(running)
+            heapq.heappush(free_slots, slot)
+            result = job_results[index]
+            report.jobs_run += 1
+            report.jobs_failed += result.status is Status.FAILED
+            schedule.complete(graph.jobs[index], result.status)
+            self._emit(EventKind.JOB_FINISHED, result.job_name, result=result)
+            collect_ready()
+
+        for node in schedule.skipped:
+            job_results[node.index] = JobResult(job_name=node.job.name, status=Status.SKIPPED)
+            report.jobs_skipped += 1
+            self._emit(EventKind.JOB_FINISHED, node.job.name, result=job_results[node.index])
+
+        report.makespan = now
+        if tracing:
+            self.tracer.complete(pipeline.name, "pipeline", origin, origin + _ns(now), "pipeline",
+                                 {'simulated': True})
+        result = PipelineResult(
+            pipeline_name=pipeline.name,
+            success=all(jr.success for jr in job_results),
+            job_results=job_results
+        )
+        self._emit(EventKind.PIPELINE_FINISHED, result=result)
+        return result
+
+    def _trace_job(self, origin: int, start: float, slot: int, result: JobResult,
+                   steps: list[float]):
+        """Record a simulated job and its steps on the track of its slot."""
+        track = f"slot {slot + 1}"
+        end = start + sum(steps)
+        self.tracer.complete(result.job_name, "job", origin + _ns(start), origin + _ns(end),
+                             track, {'status': result.status.value})
+        for step_result, seconds in zip(result.step_results, steps):
+            if seconds:
+                self.tracer.complete(step_result.step_name, "step", origin + _ns(start),
+                                     origin + _ns(start + seconds), track,
+                                     {'job': result.job_name})
+            start += seconds
+
+    def _simulate_job(self, job: Job,
+                      dependencies: dict[str, Status]) -> tuple[JobResult, list[float]]:
+        """Decide a job's outcome and the duration of each of its step results."""
+        env = {**self.global_env, **job.env} if job.env else self.global_env
+        result = JobResult(job_name=job.name)
+        if not self._should_run(job.condition, env, dependencies):
+            result.status = Status.SKIPPED
+            return result, []
+
+        steps: list[float] = []
+        for step in job.steps:
+            if step.condition and not self._evaluate_condition(step.condition, env):
+                result.step_results.append(StepResult(step_name=step.name, status=Status.SKIPPED,
+                                                      skip_reason="Condition not met"))
+                steps.append(0.0)
+                continue
+            seconds = self.durations(job.name, step.name)
+            steps.append(seconds)
+            if self.failure_rate and self._rng.random() < self.failure_rate:
+                result.step_results.append(StepResult(step_name=step.name, status=Status.FAILED,
+                                                      exit_code=1, error="Simulated failure"))
+                result.status = Status.FAILED
+                break
+            result.step_results.append(StepResult(step_name=step.name, status=Status.PASSED,
+                                                  output=f"[Simulated] {seconds:.2f}s"))
+        return result, steps
@@ -0,0 +1,286 @@
+"""Template and reusable workflow expansion for pipeline YAML.
+
+Azure Pipelines ``template:`` references (in stage, job and step lists, and
+``extends:``) and GitHub ``uses: ./path/to/workflow.yml`` reusable workflows
+are expanded into a single self-contained document before parsing.
+"""
+
+import re
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+import yaml
+
+MAX_INCLUDE_DEPTH = 20
+
+_EXPRESSION = re.compile(
+    r"\$\{\{\s*(parameters|inputs)(?:\.([\w-]+)|\[\s*'([\w-]+)'\s*\])\s*\}\}"
+)
+
+
+class TemplateError(ValueError):
+    """Raised when a template cannot be resolved or expanded."""
+
+
+class TemplateCache:
+    """Parsed template files, reused until the file on disk changes.
+
+    Each file is read and parsed once per cache lifetime, however many times
+    it is instantiated. Entries are keyed by path and revalidated against the
+    file's mtime and size, so long-lived processes pick up edits.
+    """
+
+    def __init__(self):
+        self._entries: dict[Path, tuple[tuple[int, int], Any]] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def load(self, path: Path) -> Any:
+        """Return the parsed YAML content of ``path``."""
+        stat = path.stat()
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == key:
+                return entry[1]
+
+        with open(path, 'r') as f:
+            content = yaml.safe_load(f) or {}
+
+        with self._lock:
+            self._entries[path] = (key, content)
+            self.loads += 1
+        return content
+
+    def clear(self):
+        """Forget every cached template."""
+        with self._lock:
+            self._entries.clear()
+
+
+default_cache = TemplateCache()
+
+
+def _format(value: Any) -> str:
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+
+def substitute(node: Any, namespace: str, values: dict) -> Any:
+    """Return a copy of ``node`` with ``${{ <namespace>.X }}`` expressions replaced.
+
+    A string consisting of a single expression is replaced by the raw value,
+    so list and mapping parameters (e.g. a ``stepList``) keep their type.
+    Expressions naming unknown parameters are left untouched.
+    """
+    if isinstance(node, dict):
+        return {substitute(k, namespace, values): substitute(v, namespace, values)
+                for k, v in node.items()}
+    if isinstance(node, list):
+        return [substitute(item, namespace, values) for item in node]
+    if not isinstance(node, str) or '${{' not in node:
+        return node
+
+    def lookup(match):
+        name = match.group(2) or match.group(3)
+        if match.group(1) != namespace or name not in values:
+            return None
+        return values[name]
+
+    match = _EXPRESSION.fullmatch(node.strip())
+    if match:
+        value = lookup(match)
+        return node if value is None else value
+
+    def replace(match):
+        value = lookup(match)
+        return match.group(0) if value is None else _format(value)
+
+    return _EXPRESSION.sub(replace, node)
+
+
+class TemplateResolver:
+    """Expands template references, enforcing include-depth and cycle limits."""
+
+    def __init__(self, cache: Optional[TemplateCache] = None,
+                 max_depth: int = MAX_INCLUDE_DEPTH):
+        self.cache = cache or default_cache
+        self.max_depth = max_depth
+
+    def expand(self, content: dict, pipeline_type: str,
+               base_dir: Optional[Path] = None) -> tuple[dict, list[Path]]:
+        """Expand all templates in ``content``.
+
+        Returns the expanded document and the template files it used.
+        """
+        used: list[Path] = []
+        base_dir = Path(base_dir or Path.cwd()).resolve()
+        if pipeline_type == 'github':
+            content = self._expand_github(content, base_dir, [], used)
+        elif pipeline_type == 'azure':
+            content = self._expand_azure(content, base_dir, [], used)
+        return content, used
+
+    def resolve_path(self, ref: str, base_dir: Path) -> Path:
+        """Resolve a template reference.
+
+        The reference is tried relative to ``base_dir`` and then each of its
+        parents, which covers both Azure's file-relative paths and GitHub's
+        repository-root-relative ``./.github/workflows/...`` paths.
+        """
+        relative = Path(ref.split('@', 1)[0])
+        if relative.is_absolute():
+            candidates = [relative]
+        else:
+            candidates = [d / relative for d in (base_dir, *base_dir.parents)]
+        for candidate in candidates:
+            if candidate.is_file():
+                return candidate.resolve()
+        raise TemplateError(f"Template not found: {ref} (from {base_dir})")
+
+    def _load(self, ref: str, base_dir: Path, stack: list[Path],
+              used: list[Path]) -> tuple[Path, dict]:
+        path = self.resolve_path(ref, base_dir)
+        if path in stack:
+            chain = ' -> '.join(p.name for p in [*stack, path])
+            raise TemplateError(f"Template cycle detected: {chain}")
+        if len(stack) >= self.max_depth:
+            raise TemplateError(
+                f"Template nesting exceeds {self.max_depth} levels at {path}")
+        if path not in used:
+            used.append(path)
+        content = self.cache.load(path)
+        if not isinstance(content, dict):
+            raise TemplateError(f"Template {path} is not a mapping")
+        return path, content
+
+    # GitHub Actions reusable workflows
+
+    def _expand_github(self, content: dict, base_dir: Path,
+                       stack: list[Path], used: list[Path]) -> dict:
+        jobs = content.get('jobs') or {}
+        expanded_jobs: dict = {}
+        replaced: dict[str, list[str]] = {}
+
+        for job_id, job_data in jobs.items():
+            uses = job_data.get('uses') if isinstance(job_data, dict) else None
+            if not (isinstance(uses, str) and uses.startswith('./')):
+                expanded_jobs[job_id] = job_data
+                continue
+
+            path, workflow = self._load(uses, base_dir, stack, used)
+            inputs = self._github_inputs(workflow, job_data.get('with') or {}, path)
+            workflow = substitute(workflow, 'inputs', inputs)
+            workflow = self._expand_github(workflow, path.parent, [*stack, path], used)
+
+            inner_jobs = workflow.get('jobs') or {}
+            replaced[job_id] = [f"{job_id}/{inner_id}" for inner_id in inner_jobs]
+            for inner_id, inner_data in inner_jobs.items():
+                expanded_jobs[f"{job_id}/{inner_id}"] = self._nest_github_job(
+                    job_id, job_data, inner_data)
+
+        if replaced:
+            for job_id, job_data in expanded_jobs.items():
+                if isinstance(job_data, dict) and 'needs' in job_data:
+                    needs = job_data['needs']
+                    needs = [needs] if isinstance(needs, str) else needs
+                    expanded_jobs[job_id] = {
+                        **job_data,
+                        'needs': [n for need in needs for n in replaced.get(need, [need])],
+                    }
+
+        return {**content, 'jobs': expanded_jobs}
+
+    def _github_inputs(self, workflow: dict, provided: dict, path: Path) -> dict:
+        # YAML 1.1 reads a bare `on:` key as the boolean True
+        triggers = workflow.get('on', workflow.get(True)) or {}
+        call = triggers.get('workflow_call') if isinstance(triggers, dict) else None
+        declared = (call or {}).get('inputs') or {}
+
+        inputs = {}
+        for name, spec in declared.items():
+            spec = spec or {}
+            if name in provided:
+                inputs[name] = provided[name]
+            elif 'default' in spec:
+                inputs[name] = spec['default']
+            elif spec.get('required'):
+                raise TemplateError(f"Missing required input '{name}' for {path}")
+        for name, value in provided.items():
+            inputs.setdefault(name, value)
+        return inputs
+
+    def _nest_github_job(self, caller_id: str, caller: dict, inner: dict) -> dict:
+        """Rename an inner job's needs and inherit the caller's needs and if."""
+        job = dict(inner)
+        needs = job.get('needs', [])
+        needs = [needs] if isinstance(needs, str) else list(needs)
+        if needs:
+            job['needs'] = [f"{caller_id}/{need}" for need in needs]
+        elif caller.get('needs'):
+            job['needs'] = caller['needs']
+        # All inner jobs, not just the roots: an always() job would run past a skipped caller
+        if caller.get('if'):
+            job['if'] = f"({caller['if']}) && ({job['if']})" if job.get('if') else caller['if']
+        return job
+
+    # Azure Pipelines templates
+
+    def _expand_azure(self, content: dict, base_dir: Path,
+                      stack: list[Path], used: list[Path]) -> dict:
+        content = dict(content)
+
+        extends = content.pop('extends', None)
+        if isinstance(extends, dict) and 'template' in extends:
+            path, body = self._instantiate_azure(extends, base_dir, stack, used)
+            body = self._expand_azure(body, path.parent, [*stack, path], used)
+            content.update(body)
+
+        for kind in ('stages', 'jobs', 'steps'):
+            if isinstance(content.get(kind), list):
+                content[kind] = self._expand_azure_list(content[kind], kind, base_dir, stack, used)
+        return content
+
+    def _expand_azure_list(self, items: list, kind: str, base_dir: Path,
+                           stack: list[Path], used: list[Path]) -> list:
+        expanded = []
+        for item in items:
+            if isinstance(item, list):
+                # A list parameter inserted as an item (stepList, jobList, ...)
+                # contributes its items, as in Azure Pipelines
+                expanded.extend(self._expand_azure_list(item, kind, base_dir, stack, used))
+            elif isinstance(item, dict) and 'template' in item:
+                path, body = self._instantiate_azure(item, base_dir, stack, used)
+                body = self._expand_azure(body, path.parent, [*stack, path], used)
+                expanded.extend(body.get(kind) or [])
+            elif isinstance(item, dict):
+                expanded.append(self._expand_azure(item, base_dir, stack, used))
+            else:
+                expanded.append(item)
+        return expanded
+
+    def _instantiate_azure(self, reference: dict, base_dir: Path,
+                           stack: list[Path], used: list[Path]) -> tuple[Path, dict]:
+        path, template = self._load(reference['template'], base_dir, stack, used)
+        provided = reference.get('parameters') or {}
+
+        declared = template.get('parameters') or []
+        if isinstance(declared, dict):  # legacy `name: default` form
+            declared = [{'name': k, 'default': v} for k, v in declared.items()]
+
+        parameters = {}
+        for spec in declared:
+            name = spec['name']
+            if name in provided:
+                parameters[name] = provided[name]
+            elif 'default' in spec:
+                parameters[name] = spec['default']
+            else:
+                raise TemplateError(f"Missing required parameter '{name}' for {path}")
+        for name, value in provided.items():
+            parameters.setdefault(name, value)
+
+        body = {k: v for k, v in template.items() if k != 'parameters'}
+        return path, substitute(body, 'parameters', parameters)
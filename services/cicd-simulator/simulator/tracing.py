@@ -0,0 +1,141 @@
+"""Chrome Trace Event Format timelines of pipeline runs.
+
+A Tracer records spans (pipeline, stage, job, step and the simulator's own
+overhead: parsing, template expansion, condition evaluation, environment
+construction, process spawn) with one track per thread, i.e. per worker
+slot. The written JSON opens in Perfetto (ui.perfetto.dev) or
+chrome://tracing.
+
+Tracing is off unless a Tracer is passed in: the default NULL_TRACER hands
+out one shared no-op span, so instrumented code pays only a method call.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullTracer:
+    """Tracer that records nothing."""
+
+    enabled = False
+
+    def span(self, name: str, category: str, args: Optional[dict] = None):
+        return _NULL_SPAN
+
+    def now(self) -> int:
+        return 0
+
+    def complete(self, name: str, category: str, start: int, end: int,
+                 track: str, args: Optional[dict] = None):
+        pass
+
+
+NULL_TRACER = NullTracer()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str, category: str, args: Optional[dict]):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        self.tracer._record(self.name, self.category, self.start, end,
+                            self.tracer._thread_track(), self.args)
+        return False
+
+
+class Tracer:
+    """Collects spans in memory and writes them as a Chrome trace."""
+
+    enabled = True
+
+    def __init__(self, process_name: str = "cicd-sim"):
+        self.process_name = process_name
+        self._origin = time.perf_counter_ns()
+        self._events: list[dict] = []
+        self._tracks: dict[object, tuple[int, str]] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def span(self, name: str, category: str, args: Optional[dict] = None) -> _Span:
+        """Context manager timing a span on the current thread's track."""
+        return _Span(self, name, category, args)
+
+    def now(self) -> int:
+        """Current timestamp, for spans recorded later with complete()."""
+        return time.perf_counter_ns()
+
+    def complete(self, name: str, category: str, start: int, end: int,
+                 track: str, args: Optional[dict] = None):
+        """Record a span measured elsewhere on a named, thread-less track."""
+        self._record(name, category, start, end, self._track(('track', track), track), args)
+
+    def _thread_track(self) -> int:
+        thread = threading.current_thread()
+        return self._track(thread.ident, thread.name)
+
+    def _track(self, key, label: str) -> int:
+        with self._lock:
+            track = self._tracks.get(key)
+            if track is None:
+                track = self._tracks[key] = (len(self._tracks) + 1, label)
+            return track[0]
+
+    def _record(self, name: str, category: str, start: int, end: int,
+                tid: int, args: Optional[dict]):
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': (start - self._origin) / 1000,
+            'dur': (end - start) / 1000,
+            'pid': self._pid,
+            'tid': tid,
+        }
+        if args:
+            event['args'] = args
+        with self._lock:
+            self._events.append(event)
+
+    @property
+    def events(self) -> list[dict]:
+        """Recorded spans plus the metadata naming the process and tracks."""
+        with self._lock:
+            metadata = [{'name': 'process_name', 'ph': 'M', 'pid': self._pid, 'tid': 0,
+                         'args': {'name': self.process_name}}]
+            for tid, label in self._tracks.values():
+                metadata.append({'name': 'thread_name', 'ph': 'M', 'pid': self._pid,
+                                 'tid': tid, 'args': {'name': label}})
+                metadata.append({'name': 'thread_sort_index', 'ph': 'M', 'pid': self._pid,
+                                 'tid': tid, 'args': {'sort_index': tid}})
+            return metadata + list(self._events)
+
+    def write(self, path: str):
+        """Write the trace as Chrome Trace Event Format JSON."""
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
@@ -0,0 +1,400 @@
+"""Watch mode: re-run only the jobs affected by file changes."""
+
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from .parser import Pipeline, PipelineParser, Job
+from .executor import StepExecutor, PipelineResult
+from .masking import SECRET_ENV_PREFIX
+
+# Directories whose contents never affect a job
+IGNORED_DIRS = {'.git', '__pycache__', '.pytest_cache', '.mypy_cache', 'node_modules', '.venv'}
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def _is_ignored(path: Path) -> bool:
+    """Whether a changed path is noise (VCS metadata, caches, editor swap files)."""
+    if any(part in IGNORED_DIRS for part in path.parts):
+        return True
+    name = path.name
+    return name.endswith('~') or fnmatch.fnmatch(name, '.*.sw?') or name == '4913'
+
+
+class InotifySource:
+    """Reports changed paths under a set of directory trees using inotify."""
+
+    name = 'inotify'
+    _MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM |
+             IN_MOVED_TO | IN_CREATE | IN_DELETE)
+
+    def __init__(self, roots: Iterable[str]):
+        libc_name = ctypes.util.find_library('c')
+        if libc_name is None:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._dirs: dict[int, Path] = {}
+        for root in roots:
+            self._add_tree(Path(root))
+
+    def add_root(self, root: str):
+        """Start watching another directory tree."""
+        self._add_tree(Path(root))
+
+    def _add_tree(self, root: Path):
+        for dirpath, dirnames, _ in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS]
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dirpath), self._MASK)
+            if wd >= 0:  # the directory may have vanished since os.walk listed it
+                self._dirs[wd] = Path(dirpath)
+
+    def poll(self, timeout: float) -> set[Path]:
+        """Wait up to ``timeout`` seconds and return the paths that changed."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        changed: set[Path] = set()
+        if not ready:
+            return changed
+
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+
+                if mask & IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    continue
+                base = self._dirs.get(wd)
+                if base is None:
+                    continue
+                path = base / os.fsdecode(name) if name else base
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add_tree(path)
+                changed.add(path)
+
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingSource:
+    """Reports changed paths by comparing periodic mtime/size snapshots."""
+
+    name = 'polling'
+
+    def __init__(self, roots: Iterable[str], interval: float = 0.5):
+        self._roots = [Path(root) for root in roots]
+        self.interval = interval
+        self._snapshot = self._scan(self._roots)
+
+    def add_root(self, root: str):
+        """Start watching another directory tree."""
+        self._roots.append(Path(root))
+        self._snapshot.update(self._scan([Path(root)]))
+
+    def _scan(self, roots: list[Path]) -> dict[Path, tuple[int, int]]:
+        snapshot = {}
+        for root in roots:
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS]
+                for filename in filenames:
+                    path = Path(dirpath) / filename
+                    try:
+                        stat = path.stat()
+                    except OSError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self, timeout: float) -> set[Path]:
+        """Wait up to ``timeout`` seconds and return the paths that changed."""
+        time.sleep(min(self.interval, timeout))
+        previous, self._snapshot = self._snapshot, self._scan(self._roots)
+        return {path for path in previous.keys() | self._snapshot.keys()
+                if previous.get(path) != self._snapshot.get(path)}
+
+    def close(self):
+        pass
+
+
+def open_source(roots: Iterable[str], polling: bool = False):
+    """Open an inotify source, falling back to polling where it is unavailable."""
+    roots = list(roots)
+    if not polling:
+        try:
+            return InotifySource(roots)
+        except (OSError, AttributeError):
+            pass  # not Linux, or out of inotify instances
+    return PollingSource(roots)
+
+
+def wait_for_changes(source, debounce: float,
+                     stop: Optional[threading.Event] = None) -> set[Path]:
+    """Block until files change, then until they stay quiet for ``debounce`` seconds.
+
+    Returns an empty set if ``stop`` is set while waiting.
+    """
+    changed: set[Path] = set()
+    while not changed:
+        if stop is not None and stop.is_set():
+            return changed
+        changed = {p for p in source.poll(0.5) if not _is_ignored(p)}
+
+    quiet_until = time.monotonic() + debounce
+    while (remaining := quiet_until - time.monotonic()) > 0:
+        more = {p for p in source.poll(remaining) if not _is_ignored(p)}
+        if more:
+            changed |= more
+            quiet_until = time.monotonic() + debounce
+    return changed
+
+
+def _all_jobs(pipeline: Pipeline) -> list[Job]:
+    if pipeline.stages:
+        return [job for stage in pipeline.stages for job in stage.jobs]
+    return list(pipeline.jobs)
+
+
+def changed_jobs(old: Optional[Pipeline], new: Pipeline) -> set[str]:
+    """Names of jobs in ``new`` whose definition differs from ``old``."""
+    jobs = _all_jobs(new)
+    if old is None or old.env != new.env:
+        return {job.name for job in jobs}
+    previous = {job.name: job for job in _all_jobs(old)}
+    return {job.name for job in jobs if previous.get(job.name) != job}
+
+
+def jobs_for_paths(pipeline: Pipeline, paths: Iterable[Path], working_dir: str) -> set[str]:
+    """Names of jobs whose declared input paths match any of ``paths``.
+
+    Jobs that declare no ``paths`` are assumed to read the whole working dir.
+    Patterns use fnmatch rules, so ``src/*`` also matches nested files.
+    """
+    root = Path(working_dir).resolve()
+    relative = []
+    for path in paths:
+        try:
+            relative.append(Path(path).resolve().relative_to(root).as_posix())
+        except ValueError:
+            continue  # outside the working dir
+    if not relative:
+        return set()
+
+    affected = set()
+    for job in _all_jobs(pipeline):
+        if not job.paths:
+            affected.add(job.name)
+        elif any(fnmatch.fnmatch(rel, pattern) for rel in relative for pattern in job.paths):
+            affected.add(job.name)
+    return affected
+
+
+def with_downstream(pipeline: Pipeline, names: Iterable[str]) -> set[str]:
+    """Expand a set of job names with every job that transitively needs them."""
+    dependents: dict[str, list[str]] = {}
+    for job in _all_jobs(pipeline):
+        for need in job.needs:
+            dependents.setdefault(need, []).append(job.name)
+
+    result = set(names)
+    pending = list(result)
+    while pending:
+        for dependent in dependents.get(pending.pop(), []):
+            if dependent not in result:
+                result.add(dependent)
+                pending.append(dependent)
+    return result
+
+
+class _Run:
+    """A pipeline run executing in a background thread."""
+
+    def __init__(self, executor: StepExecutor, pipeline: Pipeline, jobs: set[str],
+                 on_result: Callable[[PipelineResult], None]):
+        self.executor = executor
+        self.jobs = jobs
+        self.result: Optional[PipelineResult] = None
+        self.finished_at: Optional[float] = None  # time.monotonic() once done
+        self._on_result = on_result
+        self._thread = threading.Thread(target=self._execute, args=(pipeline,), daemon=True)
+        self._thread.start()
+
+    def _execute(self, pipeline: Pipeline):
+        try:
+            self.result = self.executor.execute_pipeline(pipeline, jobs=self.jobs)
+        finally:
+            self.finished_at = time.monotonic()
+        if not self.executor.cancelled:
+            self._on_result(self.result)
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def cancel(self) -> set[str]:
+        """Cancel the run and return the jobs it did not complete."""
+        self.executor.cancel()
+        self._thread.join()
+        passed = {jr.job_name for jr in self.result.job_results if jr.success}
+        return self.jobs - passed
+
+    def join(self, timeout: Optional[float] = None):
+        self._thread.join(timeout)
+
+
+class PipelineWatcher:
+    """Re-runs the jobs of a pipeline affected by changes to it or its inputs.
+
+    A change seen while a run is in flight, or within ``settle`` seconds of
+    it finishing, supersedes that run like any other. But jobs without
+    ``paths`` read the whole working dir, so the files a run writes itself
+    (build output, test reports) would re-trigger it forever. A path that
+    changes again during the very run it triggered is therefore learned as
+    a run output, and ignored while runs are in flight from then on; an
+    edit to it while no run is in flight makes it an input again.
+    """
+
+    def __init__(self, filepath: str, pipeline_type: str = "github",
+                 working_dir: str = None, debounce: float = 0.3, polling: bool = False,
+                 settle: float = 1.0,
+                 on_start: Callable[[set[str]], None] = None,
+                 on_result: Callable[[PipelineResult], None] = None,
+                 on_error: Callable[[Exception], None] = None,
+                 secrets: Optional[dict[str, str]] = None,
+                 secrets_prefix: Optional[str] = SECRET_ENV_PREFIX):
+        self.filepath = Path(filepath).resolve()
+        self.pipeline_type = pipeline_type
+        self.working_dir = working_dir or os.getcwd()
+        self.debounce = debounce
+        self.settle = settle
+        self.secrets = secrets
+        self.secrets_prefix = secrets_prefix
+        self.parser = PipelineParser()
+        self._on_start = on_start or (lambda jobs: None)
+        self._on_result = on_result or (lambda result: None)
+        self._on_error = on_error or (lambda error: None)
+
+        self._roots = [Path(self.working_dir).resolve()]
+        if not self._is_watched(self.filepath):
+            self._roots.append(self.filepath.parent)
+        self.source = open_source([str(root) for root in self._roots], polling=polling)
+
+        self.pipeline: Optional[Pipeline] = None
+        self._run: Optional[_Run] = None
+        self.outputs: set[Path] = set()  # paths learned to be written by runs
+        self._triggers: set[Path] = set()  # in-flight changes that started the current run
+
+    def _is_watched(self, path: Path) -> bool:
+        return any(path.is_relative_to(root) for root in self._roots)
+
+    def _watch_templates(self, pipeline: Pipeline):
+        """Also watch template directories outside the watched trees."""
+        for template in map(Path, pipeline.template_files):
+            if not self._is_watched(template):
+                self._roots.append(template.parent)
+                self.source.add_root(str(template.parent))
+
+    def _start(self, pipeline: Pipeline, jobs: set[str]):
+        self._on_start(jobs)
+        executor = StepExecutor(working_dir=self.working_dir, secrets=self.secrets,
+                                secrets_prefix=self.secrets_prefix)
+        self._run = _Run(executor, pipeline, jobs, self._on_result)
+
+    def _run_in_flight(self) -> bool:
+        """Whether a run is in flight or finished less than ``settle`` seconds ago."""
+        run = self._run
+        if run is None:
+            return False
+        finished = run.finished_at
+        return finished is None or time.monotonic() - finished < self.settle
+
+    def _definitions(self, pipeline: Pipeline) -> set[Path]:
+        return {self.filepath, *map(Path, pipeline.template_files)}
+
+    def _filter_outputs(self, paths: set[Path]) -> set[Path]:
+        """Drop the run's own output from a batch of changes (see the class docstring)."""
+        if not self._run_in_flight():
+            self.outputs -= paths
+            self._triggers = set()
+            return paths
+        definitions = self._definitions(self.pipeline) if self.pipeline else set()
+        self.outputs |= {p for p in paths & self._triggers if p.resolve() not in definitions}
+        paths = paths - self.outputs
+        self._triggers = paths
+        return paths
+
+    def affected_jobs(self, old: Optional[Pipeline], new: Pipeline, paths: set[Path]) -> set[str]:
+        """Jobs to re-run for a batch of changed paths, including downstream jobs."""
+        # Edits to the pipeline or its templates show up as definition changes
+        definitions = self._definitions(new)
+        if old is not None:
+            definitions |= self._definitions(old)
+        inputs = {p for p in paths if p.resolve() not in definitions}
+        affected = changed_jobs(old, new) | jobs_for_paths(new, inputs, self.working_dir)
+        return with_downstream(new, affected)
+
+    def run(self, stop: Optional[threading.Event] = None):
+        """Run every job once, then re-run affected jobs until ``stop`` is set."""
+        stop = stop or threading.Event()
+        self.pipeline = self.parser.parse_file(str(self.filepath), self.pipeline_type)
+        self._watch_templates(self.pipeline)
+        self._start(self.pipeline, {job.name for job in _all_jobs(self.pipeline)})
+
+        try:
+            while not stop.is_set():
+                paths = self._filter_outputs(wait_for_changes(self.source, self.debounce, stop))
+                if not paths:
+                    continue
+
+                try:
+                    pipeline = self.parser.parse_file(str(self.filepath), self.pipeline_type)
+                except Exception as e:
+                    self._on_error(e)  # keep the last good pipeline until the file is fixed
+                    continue
+
+                self._watch_templates(pipeline)
+                jobs = self.affected_jobs(self.pipeline, pipeline, paths)
+                self.pipeline = pipeline
+                if not jobs:
+                    continue
+
+                if self._run is not None and self._run.running:
+                    jobs |= self._run.cancel()
+                known = {job.name for job in _all_jobs(pipeline)}
+                self._start(pipeline, jobs & known)
+        finally:
+            if self._run is not None and self._run.running:
+                self._run.cancel()
+            self.source.close()
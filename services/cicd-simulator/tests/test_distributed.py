@@ -0,0 +1,172 @@
+"""
+Property Test: Distributed Coordinator and Workers
+
+Property: A pipeline run through a coordinator and workers on localhost
+SHALL produce the same job results as a local run, spread jobs across
+workers with free capacity, stream step events back to the coordinator,
+and retry jobs whose worker disconnects.
+"""
+
+import threading
+
+import pytest
+import yaml
+
+from simulator.parser import PipelineParser
+from simulator.executor import StepExecutor, Status
+from simulator.events import EventKind
+from simulator.distributed import Coordinator, Worker, is_local_address, parse_address
+
+
+WORKFLOW = """
+name: Distributed
+jobs:
+  a:
+    steps: [{name: a, run: sleep 0.3; echo a}]
+  b:
+    steps: [{name: b, run: sleep 0.3; echo b}]
+  c:
+    needs: [a, b]
+    steps:
+      - {name: c, run: echo "c on $ROLE"}
+  d:
+    needs: c
+    if: failure()
+    steps: [{name: d, run: echo d}]
+"""
+
+
+def _pipeline():
+    return PipelineParser().parse(yaml.safe_load(WORKFLOW), 'github')
+
+
+def _start_worker(address, **kwargs):
+    worker = Worker(address, **kwargs)
+    thread = threading.Thread(target=worker.serve, kwargs={'connect_timeout': 10}, daemon=True)
+    thread.start()
+    return thread
+
+
+class _CrashingWorker(Worker):
+    """Drops its connection as soon as it is sent a job."""
+
+    def _run_job(self, connection, message):
+        connection.close()
+
+
+def test_parse_address():
+    assert parse_address('unix:/tmp/sim.sock')[1] == '/tmp/sim.sock'
+    assert parse_address('tcp://127.0.0.1:7700')[1] == ('127.0.0.1', 7700)
+    assert parse_address(':7700')[1] == ('0.0.0.0', 7700)
+    with pytest.raises(ValueError):
+        parse_address('localhost')
+    assert is_local_address(*parse_address('127.0.0.1:7700'))
+    assert is_local_address(*parse_address('unix:/tmp/sim.sock'))
+    assert not is_local_address(*parse_address(':7700'))
+
+
+def test_workers_must_present_the_token():
+    with pytest.raises(ValueError):
+        Coordinator('tcp://0.0.0.0:0')
+
+    coordinator = Coordinator('tcp://127.0.0.1:0', token='s3cret')
+    impostor = Worker(coordinator.address, slots=1, name='impostor', token='guess')
+    try:
+        with pytest.raises(PermissionError):
+            impostor.serve(connect_timeout=10)
+        assert coordinator.workers == []
+
+        _start_worker(coordinator.address, slots=1, name='trusted', token='s3cret')
+        assert coordinator.wait_for_workers(1, timeout=10)
+        result = coordinator.execute_pipeline(_pipeline(), job_filter='a')
+    finally:
+        coordinator.close()
+    assert result.success
+    assert coordinator.assignments['a'] == ['trusted']
+
+
+@pytest.mark.parametrize("scheme", ["tcp", "unix"])
+def test_jobs_run_on_workers(tmp_path, scheme, monkeypatch):
+    monkeypatch.setenv('ROLE', 'worker')
+    listen = 'tcp://127.0.0.1:0' if scheme == 'tcp' else f"unix:{tmp_path / 'sim.sock'}"
+    coordinator = Coordinator(listen)
+    threads = [_start_worker(coordinator.address, slots=1, name=f"w{i}") for i in range(2)]
+    try:
+        assert coordinator.wait_for_workers(2, timeout=10)
+        events = []
+        coordinator.add_listener(events.append)
+        result = coordinator.execute_pipeline(_pipeline())
+    finally:
+        coordinator.close()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    local = StepExecutor().execute_pipeline(_pipeline())
+    assert [(jr.job_name, jr.status) for jr in result.job_results] == \
+        [(jr.job_name, jr.status) for jr in local.job_results]
+    assert result.job_results[2].step_results[0].output.strip() == "c on worker"
+    # a and b were ready together and each worker had one slot
+    assert {coordinator.assignments['a'][0], coordinator.assignments['b'][0]} == {'w0', 'w1'}
+    finished = [e.step for e in events if e.kind is EventKind.STEP_FINISHED]
+    assert sorted(finished) == ['a', 'b', 'c']
+
+
+def test_jobs_are_retried_when_a_worker_is_lost():
+    coordinator = Coordinator('tcp://127.0.0.1:0', max_retries=2)
+    crashing = _CrashingWorker(coordinator.address, slots=4, name='crashy')
+    crash_thread = threading.Thread(target=crashing.serve, daemon=True)
+    crash_thread.start()
+    try:
+        assert coordinator.wait_for_workers(1, timeout=10)
+        _start_worker(coordinator.address, slots=1, name='steady')
+        assert coordinator.wait_for_workers(2, timeout=10)
+        result = coordinator.execute_pipeline(_pipeline())
+    finally:
+        coordinator.close()
+
+    assert result.success
+    assert [jr.status for jr in result.job_results[:3]] == [Status.PASSED] * 3
+    retried = [name for name, workers in coordinator.assignments.items() if 'crashy' in workers]
+    assert retried, "the crashing worker had most free slots and should have been tried"
+    assert all(coordinator.assignments[name][-1] == 'steady' for name in retried)
+
+
+def test_job_fails_when_no_workers_remain():
+    coordinator = Coordinator('tcp://127.0.0.1:0', max_retries=1, worker_timeout=0.5)
+    threading.Thread(target=_CrashingWorker(coordinator.address, slots=1).serve,
+                     daemon=True).start()
+    try:
+        assert coordinator.wait_for_workers(1, timeout=10)
+        result = coordinator.execute_pipeline(_pipeline(), job_filter='a')
+    finally:
+        coordinator.close()
+
+    assert not result.success
+    assert "abandoned" in result.job_results[0].step_results[0].error
+
+
+def test_worker_errors_fail_the_job(monkeypatch):
+    def explode(self, step, parent_env, job_name=None):
+        raise RuntimeError(f"boom {self.secrets['TOKEN']}")
+    monkeypatch.setattr(StepExecutor, 'execute_step', explode)
+
+    pipeline = PipelineParser().parse(yaml.safe_load("""
+jobs:
+  a:
+    steps: [{name: a, run: 'echo ${{ secrets.TOKEN }}'}]
+"""), 'github')
+    coordinator = Coordinator('tcp://127.0.0.1:0', secrets={'TOKEN': 'hunter2'})
+    _start_worker(coordinator.address, slots=1)
+    try:
+        assert coordinator.wait_for_workers(1, timeout=10)
+        events = []
+        coordinator.add_listener(events.append)
+        result = coordinator.execute_pipeline(pipeline)
+    finally:
+        coordinator.close()
+
+    [job] = result.job_results
+    assert job.status is Status.FAILED
+    error = job.step_results[0].error
+    assert "boom ***" in error and "hunter2" not in error
+    assert [e.job for e in events if e.kind is EventKind.JOB_FINISHED] == ['a']
@@ -0,0 +1,137 @@
+"""
+Property Test: Log Archive
+
+Property: The archive of a run SHALL reproduce every step's full output,
+keep each step's output in its own compressed blocks with correct line
+numbers, and read only the blocks of the steps that are asked for.
+"""
+
+import re
+
+from hypothesis import given, strategies as st, settings
+
+from simulator.parser import Pipeline, Job, Step
+from simulator.executor import PipelineResult, StepExecutor, StepResult, Status
+from simulator.events import Event, EventKind
+from simulator.logarchive import LogArchive, LogArchiveWriter
+
+
+def _pipeline():
+    return Pipeline(name="logs demo", pipeline_type="github", jobs=[
+        Job(name="build", steps=[
+            Step(name="numbers", run='seq 1 2000'),
+            Step(name="token", run='echo "tok=${{ secrets.SECRET }}"'),
+        ]),
+        Job(name="lint", steps=[
+            Step(name="check", run='echo lint ok; echo warning >&2'),
+            Step(name="action", uses="actions/checkout@v4"),
+        ]),
+    ])
+
+
+def _archived_run(tmp_path, block_size=512):
+    writer = LogArchiveWriter(str(tmp_path), block_size=block_size)
+    executor = StepExecutor(working_dir=str(tmp_path), secrets={'SECRET': 's3cr3t-value'})
+    executor.add_listener(writer)
+    executor.execute_pipeline(_pipeline())
+    return writer, LogArchive(str(tmp_path))
+
+
+def test_archive_reproduces_step_output(tmp_path):
+    writer, archive = _archived_run(tmp_path)
+    assert archive.resolve('latest') == [writer.run_id]
+
+    log = archive.open(writer.run_id)
+    [numbers] = log.select(step='numbers')
+    assert log.read(numbers) == ''.join(f"{i}\n" for i in range(1, 2001))
+    assert numbers['lines'] == 2000 and len(numbers['blocks']) > 10
+    assert numbers['status'] == 'passed' and numbers['duration'] >= 0
+
+    [check] = log.select(job='lint', step='check')
+    assert sorted(log.read(check).splitlines()) == ['lint ok', 'warning']
+    [action] = log.select(step='action')
+    assert 'actions/checkout@v4' in log.read(action)
+    # output is archived after masking
+    [token] = log.select(step='tok*')
+    assert log.read(token) == "tok=***\n"
+
+
+def test_only_the_selected_steps_blocks_are_read(tmp_path):
+    writer, archive = _archived_run(tmp_path)
+    log = archive.open(writer.run_id)
+    [check] = log.select(job='lint', step='check')
+    log.read(check)
+    assert log.blocks_read == len(check['blocks']) == 1
+
+
+def test_grep_reports_line_numbers(tmp_path):
+    writer, archive = _archived_run(tmp_path)
+    log = archive.open(writer.run_id)
+    matches = list(log.grep(re.compile(r'^19\d\d$'), job='build'))
+    assert [(m.step, m.line, m.text) for m in matches] == \
+        [('numbers', n, str(n)) for n in range(1900, 2000)]
+
+
+@given(chunks=st.lists(st.text(alphabet='ab\n', max_size=40), max_size=20),
+       block_size=st.integers(min_value=1, max_value=32))
+@settings(max_examples=100, deadline=None)
+def test_blocks_preserve_lines(tmp_path_factory, chunks, block_size):
+    tmp_path = tmp_path_factory.mktemp('logs')
+    writer = LogArchiveWriter(str(tmp_path), block_size=block_size)
+    writer(Event(EventKind.PIPELINE_STARTED, "p"))
+    writer(Event(EventKind.STEP_STARTED, "p", "job", "step"))
+    for chunk in chunks:
+        writer(Event(EventKind.STEP_OUTPUT, "p", "job", "step", output=chunk, stream="stdout"))
+    writer(Event(EventKind.STEP_FINISHED, "p", "job", "step", StepResult("step", Status.PASSED)))
+    writer(Event(EventKind.PIPELINE_FINISHED, "p", result=PipelineResult("p", True)))
+
+    text = ''.join(chunks)
+    log = LogArchive(str(tmp_path)).open(writer.run_id)
+    [entry] = log.steps
+    assert log.read(entry) == text
+    assert [line for _, line in log.lines(entry)] == text.splitlines()
+    assert [number for number, _ in log.lines(entry)] == list(range(1, entry['lines'] + 1))
+    assert entry['lines'] == len(text.splitlines())
+
+
+def test_runs_resolve_by_prefix(tmp_path):
+    first, archive = _archived_run(tmp_path)
+    second, _ = _archived_run(tmp_path)
+    assert archive.runs() == [first.run_id, second.run_id]
+    assert archive.resolve('all') == [first.run_id, second.run_id]
+    assert archive.resolve(second.run_id) == [second.run_id]
+    assert archive.resolve('nope') == []
+
+
+def test_shard_output_is_archived_as_whole_tagged_lines(tmp_path):
+    writer = LogArchiveWriter(str(tmp_path), block_size=64)
+    executor = StepExecutor(working_dir=str(tmp_path))
+    executor.add_listener(writer)
+    # Each shard writes its lines in pieces, interleaved with the other shards
+    command = ('for i in 1 2 3 4 5; do printf "s$SHARD_INDEX"; sleep 0.01; '
+               'printf " line $i\\n"; done; printf "s$SHARD_INDEX end"')
+    executor.execute_pipeline(Pipeline(name="shards", pipeline_type="github", jobs=[
+        Job(name="test", steps=[Step(name="tests", uses="cicd-sim/shard-tests", with_args={
+            'total': 3, 'list-command': 'printf "a\\nb\\nc\\n"', 'command': command})]),
+    ]))
+
+    log = LogArchive(str(tmp_path)).open(writer.run_id)
+    [entry] = log.select(step='tests')
+    lines = [text for _, text in log.lines(entry)]
+    for n in range(3):
+        tag = f"[shard {n + 1}/3] "
+        assert [line for line in lines if line.startswith(tag)] == \
+            [f"{tag}s{n} line {i}" for i in range(1, 6)] + [f"{tag}s{n} end"]
+    assert lines[:3] == ['a', 'b', 'c']  # the test listing
+    assert entry['lines'] == len(lines) == 21
+
+
+def test_prune_keeps_the_newest_runs(tmp_path):
+    runs = [_archived_run(tmp_path)[0].run_id for _ in range(3)]
+    archive = LogArchive(str(tmp_path))
+    assert archive.prune(0) == []
+    assert archive.prune(2) == runs[:1]
+    assert archive.runs() == runs[1:]
+    assert not (tmp_path / runs[0]).exists()
+    assert archive.prune(1, protect=runs[1:2]) == []
+    assert archive.runs() == runs[1:]
@@ -10,7 +10,11 @@ the expected output of running those commands directly.
 
 import subprocess
 import tempfile
+import threading
+import time
 import os
+import signal
+import pytest
 from hypothesis import given, strategies as st, settings, assume
 from simulator.parser import PipelineParser, Pipeline, Job, Step
 from simulator.executor import StepExecutor
@@ -229,3 +233,23 @@ def test_job_stops_on_first_failure():
     # Property: First step succeeded, second failed
     assert job_result.step_results[0].success, "First step should have succeeded"
     assert not job_result.step_results[1].success, "Second step should have failed"
+
+
+def test_interrupt_kills_running_steps(tmp_path):
+    """
+    Property: Ctrl+C during a run SHALL kill the step commands instead of
+    waiting for them, even though they run in their own process group.
+    """
+    marker = tmp_path / "finished"
+    pipeline = Pipeline(name="slow", pipeline_type="github", jobs=[
+        Job(name="job", steps=[Step(name="sleep", run=f"sleep 3 && touch {marker}")]),
+    ])
+    timer = threading.Timer(0.5, os.kill, (os.getpid(), signal.SIGINT))
+    timer.start()
+
+    start = time.monotonic()
+    with pytest.raises(KeyboardInterrupt):
+        StepExecutor(working_dir=str(tmp_path)).execute_pipeline(pipeline)
+    assert time.monotonic() - start < 2.5
+    time.sleep(3)
+    assert not marker.exists()
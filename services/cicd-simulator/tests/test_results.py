@@ -0,0 +1,100 @@
+"""
+Property Test: Compact Results and Streaming Rendering
+
+Property: Result records SHALL carry no per-instance __dict__, and every
+finished step SHALL be reported through an executor event as soon as it
+completes, before the pipeline result is returned.
+"""
+
+import io
+
+from rich.console import Console
+
+from simulator.parser import Pipeline, Job, Step
+from simulator.executor import StepExecutor, StepResult, JobResult, Status
+from simulator.events import EventKind
+from simulator.display import LiveDisplay
+
+
+def _pipeline():
+    return Pipeline(name="events", pipeline_type="github", jobs=[
+        Job(name="build", steps=[
+            Step(name="compile", run='echo "compiled"'),
+            Step(name="package", run='exit 3'),
+            Step(name="never", run='echo "unreachable"'),
+        ]),
+        Job(name="lint", condition="env.LINT == 'yes'", steps=[
+            Step(name="lint", run='echo lint'),
+        ]),
+    ])
+
+
+def test_results_are_slotted_and_interned():
+    a = StepResult(step_name="".join(["st", "ep"]), status=Status.PASSED)
+    b = StepResult(step_name="".join(["s", "tep"]), status=Status.PASSED)
+    assert not hasattr(a, '__dict__')
+    assert not hasattr(JobResult(job_name="job"), '__dict__')
+    assert a.step_name is b.step_name
+
+
+def test_status_properties():
+    assert StepResult("s", Status.SKIPPED).success
+    assert StepResult("s", Status.SKIPPED).skipped
+    assert not StepResult("s", Status.FAILED).success
+    assert not StepResult("s", Status.CANCELLED).success
+
+
+def test_events_stream_in_execution_order():
+    events = []
+    executor = StepExecutor(max_parallel=1)
+    executor.add_listener(events.append)
+    result = executor.execute_pipeline(_pipeline())
+
+    kinds = [(e.kind, e.job, e.step) for e in events if e.kind is not EventKind.STEP_OUTPUT]
+    assert kinds == [
+        (EventKind.PIPELINE_STARTED, None, None),
+        (EventKind.JOB_STARTED, "build", None),
+        (EventKind.STEP_STARTED, "build", "compile"),
+        (EventKind.STEP_FINISHED, "build", "compile"),
+        (EventKind.STEP_STARTED, "build", "package"),
+        (EventKind.STEP_FINISHED, "build", "package"),
+        (EventKind.JOB_FINISHED, "build", None),
+        (EventKind.JOB_FINISHED, "lint", None),
+        (EventKind.PIPELINE_FINISHED, None, None),
+    ]
+    assert events[-1].result is result
+    assert [jr.status for jr in result.job_results] == [Status.FAILED, Status.SKIPPED]
+
+    # command output streams between a step's start and finish
+    output = [e for e in events if e.kind is EventKind.STEP_OUTPUT]
+    assert [(e.job, e.step, e.stream, e.output) for e in output] == \
+        [("build", "compile", "stdout", "compiled\n")]
+    position = events.index(output[0])
+    assert events[position - 1].kind is EventKind.STEP_STARTED
+    assert events[position + 1].kind is EventKind.STEP_FINISHED
+
+
+def test_output_limit_bounds_retained_output():
+    executor = StepExecutor(output_limit=10)
+    result = executor.execute_step(
+        Step(name="noisy", run='printf "%0500d" 0; printf "%0500d" 1 >&2'), {})
+    assert result.output == "0" * 10
+    assert result.error.endswith("1")
+    assert len(result.error) == 10
+
+
+def test_live_display_prints_each_step():
+    buffer = io.StringIO()
+    console = Console(file=buffer, width=120, force_terminal=False)
+    executor = StepExecutor()
+    with LiveDisplay(console) as display:
+        executor.add_listener(display)
+        executor.execute_pipeline(_pipeline())
+
+    output = buffer.getvalue()
+    assert "build › compile" in output
+    assert "compiled" in output
+    assert "FAIL" in output
+    assert "never" not in output
+    assert display.counts[Status.PASSED] == 1
+    assert display.counts[Status.FAILED] == 1
@@ -0,0 +1,120 @@
+"""
+Property Test: Running Many Pipelines
+
+Property: run-many SHALL run every pipeline concurrently without ever
+exceeding the shared slot budget, hand freed slots to waiting pipelines in
+round-robin order, detect each file's pipeline type, and report a
+per-pipeline exit code.
+"""
+
+import threading
+import time
+
+import pytest
+
+from simulator.multirun import expand_pipeline_paths, run_many
+from simulator.parser import detect_pipeline_type
+from simulator.scheduler import FairSlotPool
+
+
+GITHUB = """
+name: {name}
+on: push
+jobs:
+  one:
+    steps: [{{name: work, run: "{command}"}}]
+  two:
+    steps: [{{name: work, run: "{command}"}}]
+"""
+
+AZURE = """
+name: {name}
+trigger: [main]
+steps:
+  - script: "{command}"
+    displayName: work
+"""
+
+# Fails if another step command is inside the critical section at the same time
+EXCLUSIVE = "mkdir busy.lock || exit 9; sleep 0.05; rmdir busy.lock"
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_freed_slots_rotate_between_clients():
+    pool = FairSlotPool(1)
+    pool.acquire('holder')
+    granted = []
+
+    def take(client):
+        pool.acquire(client)
+        granted.append(client)
+        pool.release()
+
+    # 'a' queues three acquires before 'b' queues one
+    threads = []
+    for client in ['a', 'a', 'a', 'b']:
+        threads.append(threading.Thread(target=take, args=(client,)))
+        threads[-1].start()
+        _wait_until(lambda: pool.waiting == len(threads))
+
+    pool.release()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert granted == ['a', 'b', 'a', 'a']
+    assert pool.in_use == 0
+
+
+def test_slot_budget_is_shared_across_pipelines(tmp_path):
+    paths = []
+    for i in range(3):
+        template = GITHUB if i % 2 == 0 else AZURE
+        path = tmp_path / f"p{i}.yml"
+        path.write_text(template.format(name=f"P{i}", command=EXCLUSIVE))
+        paths.append(str(path))
+
+    runs = run_many(paths, slots=1, working_dir=str(tmp_path))
+
+    assert [run.pipeline_type for run in runs] == ['github', 'azure', 'github']
+    assert [run.exit_code for run in runs] == [0, 0, 0], [run.result for run in runs]
+
+
+def test_pipelines_run_concurrently(tmp_path):
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"p{i}.yml"
+        path.write_text(AZURE.format(name=f"P{i}", command="sleep 0.5"))
+        paths.append(str(path))
+
+    start = time.monotonic()
+    runs = run_many(paths, slots=4, working_dir=str(tmp_path))
+    assert all(run.exit_code == 0 for run in runs)
+    assert time.monotonic() - start < 1.5
+
+
+def test_exit_codes_per_pipeline(tmp_path):
+    (tmp_path / 'ok.yml').write_text(AZURE.format(name="Ok", command="true"))
+    (tmp_path / 'fail.yml').write_text(AZURE.format(name="Fail", command="exit 3"))
+    (tmp_path / 'broken.yaml').write_text("just a string")
+    finished = []
+
+    paths = expand_pipeline_paths([str(tmp_path), str(tmp_path / 'missing.yml')])
+    runs = run_many(paths, slots=2, working_dir=str(tmp_path), on_finish=finished.append)
+
+    codes = {run.path.rsplit('/', 1)[-1]: run.exit_code for run in runs}
+    assert codes == {'ok.yml': 0, 'fail.yml': 1, 'broken.yaml': 2, 'missing.yml': 2}
+    assert len(finished) == 4
+
+
+def test_detect_pipeline_type():
+    assert detect_pipeline_type({True: 'push', 'jobs': {}}) == 'github'
+    assert detect_pipeline_type({'jobs': {'build': {}}}) == 'github'
+    assert detect_pipeline_type({'stages': []}) == 'azure'
+    assert detect_pipeline_type({'jobs': [{'job': 'a'}]}) == 'azure'
+    with pytest.raises(ValueError):
+        detect_pipeline_type({'name': 'neither'})
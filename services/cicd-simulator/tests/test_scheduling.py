@@ -0,0 +1,156 @@
+"""
+Property Test: Stage and Job Dependency Scheduling
+
+Property: Stages and jobs SHALL start as soon as their dependencies have
+finished, independent stages SHALL run concurrently, and stage and job
+conditions SHALL be evaluated against the real status of their upstream.
+"""
+
+import time
+
+import pytest
+import yaml
+
+from simulator.parser import PipelineParser
+from simulator.executor import StepExecutor, Status
+from simulator.scheduler import JobGraph
+from simulator import conditions
+
+
+def _azure(text):
+    return PipelineParser().parse(yaml.safe_load(text), 'azure')
+
+
+def _statuses(result):
+    return {jr.job_name: jr.status for jr in result.job_results}
+
+
+def test_parallel_stages_finish_in_critical_path_time():
+    pipeline = _azure("""
+stages:
+  - stage: A
+    jobs:
+      - job: a1
+        steps: [{script: sleep 0.6}]
+      - job: a2
+        steps: [{script: sleep 0.6}]
+  - stage: B
+    dependsOn: []
+    jobs:
+      - job: b1
+        steps: [{script: sleep 0.6}]
+  - stage: C
+    dependsOn: [A, B]
+    jobs:
+      - job: c1
+        steps: [{script: echo done}]
+""")
+    started = time.monotonic()
+    result = StepExecutor(max_parallel=4).execute_pipeline(pipeline)
+    elapsed = time.monotonic() - started
+
+    assert result.success
+    assert [jr.job_name for jr in result.job_results] == ['a1', 'a2', 'b1', 'c1']
+    assert elapsed < 1.5, f"stages ran serially ({elapsed:.2f}s)"
+
+
+def test_stage_conditions_see_upstream_status():
+    pipeline = _azure("""
+stages:
+  - stage: Build
+    jobs:
+      - job: compile
+        steps: [{script: exit 1}]
+  - stage: Deploy
+    jobs:
+      - job: deploy
+        steps: [{script: echo deploy}]
+  - stage: Rollback
+    dependsOn: Build
+    condition: failed()
+    jobs:
+      - job: rollback
+        steps: [{script: echo rollback}]
+  - stage: Notify
+    dependsOn: [Deploy, Rollback]
+    condition: always()
+    jobs:
+      - job: notify
+        steps: [{script: echo notify}]
+""")
+    result = StepExecutor().execute_pipeline(pipeline)
+
+    assert not result.success
+    assert _statuses(result) == {
+        'compile': Status.FAILED,
+        'deploy': Status.SKIPPED,
+        'rollback': Status.PASSED,
+        'notify': Status.PASSED,
+    }
+
+
+def test_jobs_wait_for_needs_and_skip_after_failure():
+    pipeline = PipelineParser().parse(yaml.safe_load("""
+jobs:
+  build:
+    steps: [{run: exit 2}]
+  test:
+    needs: build
+    steps: [{run: echo test}]
+  report:
+    needs: build
+    if: always()
+    steps: [{run: echo report}]
+  cleanup:
+    needs: build
+    if: failure()
+    steps: [{run: echo cleanup}]
+"""), 'github')
+    result = StepExecutor().execute_pipeline(pipeline)
+
+    assert _statuses(result) == {
+        'build': Status.FAILED,
+        'test': Status.SKIPPED,
+        'report': Status.PASSED,
+        'cleanup': Status.PASSED,
+    }
+
+
+def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError, match="unknown stage"):
+        JobGraph(_azure("""
+stages:
+  - stage: A
+    dependsOn: Missing
+    jobs: []
+"""))
+    with pytest.raises(ValueError, match="cycle"):
+        JobGraph(_azure("""
+stages:
+  - stage: A
+    dependsOn: B
+    jobs: []
+  - stage: B
+    dependsOn: A
+    jobs: []
+"""))
+
+
+@pytest.mark.parametrize("condition, expected", [
+    ("succeeded()", True),
+    ("failed()", False),
+    ("failed('Lint')", True),
+    ("and(succeeded('Build'), eq(variables['BRANCH'], 'main'))", True),
+    ("or(failed(), ne(variables.BRANCH, 'main'))", True),
+    ("not(in(variables['BRANCH'], 'dev', 'release'))", True),
+    ("${{ env.BRANCH == 'main' && !cancelled() }}", True),
+    ("env.BRANCH != 'main' || failure()", True),
+    ("startsWith(variables['BRANCH'], 'ma')", True),
+    ("github.event_name == 'push'", True),  # unsupported: never blocks
+])
+def test_condition_expressions(condition, expected):
+    env = {'BRANCH': 'main'}
+    dependencies = {'Build': Status.PASSED, 'Lint': Status.FAILED}
+    if condition in ("succeeded()", "failed()"):
+        dependencies = {'Build': Status.PASSED}
+    assert conditions.evaluate(condition, env, dependencies) is expected
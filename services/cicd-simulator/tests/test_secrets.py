@@ -0,0 +1,160 @@
+"""
+Property Test: Secrets and Output Masking
+
+Property: ``${{ secrets.NAME }}`` SHALL resolve to the loaded secret value,
+and no secret value SHALL reach any output sink (step results, streamed
+output events, distributed worker traffic) even when it is written across
+several reads. Workers SHALL only receive the secrets their job references.
+"""
+
+import re
+import threading
+
+import yaml
+from hypothesis import given, strategies as st, settings
+
+from simulator.parser import PipelineParser
+from simulator.executor import StepExecutor, Status
+from simulator.events import EventKind
+from simulator.masking import MASK, SecretMasker, load_secrets, parse_dotenv
+from simulator.distributed import Coordinator, Worker
+
+
+def _reference_mask(text: str, secrets: list[str]) -> str:
+    hidden = [False] * len(text)
+    for secret in secrets:
+        start = text.find(secret)
+        while start != -1:
+            hidden[start:start + len(secret)] = [True] * len(secret)
+            start = text.find(secret, start + 1)
+    out, i = [], 0
+    while i < len(text):
+        if hidden[i]:
+            while i < len(text) and hidden[i]:
+                i += 1
+            out.append(MASK)
+        else:
+            out.append(text[i])
+            i += 1
+    return ''.join(out)
+
+
+@st.composite
+def _masking_case(draw):
+    alphabet = 'abcx'
+    secrets = draw(st.lists(st.text(alphabet, min_size=3, max_size=6), min_size=1, max_size=6))
+    pieces = draw(st.lists(st.one_of(st.text(alphabet + ' \n', max_size=8),
+                                     st.sampled_from(secrets)), max_size=12))
+    text = ''.join(pieces)
+    cuts = sorted(draw(st.lists(st.integers(0, len(text)), max_size=6)))
+    return secrets, text, cuts
+
+
+@given(_masking_case())
+@settings(max_examples=300, deadline=None)
+def test_streamed_masking_matches_whole_text_masking(case):
+    secrets, text, cuts = case
+    masker = SecretMasker(secrets)
+    expected = _reference_mask(text, secrets)
+    assert masker.mask(text) == expected
+
+    stream = masker.stream()
+    bounds = [0, *cuts, len(text)]
+    streamed = ''.join(stream.feed(text[a:b]) for a, b in zip(bounds, bounds[1:])) + stream.flush()
+    # a run split at a chunk boundary may be masked as two adjacent runs
+    assert re.sub(r'(\*\*\*)+', MASK, streamed) == expected
+    for secret in secrets:
+        assert secret not in streamed
+
+
+def test_secrets_are_loaded_from_file_and_env(tmp_path):
+    assert parse_dotenv('# comment\nexport A="x y"\nB=plain # note\nC=\'q\'\n') == \
+        {'A': 'x y', 'B': 'plain', 'C': 'q'}
+
+    path = tmp_path / '.secrets'
+    path.write_text('TOKEN=from-file\n')
+    environ = {'CICD_SIM_SECRET_TOKEN': 'from-env', 'CICD_SIM_SECRET_KEY': 'k3y', 'HOME': '/'}
+    assert load_secrets(str(path), environ=environ) == {'TOKEN': 'from-file', 'KEY': 'k3y'}
+    assert load_secrets(None, env_prefix=None, environ=environ) == {}
+
+
+WORKFLOW = """
+name: Secrets
+env:
+  TOKEN: ${{ secrets.TOKEN }}
+jobs:
+  deploy:
+    steps:
+      - name: split write
+        run: printf 'token=hun'; sleep 0.1; printf 'ter2\\n'; echo "$TOKEN" >&2
+      - name: inline
+        run: echo "inline ${{ secrets.TOKEN }} and ${{ secrets.MISSING }}."
+      - name: guarded
+        if: secrets.TOKEN != ''
+        run: echo guarded
+"""
+
+
+def test_secrets_are_substituted_and_masked():
+    pipeline = PipelineParser().parse(yaml.safe_load(WORKFLOW), 'github')
+    assert pipeline.secrets == ['TOKEN', 'MISSING']
+
+    events = []
+    executor = StepExecutor(secrets={'TOKEN': 'hunter2'})
+    executor.add_listener(events.append)
+    result = executor.execute_pipeline(pipeline)
+
+    steps = result.job_results[0].step_results
+    assert [s.status for s in steps] == [Status.PASSED] * 3
+    assert steps[0].output == "token=***\n"
+    assert steps[0].error == "***\n"
+    assert steps[1].output == "inline *** and .\n"
+    streamed = ''.join(e.output for e in events if e.kind is EventKind.STEP_OUTPUT)
+    assert 'hunter2' not in streamed and '***' in streamed
+
+
+def test_secret_variables_are_not_inherited_by_steps(monkeypatch):
+    monkeypatch.setenv('CICD_SIM_SECRET_TOKEN', 'hunter2')
+    monkeypatch.setenv('MY_SECRET_KEY', 'swordfish')
+    monkeypatch.setenv('PLAIN', 'visible')
+    step = {'run': 'env | grep -c -e hunter2 -e swordfish; echo "$PLAIN"'}
+    pipeline = PipelineParser().parse({'jobs': {'j': {'steps': [step]}}}, 'github')
+
+    for prefix, leaked in (('CICD_SIM_SECRET_', 1), ('MY_SECRET_', 1), (None, 2)):
+        executor = StepExecutor(secrets=load_secrets(env_prefix=prefix), secrets_prefix=prefix)
+        output = executor.execute_pipeline(pipeline).job_results[0].step_results[0].output
+        assert output.split() == [str(leaked), 'visible']
+
+
+class _RecordingWorker(Worker):
+    """Records the secrets each job message carries."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.received = []
+
+    def _run_job(self, connection, message):
+        self.received.append(message['secrets'])
+        super()._run_job(connection, message)
+
+
+def test_workers_mask_output_before_sending_it():
+    pipeline = PipelineParser().parse(yaml.safe_load(WORKFLOW), 'github')
+    coordinator = Coordinator('tcp://127.0.0.1:0',
+                              secrets={'TOKEN': 'hunter2', 'UNUSED': 'not-for-this-job'})
+    worker = _RecordingWorker(coordinator.address, slots=1, name='w')
+    threading.Thread(target=worker.serve, daemon=True).start()
+    try:
+        assert coordinator.wait_for_workers(1, timeout=10)
+        events = []
+        coordinator.add_listener(events.append)
+        result = coordinator.execute_pipeline(pipeline)
+    finally:
+        coordinator.close()
+
+    steps = result.job_results[0].step_results
+    assert steps[0].output == "token=***\n"
+    streamed = [e for e in events if e.kind is EventKind.STEP_OUTPUT]
+    assert streamed and all('hunter2' not in e.output for e in streamed)
+    # workers only get the secrets the job references
+    assert worker.received == [{'TOKEN': 'hunter2'}]
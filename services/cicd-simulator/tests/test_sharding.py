@@ -0,0 +1,178 @@
+"""
+Property Test: Timing-Based Test Sharding
+
+Property: Sharding SHALL assign every test to exactly one shard, keep the
+estimated shard durations within one test's duration of each other, run the
+shards concurrently with SHARD_INDEX/SHARD_TOTAL set, and merge the shard
+reports into a single report.
+"""
+
+import os
+import xml.etree.ElementTree as ET
+
+from hypothesis import given, strategies as st, settings
+
+from simulator.parser import Step
+from simulator.executor import StepExecutor
+from simulator.sharding import load_timings, merge_reports, plan_shards
+
+
+PYTEST_REPORT = """<?xml version="1.0" encoding="utf-8"?>
+<testsuites><testsuite name="pytest" tests="3" failures="0" errors="0" skipped="0" time="9.0">
+  <testcase classname="tests.test_api" name="test_get" time="5.0"/>
+  <testcase classname="tests.test_api.TestPost" name="test_post" time="3.0"/>
+  <testcase classname="tests.test_util" name="test_fmt" time="1.0"/>
+</testsuite></testsuites>
+"""
+
+
+@given(
+    durations=st.dictionaries(
+        st.text(alphabet='abcdefgh', min_size=1, max_size=6),
+        st.floats(min_value=0.1, max_value=100),
+        min_size=1, max_size=40),
+    total=st.integers(min_value=1, max_value=8),
+)
+@settings(max_examples=50, deadline=None)
+def test_shards_are_balanced_partitions(durations, total):
+    tests = sorted(durations)
+    shards = plan_shards(tests, durations, total)
+
+    assigned = [t for shard in shards for t in shard.tests]
+    assert sorted(assigned) == tests
+    assert len(shards) == min(total, len(tests))
+    assert all(shard.tests for shard in shards)
+    loads = [shard.estimated for shard in shards if shard.tests]
+    if len(loads) == total:
+        assert max(loads) - min(loads) <= max(durations.values()) + 1e-9
+
+
+def test_timings_are_read_per_test_and_per_file(tmp_path):
+    report = tmp_path / 'junit.xml'
+    report.write_text(PYTEST_REPORT)
+    timings = load_timings([str(report)])
+
+    assert timings['tests.test_api::test_get'] == 5.0
+    assert timings['tests/test_api.py'] == 8.0
+    assert timings['tests/test_util.py'] == 1.0
+
+
+def test_unknown_tests_get_the_mean_duration():
+    shards = plan_shards(['a', 'b', 'new'], {'a': 4.0, 'b': 2.0}, 2)
+    # 'new' is estimated at 3s, so it is paired with 'b' rather than 'a'
+    assert sorted(s.tests for s in shards) == [['a'], ['new', 'b']]
+    assert sorted(s.estimated for s in shards) == [4.0, 5.0]
+
+
+def test_merge_reports(tmp_path):
+    for i in range(2):
+        (tmp_path / f'shard-{i}.xml').write_text(
+            f'<testsuite name="s{i}" tests="{i + 2}" failures="{i}" time="1.5">'
+            f'<testcase classname="c" name="t{i}" time="1.5"/></testsuite>')
+    summary = merge_reports(
+        [str(tmp_path / 'shard-0.xml'), str(tmp_path / 'shard-1.xml'), str(tmp_path / 'gone.xml')],
+        str(tmp_path / 'out' / 'junit.xml'))
+
+    assert (summary.tests, summary.failures, summary.time) == (5, 1, 3.0)
+    assert summary.missing == [str(tmp_path / 'gone.xml')]
+    root = ET.parse(tmp_path / 'out' / 'junit.xml').getroot()
+    assert root.tag == 'testsuites' and len(root) == 2
+
+
+def test_shard_action_runs_and_merges(tmp_path):
+    (tmp_path / 'tests').mkdir()
+    for name in ('test_a.py', 'test_b.py', 'test_c.py', 'test_d.py'):
+        (tmp_path / 'tests' / name).write_text('')
+
+    command = (
+        'echo "shard $SHARD_INDEX of $SHARD_TOTAL: $SHARD_TESTS"; '
+        'n=$(echo $SHARD_TESTS | wc -w); '
+        'printf \'<testsuite tests="%s" failures="0" time="1"></testsuite>\' $n '
+        '> shard-$SHARD_INDEX.xml'
+    )
+    step = Step(name="Tests", uses="cicd-sim/shard-tests@v1", with_args={
+        'total': 2,
+        'tests': 'tests/test_*.py',
+        'command': command,
+        'report': 'shard-$SHARD_INDEX.xml',
+        'merged-report': 'junit.xml',
+    })
+    result = StepExecutor(working_dir=str(tmp_path)).execute_step(step, dict(os.environ))
+
+    assert result.success, result.error
+    assert "shard 0 of 2" in result.output and "shard 1 of 2" in result.output
+    assert "4 tests, 0 failures" in result.output
+    assert ET.parse(tmp_path / 'junit.xml').getroot().get('tests') == '4'
+
+
+def test_failing_shard_fails_the_step(tmp_path):
+    step = Step(name="Tests", uses="cicd-sim/shard-tests", with_args={
+        'total': 3,
+        'list-command': 'printf "a\\nb\\nc\\n"',
+        'command': 'test "$SHARD_INDEX" != 1',
+    })
+    result = StepExecutor(working_dir=str(tmp_path)).execute_step(step, dict(os.environ))
+    assert not result.success
+    assert result.exit_code == 1
+
+
+def test_stale_reports_are_not_merged(tmp_path):
+    stale = '<testsuite tests="7" failures="0" time="1"></testsuite>'
+    for i in range(2):
+        (tmp_path / f'shard-{i}.xml').write_text(stale)
+    step = Step(name="Tests", uses="cicd-sim/shard-tests", with_args={
+        'total': 2,
+        'list-command': 'printf "a\\nb\\n"',
+        'command': 'test "$SHARD_INDEX" != 1 || exit 3; '
+                   'printf \'<testsuite tests="1" failures="0"></testsuite>\' > shard-$SHARD_INDEX.xml',
+        'report': 'shard-$SHARD_INDEX.xml',
+        'merged-report': 'junit.xml',
+    })
+    result = StepExecutor(working_dir=str(tmp_path)).execute_step(step, dict(os.environ))
+
+    assert not result.success
+    assert "Merged 1 reports into junit.xml: 2 tests, 0 failures, 1 errors" in result.output
+    assert "shard 2/2 failed without writing shard-1.xml" in result.output
+    root = ET.parse(tmp_path / 'junit.xml').getroot()
+    assert (root.get('tests'), root.get('errors')) == ('2', '1')
+
+
+def test_listed_tests_are_not_cut_to_the_output_limit(tmp_path):
+    names = [f"tests/test_module_{i:03d}.py::test_case" for i in range(60)]
+    step = Step(name="Tests", uses="cicd-sim/shard-tests", with_args={
+        'total': 3,
+        'list-command': 'printf "%s\\n" ' + ' '.join(names),
+        'command': 'for t in $SHARD_TESTS; do echo "$t" >> ran-$SHARD_INDEX.txt; done',
+    })
+    executor = StepExecutor(working_dir=str(tmp_path), output_limit=200)
+    result = executor.execute_step(step, dict(os.environ))
+
+    assert result.success, result.error
+    assert result.output.startswith("Split 60 tests into 3 shards")
+    ran = [line for path in tmp_path.glob('ran-*.txt') for line in path.read_text().split()]
+    assert sorted(ran) == names
+
+
+def test_empty_shards_are_not_run(tmp_path):
+    step = Step(name="Tests", uses="cicd-sim/shard-tests", with_args={
+        'total': 5,
+        'list-command': 'printf "a\\nb\\n"',
+        'command': 'test -n "$SHARD_TESTS" && echo "$SHARD_INDEX/$SHARD_TOTAL"',
+    })
+    result = StepExecutor(working_dir=str(tmp_path)).execute_step(step, dict(os.environ))
+    assert result.success, result.error
+    assert "into 2 shards" in result.output
+    assert "0/2" in result.output and "1/2" in result.output
+
+
+def test_no_tests_or_bad_total_fail_the_step(tmp_path):
+    executor = StepExecutor(working_dir=str(tmp_path))
+    for args, error in (({'tests': 'tests/*.py'}, "found no tests"),
+                        ({'tests': '*', 'total': 'many'}, "'total' must be"),
+                        ({'tests': '*', 'total': 0}, "'total' must be")):
+        step = Step(name="Tests", uses="cicd-sim/shard-tests",
+                    with_args={**args, 'command': 'echo ran'})
+        result = executor.execute_step(step, dict(os.environ))
+        assert not result.success
+        assert error in result.error
+        assert "ran" not in result.output
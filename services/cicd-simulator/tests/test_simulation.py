@@ -0,0 +1,193 @@
+"""
+Property Test: Virtual-Clock Duration Simulation
+
+Property: A simulated run SHALL schedule jobs with the same dependency
+rules as a real run, never finish before the critical path or before the
+work fits on the available slots, report utilization and queue wait
+consistently, and schedule a 10,000-job pipeline in seconds.
+"""
+
+import time
+
+import pytest
+import yaml
+from hypothesis import given, strategies as st, settings
+
+from simulator.parser import Pipeline, Job, Step, PipelineParser
+from simulator.executor import StepExecutor, Status
+from simulator.logarchive import LogArchiveWriter
+from simulator.simulation import SimulatedExecutor, duration_model
+from simulator.tracing import Tracer
+
+
+def _job(name, needs=(), steps=1, condition=None):
+    return Job(name=name, needs=list(needs), condition=condition,
+               steps=[Step(name=f"s{i}", run="true") for i in range(steps)])
+
+
+def test_independent_jobs_share_slots():
+    pipeline = Pipeline(name="flat", pipeline_type="github",
+                        jobs=[_job(f"j{i}") for i in range(4)])
+    executor = SimulatedExecutor(duration_model("fixed:10"), max_parallel=2)
+    result = executor.execute_pipeline(pipeline)
+
+    report = executor.report
+    assert result.success
+    assert report.makespan == 20
+    assert report.utilization == 1.0
+    assert sorted(report.queue_waits) == [0, 0, 10, 10]
+    assert report.peak_queue == 4
+
+
+@st.composite
+def _dags(draw):
+    count = draw(st.integers(min_value=1, max_value=25))
+    jobs = []
+    for i in range(count):
+        needs = draw(st.sets(st.integers(0, i - 1), max_size=3)) if i else set()
+        jobs.append(_job(f"j{i}", [f"j{n}" for n in sorted(needs)],
+                         steps=draw(st.integers(1, 3))))
+    return jobs
+
+
+@given(jobs=_dags(), slots=st.integers(min_value=1, max_value=6))
+@settings(max_examples=100, deadline=None)
+def test_makespan_is_bounded_by_critical_path_and_capacity(jobs, slots):
+    pipeline = Pipeline(name="dag", pipeline_type="github", jobs=jobs)
+    executor = SimulatedExecutor(duration_model("fixed:1"), max_parallel=slots)
+    executor.execute_pipeline(pipeline)
+    report = executor.report
+
+    finish = {}
+    for job in jobs:  # needs only point backwards
+        finish[job.name] = max((finish[n] for n in job.needs), default=0) + len(job.steps)
+    critical_path = max(finish.values())
+    work = sum(len(job.steps) for job in jobs)
+
+    assert report.work == work
+    assert report.makespan >= critical_path
+    assert report.makespan >= work / slots - 1e-9
+    if slots >= len(jobs):
+        assert report.makespan == critical_path
+    assert report.jobs_run == len(jobs)
+    assert 0 < report.utilization <= 1 + 1e-9
+
+
+def test_failures_follow_real_condition_semantics():
+    pipeline = Pipeline(name="conditions", pipeline_type="github", jobs=[
+        _job("build"),
+        _job("test", needs=["build"]),
+        _job("report", needs=["test"], condition="always()"),
+        _job("notify", needs=["build"], condition="failure()"),
+    ])
+    simulated = SimulatedExecutor(duration_model("fixed:1"), failure_rate=1.0)
+    result = simulated.execute_pipeline(pipeline)
+
+    for job in pipeline.jobs:
+        for step in job.steps:
+            step.run = "exit 1"
+    real = StepExecutor().execute_pipeline(pipeline)
+
+    assert [(jr.job_name, jr.status) for jr in result.job_results] == \
+        [(jr.job_name, jr.status) for jr in real.job_results]
+    assert simulated.report.jobs_failed == 3
+
+
+def test_trace_shows_virtual_time_per_slot():
+    pipeline = Pipeline(name="traced", pipeline_type="github", jobs=[
+        _job("a", steps=2), _job("b"),
+        _job("c", needs=["a"], condition="secrets.TOKEN != ''"),
+    ])
+    tracer = Tracer()
+    executor = SimulatedExecutor(duration_model("fixed:3"), max_parallel=2, tracer=tracer,
+                                 secrets={'TOKEN': 'x'})
+    executor.execute_pipeline(pipeline)
+
+    spans = {(e['cat'], e['name']): e for e in tracer.events if e['ph'] == 'X'}
+    assert spans[('pipeline', 'traced')]['dur'] == 9e6  # µs
+    assert [spans[('job', name)]['dur'] for name in 'abc'] == [6e6, 3e6, 3e6]
+    assert spans[('job', 'c')]['ts'] - spans[('job', 'a')]['ts'] == 6e6
+    assert spans[('job', 'a')]['tid'] != spans[('job', 'b')]['tid']
+    steps = [e for e in tracer.events if e.get('cat') == 'step' and e['args']['job'] == 'a']
+    assert [(e['name'], e['ts'] - steps[0]['ts']) for e in steps] == [('s0', 0), ('s1', 3e6)]
+
+
+def test_stages_run_in_dependency_order():
+    pipeline = PipelineParser().parse(yaml.safe_load("""
+stages:
+  - stage: Build
+    jobs:
+      - job: a
+        steps: [{script: "true"}]
+      - job: b
+        steps: [{script: "true"}]
+  - stage: Deploy
+    jobs:
+      - job: c
+        steps: [{script: "true"}]
+"""), 'azure')
+    executor = SimulatedExecutor(duration_model("fixed:5"), max_parallel=4)
+    executor.execute_pipeline(pipeline)
+    assert executor.report.makespan == 10
+    assert executor.report.queue_waits == [0, 0, 0]
+
+
+def test_history_durations_come_from_the_archive(tmp_path):
+    pipeline = Pipeline(name="timed", pipeline_type="github", jobs=[
+        Job(name="build", steps=[Step(name="compile", run="sleep 0.2")]),
+    ])
+    executor = StepExecutor(working_dir=str(tmp_path))
+    executor.add_listener(LogArchiveWriter(str(tmp_path)))
+    executor.execute_pipeline(pipeline)
+
+    model = duration_model("history:fixed:7", seed=1, log_dir=str(tmp_path))
+    assert 0.2 <= model("build", "compile") < 2
+    assert model("build", "never-seen") == 7
+    assert duration_model("history", log_dir=str(tmp_path))("x", "y") == \
+        pytest.approx(model("build", "compile"))
+
+
+def test_distributions_are_seeded():
+    for spec in ("uniform:1,5", "exp:3", "lognormal:0,1"):
+        first = duration_model(spec, seed=42)
+        second = duration_model(spec, seed=42)
+        draws = [first("j", "s") for _ in range(20)]
+        assert draws == [second("j", "s") for _ in range(20)]
+        assert all(d >= 0 for d in draws)
+    for spec in ("fixed", "fixed:-1", "uniform:5,1", "normal:1"):
+        with pytest.raises(ValueError):
+            duration_model(spec)
+
+
+def test_failures_are_independent_of_durations():
+    jobs = [_job(f"j{i}") for i in range(400)]
+    pipeline = Pipeline(name="independent", pipeline_type="github", jobs=jobs)
+    durations = duration_model("uniform:0,1", seed=3)
+    recorded = []
+
+    def record(job, step):
+        recorded.append(durations(job, step))
+        return recorded[-1]
+
+    executor = SimulatedExecutor(record, max_parallel=400, failure_rate=0.5, seed=3)
+    result = executor.execute_pipeline(pipeline)
+
+    failed = [d for d, jr in zip(recorded, result.job_results) if jr.status is Status.FAILED]
+    passed = [d for d, jr in zip(recorded, result.job_results) if jr.status is Status.PASSED]
+    assert 100 < len(failed) < 300
+    # With a shared stream every failed step would be shorter than every passed one
+    assert max(failed) > min(passed)
+    assert abs(sum(failed) / len(failed) - sum(passed) / len(passed)) < 0.15
+
+
+def test_ten_thousand_jobs_simulate_quickly():
+    jobs = [_job(f"j{i}", [f"j{i - d}" for d in (1, 7, 50) if i - d >= 0], steps=2)
+            for i in range(10_000)]
+    pipeline = Pipeline(name="huge", pipeline_type="github", jobs=jobs)
+    executor = SimulatedExecutor(duration_model("exp:2", seed=7), max_parallel=32, seed=7)
+
+    start = time.monotonic()
+    result = executor.execute_pipeline(pipeline)
+    assert time.monotonic() - start < 5
+    assert result.success and executor.report.jobs_run == 10_000
+    assert all(jr.status is Status.PASSED for jr in result.job_results)
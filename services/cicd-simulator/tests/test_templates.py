@@ -0,0 +1,243 @@
+"""
+Property Test: Template and Reusable Workflow Expansion
+
+Property: A pipeline built from templates SHALL parse to the same jobs and
+steps as the equivalent hand-expanded pipeline, each template file SHALL be
+parsed once per cache lifetime however often it is instantiated, and cyclic
+or over-deep includes SHALL be rejected.
+"""
+
+import pytest
+
+from simulator.executor import Status, StepExecutor
+from simulator.parser import PipelineParser
+from simulator.templates import TemplateCache, TemplateError, substitute
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+def test_substitute_keeps_types_of_whole_expressions():
+    node = {'steps': '${{ parameters.steps }}', 'name': 'Build ${{ parameters.name }}',
+            'other': '${{ inputs.name }}'}
+    result = substitute(node, 'parameters', {'steps': [{'script': 'ls'}], 'name': 'app'})
+    assert result == {'steps': [{'script': 'ls'}], 'name': 'Build app',
+                      'other': '${{ inputs.name }}'}
+
+
+def test_azure_step_job_and_stage_templates(tmp_path):
+    _write(tmp_path / 'templates' / 'steps.yml', """
+parameters:
+  - name: greeting
+    default: hello
+steps:
+  - script: echo ${{ parameters.greeting }}
+    displayName: Say ${{ parameters.greeting }}
+""")
+    _write(tmp_path / 'templates' / 'job.yml', """
+parameters:
+  - name: name
+jobs:
+  - job: ${{ parameters.name }}
+    steps:
+      - template: steps.yml
+        parameters:
+          greeting: hi ${{ parameters.name }}
+""")
+    _write(tmp_path / 'templates' / 'stage.yml', """
+parameters:
+  - name: stage
+stages:
+  - stage: ${{ parameters.stage }}
+    jobs:
+      - template: job.yml
+        parameters:
+          name: ${{ parameters.stage }}Job
+""")
+    pipeline_file = _write(tmp_path / 'azure-pipelines.yml', """
+name: Templated
+stages:
+  - template: templates/stage.yml
+    parameters:
+      stage: Build
+  - template: templates/stage.yml
+    parameters:
+      stage: Test
+  - stage: Deploy
+    jobs:
+      - job: DeployJob
+        steps:
+          - template: templates/steps.yml
+""")
+
+    cache = TemplateCache()
+    pipeline = PipelineParser(template_cache=cache).parse_file(str(pipeline_file), 'azure')
+
+    assert [s.name for s in pipeline.stages] == ['Build', 'Test', 'Deploy']
+    build_job = pipeline.stages[0].jobs[0]
+    assert build_job.name == 'BuildJob'
+    assert build_job.steps[0].run == 'echo hi BuildJob'
+    assert pipeline.stages[2].jobs[0].steps[0].name == 'Say hello'
+    # three template files, each parsed once despite six instantiations
+    assert cache.loads == 3
+    assert len(pipeline.template_files) == 3
+
+
+def test_azure_extends(tmp_path):
+    _write(tmp_path / 'base.yml', """
+parameters:
+  - name: buildSteps
+    default: []
+steps:
+  - script: echo setup
+  - ${{ parameters.buildSteps }}
+""")
+    pipeline_file = _write(tmp_path / 'pipeline.yml', """
+extends:
+  template: base.yml
+  parameters:
+    buildSteps:
+      script: make
+""")
+    pipeline = PipelineParser(template_cache=TemplateCache()).parse_file(
+        str(pipeline_file), 'azure')
+    assert [s.run for s in pipeline.jobs[0].steps] == ['echo setup', 'make']
+
+
+def test_azure_step_list_parameter_is_flattened(tmp_path):
+    _write(tmp_path / 'base.yml', """
+parameters:
+  - name: buildSteps
+    type: stepList
+    default: []
+steps:
+  - script: echo setup
+  - ${{ parameters.buildSteps }}
+  - script: echo done
+""")
+    pipeline_file = _write(tmp_path / 'pipeline.yml', """
+extends:
+  template: base.yml
+  parameters:
+    buildSteps:
+      - script: make
+      - script: make test
+""")
+    parser = PipelineParser(template_cache=TemplateCache())
+    pipeline = parser.parse_file(str(pipeline_file), 'azure')
+    assert [s.run for s in pipeline.jobs[0].steps] == \
+        ['echo setup', 'make', 'make test', 'echo done']
+
+    _write(tmp_path / 'default.yml', "extends:\n  template: base.yml\n")
+    pipeline = parser.parse_file(str(tmp_path / 'default.yml'), 'azure')
+    assert [s.run for s in pipeline.jobs[0].steps] == ['echo setup', 'echo done']
+
+
+def test_github_reusable_workflow(tmp_path):
+    _write(tmp_path / '.github' / 'workflows' / 'build.yml', """
+on:
+  workflow_call:
+    inputs:
+      target:
+        type: string
+        default: all
+jobs:
+  compile:
+    steps:
+      - run: make ${{ inputs.target }}
+  package:
+    needs: compile
+    steps:
+      - run: tar czf out.tgz ${{ inputs.target }}
+""")
+    workflow = _write(tmp_path / '.github' / 'workflows' / 'ci.yml', """
+name: CI
+jobs:
+  lint:
+    steps:
+      - run: echo lint
+  build:
+    needs: lint
+    uses: ./.github/workflows/build.yml
+    with:
+      target: app
+  deploy:
+    needs: build
+    steps:
+      - run: echo deploy
+""")
+    pipeline = PipelineParser(template_cache=TemplateCache()).parse_file(str(workflow), 'github')
+    jobs = {job.name: job for job in pipeline.jobs}
+
+    assert list(jobs) == ['lint', 'build/compile', 'build/package', 'deploy']
+    assert jobs['build/compile'].needs == ['lint']
+    assert jobs['build/compile'].steps[0].run == 'make app'
+    assert jobs['build/package'].needs == ['build/compile']
+    assert jobs['deploy'].needs == ['build/compile', 'build/package']
+
+
+def test_github_caller_condition_applies_to_every_inner_job(tmp_path):
+    _write(tmp_path / '.github' / 'workflows' / 'deploy.yml', """
+on: workflow_call
+jobs:
+  plan:
+    steps:
+      - run: echo plan
+  notify:
+    needs: plan
+    if: always()
+    steps:
+      - run: echo notify
+""")
+    workflow = _write(tmp_path / '.github' / 'workflows' / 'ci.yml', """
+jobs:
+  deploy:
+    if: env.DEPLOY == 'yes'
+    uses: ./.github/workflows/deploy.yml
+""")
+    pipeline = PipelineParser(template_cache=TemplateCache()).parse_file(str(workflow), 'github')
+    result = StepExecutor(working_dir=str(tmp_path)).execute_pipeline(pipeline)
+
+    assert [(jr.job_name, jr.status) for jr in result.job_results] == \
+        [('deploy/plan', Status.SKIPPED), ('deploy/notify', Status.SKIPPED)]
+
+
+def test_template_cycle_is_rejected(tmp_path):
+    _write(tmp_path / 'a.yml', "steps:\n  - template: b.yml\n")
+    _write(tmp_path / 'b.yml', "steps:\n  - template: a.yml\n")
+    pipeline_file = _write(tmp_path / 'pipeline.yml', "steps:\n  - template: a.yml\n")
+
+    with pytest.raises(TemplateError, match="cycle"):
+        PipelineParser(template_cache=TemplateCache()).parse_file(str(pipeline_file), 'azure')
+
+
+def test_include_depth_is_limited(tmp_path):
+    for i in range(5):
+        _write(tmp_path / f't{i}.yml', f"steps:\n  - template: t{i + 1}.yml\n")
+    _write(tmp_path / 't5.yml', "steps:\n  - script: echo deep\n")
+    pipeline_file = _write(tmp_path / 'pipeline.yml', "steps:\n  - template: t0.yml\n")
+
+    parser = PipelineParser(template_cache=TemplateCache(), max_include_depth=3)
+    with pytest.raises(TemplateError, match="nesting"):
+        parser.parse_file(str(pipeline_file), 'azure')
+
+    parser = PipelineParser(template_cache=TemplateCache(), max_include_depth=6)
+    assert parser.parse_file(str(pipeline_file), 'azure').jobs[0].steps[0].run == 'echo deep'
+
+
+def test_cache_reloads_changed_templates(tmp_path):
+    template = _write(tmp_path / 'steps.yml', "steps:\n  - script: echo one\n")
+    pipeline_file = _write(tmp_path / 'pipeline.yml', "steps:\n  - template: steps.yml\n")
+    cache = TemplateCache()
+    parser = PipelineParser(template_cache=cache)
+
+    assert parser.parse_file(str(pipeline_file), 'azure').jobs[0].steps[0].run == 'echo one'
+    parser.parse_file(str(pipeline_file), 'azure')
+    assert cache.loads == 1
+
+    template.write_text("steps:\n  - script: echo two, changed\n")
+    assert parser.parse_file(str(pipeline_file), 'azure').jobs[0].steps[0].run == 'echo two, changed'
+    assert cache.loads == 2
@@ -0,0 +1,104 @@
+"""
+Property Test: Chrome Trace Export
+
+Property: A traced run SHALL write Chrome Trace Event Format spans for the
+pipeline, its stages, jobs and steps and the simulator's own overhead, with
+every job on a named worker-slot track, and an untraced run SHALL record
+nothing.
+"""
+
+import json
+
+import yaml
+
+from simulator.parser import PipelineParser
+from simulator.executor import StepExecutor
+from simulator.tracing import NULL_TRACER, Tracer
+
+
+WORKFLOW = """
+name: Traced
+jobs:
+  a:
+    steps: [{name: sleep a, run: sleep 0.2}]
+  b:
+    steps: [{name: sleep b, run: sleep 0.2}]
+  c:
+    needs: [a, b]
+    if: success()
+    steps:
+      - {name: report, run: echo done, if: "env.SKIP != 'true'"}
+"""
+
+AZURE = """
+name: Staged
+stages:
+  - stage: Build
+    jobs:
+      - job: compile
+        steps: [{script: echo build, displayName: compile}]
+  - stage: Test
+    jobs:
+      - job: unit
+        steps: [{script: echo test, displayName: unit}]
+"""
+
+
+def _traced_run(content, pipeline_type, tmp_path, max_parallel=2):
+    tracer = Tracer()
+    pipeline = PipelineParser(tracer=tracer).parse(yaml.safe_load(content), pipeline_type)
+    executor = StepExecutor(working_dir=str(tmp_path), max_parallel=max_parallel, tracer=tracer)
+    result = executor.execute_pipeline(pipeline)
+    path = tmp_path / 'trace.json'
+    tracer.write(str(path))
+    return result, json.loads(path.read_text())['traceEvents']
+
+
+def _spans(events, category):
+    return [e for e in events if e['ph'] == 'X' and e['cat'] == category]
+
+
+def test_trace_has_spans_for_every_level(tmp_path):
+    result, events = _traced_run(WORKFLOW, 'github', tmp_path)
+    assert result.success
+
+    assert [e['name'] for e in _spans(events, 'pipeline')] == ['Traced']
+    assert sorted(e['name'] for e in _spans(events, 'job')) == ['a', 'b', 'c']
+    assert sorted(e['name'] for e in _spans(events, 'step')) == ['report', 'sleep a', 'sleep b']
+    overhead = {e['name'] for e in _spans(events, 'overhead')}
+    assert {'parse', 'expand templates', 'condition', 'env', 'spawn'} <= overhead
+    for event in events:
+        if event['ph'] == 'X':
+            assert event['dur'] >= 0 and event['ts'] >= 0
+
+
+def test_jobs_run_on_worker_slot_tracks(tmp_path):
+    _, events = _traced_run(WORKFLOW, 'github', tmp_path)
+    tracks = {e['tid']: e['args']['name'] for e in events
+              if e['ph'] == 'M' and e['name'] == 'thread_name'}
+    jobs = {e['name']: e for e in _spans(events, 'job')}
+
+    assert all(tracks[job['tid']].startswith('slot') for job in jobs.values())
+    # a and b ran concurrently, so they must be on different tracks
+    assert jobs['a']['tid'] != jobs['b']['tid']
+    # steps nest inside their job on the same track
+    step = next(e for e in _spans(events, 'step') if e['name'] == 'sleep a')
+    assert step['tid'] == jobs['a']['tid']
+    assert jobs['a']['ts'] <= step['ts'] <= step['ts'] + step['dur'] <= \
+        jobs['a']['ts'] + jobs['a']['dur'] + 1
+
+
+def test_stages_are_traced_in_order(tmp_path):
+    _, events = _traced_run(AZURE, 'azure', tmp_path)
+    stages = _spans(events, 'stage')
+    assert [e['name'] for e in stages] == ['Build', 'Test']
+    assert stages[0]['ts'] + stages[0]['dur'] <= stages[1]['ts'] + 1
+    assert all(e['args']['status'] == 'passed' for e in stages)
+
+
+def test_tracing_is_off_by_default(tmp_path):
+    executor = StepExecutor(working_dir=str(tmp_path))
+    assert executor.tracer is NULL_TRACER
+    assert not NULL_TRACER.enabled
+    # the disabled tracer hands out one shared no-op span
+    assert NULL_TRACER.span("a", "job") is NULL_TRACER.span("b", "step")
@@ -0,0 +1,215 @@
+"""
+Property Test: Incremental Watch Mode
+
+Property: After a change, the watcher SHALL re-run exactly the jobs whose
+definition or declared input paths changed, plus every job that transitively
+needs them.
+"""
+
+import threading
+import time
+from pathlib import Path
+
+from simulator.parser import PipelineParser
+from simulator.executor import StepExecutor
+from simulator.watcher import (
+    PipelineWatcher, PollingSource, changed_jobs, jobs_for_paths,
+    with_downstream, wait_for_changes,
+)
+
+
+WORKFLOW = """
+name: Watch
+jobs:
+  lint:
+    paths: [src/*.py]
+    steps:
+      - name: Lint
+        run: echo lint
+  build:
+    paths: [src/*]
+    steps:
+      - name: Build
+        run: echo {build}
+  test:
+    needs: build
+    steps:
+      - name: Test
+        run: echo test
+  docs:
+    paths: [docs/*]
+    steps:
+      - name: Docs
+        run: echo docs
+"""
+
+
+def _parse(build="build"):
+    import yaml
+    return PipelineParser().parse(yaml.safe_load(WORKFLOW.format(build=build)), 'github')
+
+
+def test_only_modified_jobs_are_changed():
+    old, new = _parse(), _parse(build="rebuilt")
+    assert changed_jobs(old, new) == {'build'}
+    assert changed_jobs(old, _parse()) == set()
+    assert changed_jobs(None, new) == {'lint', 'build', 'test', 'docs'}
+
+
+def test_downstream_jobs_are_included():
+    pipeline = _parse()
+    assert with_downstream(pipeline, {'build'}) == {'build', 'test'}
+    assert with_downstream(pipeline, {'docs'}) == {'docs'}
+
+
+def test_declared_paths_select_jobs(tmp_path):
+    pipeline = _parse()
+    affected = jobs_for_paths(pipeline, [tmp_path / 'docs' / 'index.md'], str(tmp_path))
+    # 'test' declares no paths, so any change in the working dir affects it
+    assert affected == {'docs', 'test'}
+
+    affected = jobs_for_paths(pipeline, [tmp_path / 'src' / 'app.py'], str(tmp_path))
+    assert affected == {'lint', 'build', 'test'}
+
+    assert jobs_for_paths(pipeline, [Path('/elsewhere/file')], str(tmp_path)) == set()
+
+
+def test_polling_source_reports_changes(tmp_path):
+    target = tmp_path / 'app.txt'
+    target.write_text('one')
+    source = PollingSource([str(tmp_path)], interval=0.01)
+
+    assert source.poll(0.01) == set()
+    target.write_text('two!')
+    assert target in source.poll(0.01)
+
+
+def test_debounce_coalesces_changes(tmp_path):
+    source = PollingSource([str(tmp_path)], interval=0.01)
+
+    def writer():
+        for i in range(3):
+            (tmp_path / f'file{i}.txt').write_text(str(i))
+            time.sleep(0.02)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    changed = wait_for_changes(source, debounce=0.2)
+    thread.join()
+    assert {p.name for p in changed} == {'file0.txt', 'file1.txt', 'file2.txt'}
+
+
+def test_cancel_kills_running_step():
+    from simulator.parser import Step
+    executor = StepExecutor()
+    timer = threading.Timer(0.2, executor.cancel)
+    timer.start()
+
+    started = time.monotonic()
+    result = executor.execute_step(Step(name="slow", run="sleep 30"), {})
+    assert time.monotonic() - started < 10
+    assert not result.success
+    assert result.error == "Cancelled"
+
+
+def test_watcher_reruns_affected_jobs(tmp_path):
+    workflow = tmp_path / 'workflow.yml'
+    workflow.write_text(WORKFLOW.format(build='build'))
+    (tmp_path / 'docs').mkdir()
+
+    runs = []
+    finished = threading.Semaphore(0)
+
+    def on_result(result):
+        runs.append({jr.job_name for jr in result.job_results})
+        finished.release()
+
+    watcher = PipelineWatcher(str(workflow), working_dir=str(tmp_path), debounce=0.1,
+                              polling=True, on_result=on_result)
+    watcher.source.interval = 0.05
+    stop = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(stop,))
+    thread.start()
+    try:
+        assert finished.acquire(timeout=30)
+        assert runs[0] == {'lint', 'build', 'test', 'docs'}
+
+        workflow.write_text(WORKFLOW.format(build='rebuilt'))
+        assert finished.acquire(timeout=30)
+        assert runs[1] == {'build', 'test'}
+    finally:
+        stop.set()
+        thread.join(timeout=30)
+
+
+def _start_watcher(workflow, tmp_path, **callbacks):
+    watcher = PipelineWatcher(str(workflow), working_dir=str(tmp_path), debounce=0.1,
+                              polling=True, settle=0.5, **callbacks)
+    watcher.source.interval = 0.05
+    stop = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(stop,))
+    thread.start()
+    return watcher, stop, thread
+
+
+def _wait_until(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+
+def test_files_written_by_a_run_do_not_retrigger_it(tmp_path):
+    workflow = tmp_path / 'workflow.yml'
+    workflow.write_text("""
+name: Writer
+jobs:
+  stamp:
+    steps:
+      - name: Stamp
+        run: date +%s%N > out.txt; mkdir -p reports; date +%s%N > reports/junit.xml
+""")
+    runs = []
+    watcher, stop, thread = _start_watcher(workflow, tmp_path, on_result=runs.append)
+    try:
+        # the first run's output looks like an edit, so it is run once more; the
+        # second run writes the same files again and they are learned as outputs
+        time.sleep(3)
+        assert len(runs) == 2
+        assert watcher.outputs == {tmp_path / 'out.txt', tmp_path / 'reports' / 'junit.xml'}
+        # an edit once the run has settled still re-runs the job
+        (tmp_path / 'input.txt').write_text('edited')
+        assert _wait_until(lambda: len(runs) == 3)
+    finally:
+        stop.set()
+        thread.join(timeout=30)
+
+
+def test_edit_during_a_run_supersedes_it(tmp_path):
+    workflow = tmp_path / 'workflow.yml'
+    workflow.write_text("""
+name: Slow
+jobs:
+  build:
+    steps:
+      - name: Build
+        run: sleep 2
+""")
+    (tmp_path / 'src').mkdir()
+    source = tmp_path / 'src' / 'app.py'
+    source.write_text('v1')
+    starts, results = [], []
+    _, stop, thread = _start_watcher(workflow, tmp_path, on_start=starts.append,
+                                     on_result=results.append)
+    try:
+        assert _wait_until(lambda: len(starts) == 1)
+        time.sleep(0.8)
+        source.write_text('v2')
+        # the edit cancels the first run and starts another well before it would finish
+        assert _wait_until(lambda: len(starts) == 2, timeout=1.5)
+        assert _wait_until(lambda: len(results) == 1)
+        time.sleep(0.5)
+        assert len(results) == 1 and len(starts) == 2  # the cancelled run reported nothing
+    finally:
+        stop.set()
+        thread.join(timeout=30)